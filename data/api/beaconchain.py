@@ -1,23 +1,20 @@
 import requests
-import diskcache
 import logging
 
+from data.api import client
+from data.api.cache import cache
 from model.types import Gwei
 
+API_URL = "https://beaconcha.in/api/v1"
 
-cache = diskcache.Cache(".api.cache")
 
-
-@cache.memoize(expire=(6 * 60 * 60))  # cached for 6 hours
+@cache.memoize(expire=(6 * 60 * 60), valid=bool, default={})  # cached for 6 hours
 def get_epoch_data(epoch="latest"):
     try:
-        req = requests.get(
-            f"https://beaconcha.in/api/v1/epoch/{epoch}",
-            headers={"accept": "application/json"},
-        )
+        req = client.get(f"{API_URL}/epoch/{epoch}")
         req.raise_for_status()
         return req.json()["data"]
-    except requests.exceptions.HTTPError as err:
+    except requests.exceptions.RequestException as err:
         logging.error(err)
         return {}
 
@@ -0,0 +1,216 @@
+"""
+Two-tier cache shared by the API modules.
+
+An in-memory front tier over a `diskcache` disk tier, opened on first use,
+in the `API_CACHE_DIRECTORY` environment variable directory, or by default `.api.cache` in the repository root,
+so that notebooks and scripts share the same cache regardless of their working directory.
+
+Expired values are served stale while they are refreshed in a background thread (stale-while-revalidate),
+so only the first ever request for a value blocks.
+Concurrent requests for a value that isn't cached share a single call of the function, and while the value
+is being prefetched (see `client.prefetch()`) wait for it at most until the prefetch deadline,
+after which they get the function's default, so that a stalled request doesn't block the callers.
+
+Usage:
+```
+from data.api.cache import cache
+
+@cache.memoize(expire=(6 * 60 * 60))  # cached for 6 hours
+def get_data():
+    ...
+
+cache.stats()
+```
+"""
+
+import copy
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+import diskcache
+
+from data.api import client
+
+default_directory = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    ".api.cache",
+)
+
+
+class CacheManager:
+    """A two-tier stale-while-revalidate cache, with hit and miss statistics"""
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.getenv(
+            "API_CACHE_DIRECTORY", default_directory
+        )
+        self._disk = None
+        self._memory = {}
+        self._refreshing = set()
+        # The in-flight calls of values that aren't cached, and their prefetch deadline
+        self._pending = {}
+        self._lock = threading.RLock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "refresh_errors": 0,
+            "timeouts": 0,
+        }
+
+    @property
+    def disk(self) -> diskcache.Cache:
+        with self._lock:
+            if self._disk is None:
+                self._disk = diskcache.Cache(self.directory)
+            return self._disk
+
+    def memoize(self, expire, valid=None, default=None):
+        """
+        Decorator used to cache the result of a function by its arguments for `expire` seconds,
+        after which the stale result is returned while the function is called again in the background.
+
+        Args:
+            expire (float): Number of seconds before a cached result is refreshed
+            valid (Callable, optional): Whether a result is valid, e.g. not a failed request's default.
+                Invalid results don't replace a cached result, but are cached if there isn't one.
+            default (optional): The result, e.g. a failed request's default, returned if the value
+                is still being prefetched after the prefetch deadline
+        """
+
+        def decorator(function):
+            name = f"{function.__module__}.{function.__qualname__}"
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                key = (name, args, tuple(sorted(kwargs.items())))
+                value, expires_at, tier = self._get(key)
+                if tier is None:
+                    self._count("misses")
+                    return self._fetch(
+                        key, function, args, kwargs, expire, valid, default
+                    )
+                if time.time() >= expires_at:
+                    self._count("stale_hits")
+                    self._refresh_in_background(
+                        key, function, args, kwargs, expire, valid
+                    )
+                else:
+                    self._count(f"{tier}_hits")
+                return value
+
+            return wrapper
+
+        return decorator
+
+    def stats(self) -> dict:
+        """Get the cache hit and miss counts, and the hit rate"""
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats["memory_hits"] + stats["disk_hits"] + stats["stale_hits"]
+        requests = hits + stats["misses"]
+        return {**stats, "hit_rate": hits / requests if requests else None}
+
+    def clear(self):
+        """Clear both tiers and the statistics"""
+        with self._lock:
+            self._memory.clear()
+            self.disk.clear()
+            for key in self._stats:
+                self._stats[key] = 0
+
+    def close(self):
+        with self._lock:
+            if self._disk is not None:
+                self._disk.close()
+                self._disk = None
+
+    def _count(self, stat):
+        with self._lock:
+            self._stats[stat] += 1
+
+    def _get(self, key):
+        with self._lock:
+            # Check the disk tier for a stale memory tier entry, which may have been refreshed by another process
+            if key in self._memory and time.time() < self._memory[key][1]:
+                return (*self._memory[key], "memory")
+        entry = self.disk.get(key)
+        if entry is None:
+            return None, None, None
+        with self._lock:
+            self._memory[key] = entry
+        return (*entry, "disk")
+
+    def _set(self, key, value, expire):
+        entry = (value, time.time() + expire)
+        self.disk.set(key, entry)
+        with self._lock:
+            self._memory[key] = entry
+
+    def _refresh(self, key, function, args, kwargs, expire, valid):
+        value = function(*args, **kwargs)
+        if valid is None or valid(value) or self._get(key)[2] is None:
+            self._set(key, value, expire)
+        else:
+            # Keep serving the previous valid result, and retry after it expires again
+            self._set(key, self._get(key)[0], expire)
+        return value
+
+    def _fetch(self, key, function, args, kwargs, expire, valid, default):
+        """Call the function, or wait for the in-flight call of the same value"""
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is None:
+                future = Future()
+                self._pending[key] = (future, client.deadline())
+        if pending is not None:
+            future, deadline = pending
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                return future.result(timeout=timeout)
+            except TimeoutError:
+                self._count("timeouts")
+                logging.error(f"Waiting for the prefetch of {key[0]} timed out")
+                return copy.copy(default)
+
+        try:
+            value = self._refresh(key, function, args, kwargs, expire, valid)
+            future.set_result(value)
+            return value
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        finally:
+            with self._lock:
+                del self._pending[key]
+
+    def _refresh_in_background(self, key, function, args, kwargs, expire, valid):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._refresh(key, function, args, kwargs, expire, valid)
+                self._count("refreshes")
+            except Exception as err:
+                self._count("refresh_errors")
+                logging.error(f"Refreshing {key[0]} failed: {err}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        thread = threading.Thread(target=refresh, daemon=True)
+        thread.start()
+        return thread
+
+
+# Cache shared by the API modules
+cache = CacheManager()
@@ -0,0 +1,143 @@
+"""
+HTTP client shared by the API modules.
+
+Requests use a single pooled `requests.Session`, reusing connections across requests and threads,
+with per-request (connect, read) timeouts and retries with exponential backoff
+for connection errors, timeouts, and rate-limit or server error responses.
+
+The timeouts can be configured using the `API_CONNECT_TIMEOUT` and `API_READ_TIMEOUT` environment variables, in seconds,
+and the overall deadline of `prefetch()` using the `API_PREFETCH_TIMEOUT` environment variable.
+Cached functions called again while a prefetch of the same result is still in flight wait for it
+only until the prefetch deadline (see `data/api/cache.py`).
+
+Use `prefetch()` to fetch several API inputs concurrently, so that the total duration is bounded by the slowest request:
+```
+from data.api import client
+
+client.prefetch(beaconchain.get_epoch_data, etherscan.get_eth_supply_data)
+```
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# (connect, read) timeouts in seconds
+timeout = (
+    float(os.getenv("API_CONNECT_TIMEOUT", 3.05)),
+    float(os.getenv("API_READ_TIMEOUT", 10)),
+)
+retries = 2
+backoff_factor = 0.5
+# Overall deadline in seconds for prefetching, which also bounds steps the request timeouts don't, e.g. DNS resolution
+prefetch_timeout = float(os.getenv("API_PREFETCH_TIMEOUT", 30))
+
+_session = None
+_session_lock = threading.Lock()
+# The deadline of the prefetch a thread is running a function of
+_prefetch = threading.local()
+
+
+def create_session(retries=retries, backoff_factor=backoff_factor, pool_maxsize=10):
+    """Create a pooled session, retrying failed requests with exponential backoff"""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=[429, 500, 502, 503, 504],
+        # Retry POST requests, as the GraphQL queries are idempotent
+        allowed_methods=None,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({"accept": "application/json"})
+    return session
+
+
+def get_session():
+    """Get the shared session, created on first use"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = create_session()
+        return _session
+
+
+def set_session(session):
+    """Replace the shared session, e.g. to configure the retries or connection pool size"""
+    global _session
+    with _session_lock:
+        _session = session
+
+
+def request(method, url, **kwargs) -> requests.Response:
+    """Make a request using the shared session, with the default timeout unless one is given"""
+    kwargs.setdefault("timeout", timeout)
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def deadline():
+    """Get the `time.monotonic()` deadline of the prefetch the current thread is running a function of, or None"""
+    return getattr(_prefetch, "deadline", None)
+
+
+def _call_with_deadline(deadline, function):
+    _prefetch.deadline = deadline
+    try:
+        return function()
+    finally:
+        _prefetch.deadline = None
+
+
+def prefetch(*functions, timeout=None):
+    """
+    Call the functions concurrently, e.g. cached API requests, so that later calls are served from the cache.
+
+    Functions that haven't completed within the timeout, by default `prefetch_timeout` seconds,
+    are left running in the background.
+
+    Returns:
+        list: The result of each function, or None if it raised an exception or timed out, which is logged
+    """
+    if not functions:
+        return []
+
+    timeout = prefetch_timeout if timeout is None else timeout
+    deadline = time.monotonic() + timeout
+    executor = ThreadPoolExecutor(max_workers=len(functions))
+    futures = [
+        executor.submit(_call_with_deadline, deadline, function)
+        for function in functions
+    ]
+    wait(futures, timeout=timeout)
+    # Don't wait for functions that timed out, e.g. blocked on DNS resolution
+    executor.shutdown(wait=False)
+
+    results = []
+    for function, future in zip(functions, futures):
+        if not future.done():
+            logging.error(f"Prefetching {function.__name__} timed out")
+            results.append(None)
+            continue
+        try:
+            results.append(future.result())
+        except Exception as err:
+            logging.error(f"Prefetching {function.__name__} failed: {err}")
+            results.append(None)
+    return results
@@ -0,0 +1,184 @@
+"""
+Local append-only history of the daily validator deposits from the Eth2 deposits subgraph.
+
+The first sync paginates through the full history, and later syncs only fetch the last stored day (the high-water mark),
+which is usually a partial day, and the days after it, at most once every `sync_interval` seconds.
+The history is stored as JSON lines in the API cache directory (see `data/api/cache.py`),
+and serves mean validator deposits over any window of days.
+
+Usage:
+```
+from data.api.deposit_history import store
+
+store.sync()
+store.mean_validator_deposits_per_epoch(days=30)
+```
+"""
+
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import requests
+
+from data.api import subgraph
+from data.api.cache import cache
+from model.constants import epochs_per_day, gwei, eth_deposited_per_validator
+
+
+class DepositHistoryStore:
+    """An append-only store of daily deposits, synced incrementally from the subgraph"""
+
+    def __init__(
+        self, path=None, fetch_page=None, page_size=1000, sync_interval=(6 * 60 * 60)
+    ):
+        self.path = path or os.path.join(cache.directory, "deposit_history.jsonl")
+        self.fetch_page = fetch_page or subgraph.get_daily_deposits
+        self.page_size = page_size
+        self.sync_interval = sync_interval
+        self._records = None
+
+    @property
+    def records(self) -> list:
+        """The stored daily deposits in ascending order of day"""
+        if self._records is None:
+            self._records = self._load()
+        return self._records
+
+    def _load(self) -> list:
+        records = {}
+        if os.path.exists(self.path):
+            with open(self.path, "r+") as file:
+                lines = file.read().split("\n")
+                # Truncate a partially written last line, so that it isn't appended to
+                if lines[-1]:
+                    file.truncate(
+                        len("\n".join(lines[:-1]) + "\n") if len(lines) > 1 else 0
+                    )
+                for line in lines[:-1]:
+                    record = json.loads(line)
+                    # Days fetched again, e.g. partial days or by concurrent syncs, replace the earlier record
+                    records[record["id"]] = record
+        return list(records.values())
+
+    @property
+    def high_water_mark(self):
+        """The ID of the last stored day, or None if the store is empty"""
+        return self.records[-1]["id"] if self.records else None
+
+    def sync(self, force=False) -> int:
+        """
+        Fetch and store the daily deposits after the high-water mark,
+        unless synced within the last `sync_interval` seconds.
+
+        Returns:
+            int: The number of new days stored
+        """
+        if not force and time.time() - self._synced_at() < self.sync_interval:
+            return 0
+
+        # Re-read the store, which may have been synced by another process,
+        # replacing the records only once read, so that a sync in the background doesn't affect readers
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._records = self._load()
+        stored_ids = {record["id"] for record in self.records}
+        # The last stored day is usually a partial day, still updated by the subgraph, so it's fetched again and replaced
+        after = self.records[-2]["id"] if len(self.records) > 1 else None
+        new_records = 0
+        while True:
+            try:
+                page = self.fetch_page(after=after, first=self.page_size)
+            except requests.exceptions.RequestException as err:
+                logging.error(err)
+                return new_records
+            if page is None:
+                # The subgraph isn't available, e.g. without an API key, so the store isn't marked as synced
+                return new_records
+            if not page:
+                break
+
+            records = [
+                {
+                    "id": record["id"],
+                    "dailyAmountDeposited": record["dailyAmountDeposited"],
+                }
+                for record in page
+            ]
+            with open(self.path, "a") as file:
+                file.writelines(json.dumps(record) + "\n" for record in records)
+                file.flush()
+                os.fsync(file.fileno())
+            self._records = list(
+                {
+                    **{record["id"]: record for record in self.records},
+                    **{record["id"]: record for record in records},
+                }.values()
+            )
+            new_records += len(
+                [record for record in records if record["id"] not in stored_ids]
+            )
+            stored_ids.update(record["id"] for record in records)
+            after = records[-1]["id"]
+
+            if len(page) < self.page_size:
+                break
+
+        with open(self.path + ".synced", "w") as file:
+            file.write(str(time.time()))
+        return new_records
+
+    def daily_validator_deposits(self) -> np.ndarray:
+        """The number of validators deposited each day"""
+        return np.array(
+            [
+                float(record["dailyAmountDeposited"])
+                / (eth_deposited_per_validator * gwei)
+                for record in self.records
+            ]
+        )
+
+    def mean_validator_deposits_per_epoch(self, days=180):
+        """The mean validator deposits per epoch over the last number of days, or None if the store is empty"""
+        deposits = self.daily_validator_deposits()[-days:]
+        if not len(deposits):
+            return None
+        return deposits.mean() / epochs_per_day
+
+    def rolling_mean_validator_deposits_per_epoch(self, days=180) -> np.ndarray:
+        """The rolling mean validator deposits per epoch over a window of days, for each day with a full window"""
+        deposits = self.daily_validator_deposits()
+        if len(deposits) < days:
+            return np.array([])
+        cumulative = np.concatenate([[0], np.cumsum(deposits)])
+        return (cumulative[days:] - cumulative[:-days]) / days / epochs_per_day
+
+    def _synced_at(self) -> float:
+        try:
+            with open(self.path + ".synced") as file:
+                return float(file.read())
+        except (OSError, ValueError):
+            return 0
+
+
+# Deposit history store in the API cache directory
+store = DepositHistoryStore()
+
+
+def get_6_month_mean_validator_deposits_per_epoch(default=None, sync=True):
+    """
+    Get the mean validator deposits per epoch over the last 180 days, or the default if there's no deposit history.
+
+    Args:
+        default (optional): The result if there's no deposit history, e.g. without a SUBGRAPH_API_KEY
+        sync (bool, optional): Whether to sync the store first, rather than e.g. after it's been prefetched
+    """
+    if sync:
+        store.sync()
+    mean_validator_deposits_per_epoch = store.mean_validator_deposits_per_epoch(
+        days=180
+    )
+    if mean_validator_deposits_per_epoch is None:
+        return default
+    return mean_validator_deposits_per_epoch
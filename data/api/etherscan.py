@@ -1,28 +1,31 @@
 import requests
-import diskcache
 import logging
 
+from data.api import client
+from data.api.cache import cache
 from model.types import Wei
 
+API_URL = "https://api.etherscan.io/api"
 
-cache = diskcache.Cache(".api.cache")
 
-
-@cache.memoize(expire=(6 * 60 * 60))  # cached for 6 hours
-def get_eth_supply(default=None) -> Wei:
+# Cached for 6 hours
+@cache.memoize(expire=(6 * 60 * 60), valid=lambda result: result is not None)
+def get_eth_supply_data():
     try:
-        req = requests.get(
-            "https://api.etherscan.io/api?module=stats&action=ethsupply",
-            headers={"accept": "application/json"},
-        )
+        req = client.get(API_URL, params={"module": "stats", "action": "ethsupply"})
         req.raise_for_status()
         # Etherscan returns a JSON object with "status" 0 for failure,
         # "status" key does not exist for normal response!
         # Normal HTTP status is ignored.
         if not int(req.json().get("status", 1)):
-            raise requests.exceptions.HTTPError
+            raise requests.exceptions.HTTPError(req.json().get("result"))
         else:
             return int(req.json()["result"])
-    except requests.exceptions.HTTPError as err:
+    except requests.exceptions.RequestException as err:
         logging.error(err)
-        return default
+        return None
+
+
+def get_eth_supply(default=None) -> Wei:
+    result = get_eth_supply_data()
+    return result if result is not None else default
@@ -1,61 +1,54 @@
 import requests
-import diskcache
-import json
 import logging
 import os
-from statistics import mean
 from dotenv import load_dotenv
-from collections import defaultdict
 
-from model.constants import epochs_per_day, gwei, eth_deposited_per_validator
+from data.api import client
 
 load_dotenv()
-cache = diskcache.Cache(".api.cache")
 
+API_URL = "https://gateway.thegraph.com/api"
+SUBGRAPH_ID = "0x540b14e4bd871cfe59e48d19254328b5ff11d820-0"
 
-@cache.memoize(expire=(24 * 60 * 60))  # cached for 24 hours
-def get_6_month_validator_deposit_data():
+
+def query(graph_query, variables=None) -> dict:
+    """
+    Query the Eth2 deposits subgraph, returning the query data,
+    or an empty dictionary if the SUBGRAPH_API_KEY environment variable isn't defined.
+
+    Raises a `requests.exceptions.RequestException` if the request fails or the query returns errors.
+    """
     SUBGRAPH_API_KEY = os.getenv("SUBGRAPH_API_KEY")
-    if SUBGRAPH_API_KEY:
-        API_URI = (
-            "https://gateway.thegraph.com/api/"
-            + SUBGRAPH_API_KEY
-            + "/subgraphs/id/0x540b14e4bd871cfe59e48d19254328b5ff11d820-0"
-        )
-        GRAPH_QUERY = """
-        {
-        dailyDeposits(first: 180) {
-            id
-            dailyAmountDeposited
-            }
-        }
-        """
-        try:
-            JSON = {"query": GRAPH_QUERY}
-            r = requests.post(API_URI, json=JSON)
-            return r.json().get("data", {})
-        except requests.exceptions.HTTPError as err:
-            logging.error(err)
-            return {}
-    else:
-        logging.warn("SUBGRAPH_API_KEY not defined")
+    if not SUBGRAPH_API_KEY:
+        logging.warning("SUBGRAPH_API_KEY not defined")
         return {}
 
+    API_URI = API_URL + "/" + SUBGRAPH_API_KEY + "/subgraphs/id/" + SUBGRAPH_ID
+    JSON = {"query": graph_query, "variables": variables or {}}
+    r = client.post(API_URI, json=JSON)
+    r.raise_for_status()
+    response = r.json()
+    if response.get("errors"):
+        raise requests.exceptions.HTTPError(response["errors"])
+    return response.get("data", {})
 
-def get_6_month_mean_validator_deposits_per_epoch(default=None):
-    data = get_6_month_validator_deposit_data()
+
+def get_daily_deposits(after=None, first=1000):
+    """
+    Get a page of daily deposits, in ascending order of day ID, with a day ID greater than `after`,
+    or None if the subgraph isn't available, i.e. the SUBGRAPH_API_KEY environment variable isn't defined.
+
+    Day IDs are compared as strings by the subgraph, which orders them by day as they have the same number of digits.
+    """
+    GRAPH_QUERY = """
+    query($first: Int!, $after: String!) {
+        dailyDeposits(first: $first, orderBy: id, orderDirection: asc, where: {id_gt: $after}) {
+            id
+            dailyAmountDeposited
+        }
+    }
+    """
+    data = query(GRAPH_QUERY, {"first": first, "after": after or ""})
     if not data:
-        return default
-
-    daily_deposits_data = data["dailyDeposits"]
-    res = defaultdict(list)
-    {res[key].append(sub[key]) for sub in daily_deposits_data for key in sub}
-    daily_deposits = dict(res)
-    daily_deposits["dailyAmountDepositedValidators"] = [
-        float(x) / (eth_deposited_per_validator * gwei)
-        for x in daily_deposits["dailyAmountDeposited"]
-    ]
-    mean_validator_deposits_per_epoch = (
-        mean(daily_deposits["dailyAmountDepositedValidators"]) / epochs_per_day
-    )
-    return mean_validator_deposits_per_epoch
+        return None
+    return data.get("dailyDeposits", [])
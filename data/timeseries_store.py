@@ -0,0 +1,284 @@
+"""
+# Historical Time-Series Store
+
+A local store of the bundled historical datasets, converted once from their CSV and JSON sources
+into date-indexed columnar Numpy arrays, and memory-mapped on load.
+
+Window queries are binary searches over the sorted timestamps returning views of the memory-mapped arrays,
+and the resampled queries used to drive the model return a value every `dt` epochs.
+A `TimeSeries` pickles as its directory, so worker processes memory-map the same files,
+sharing the operating system's page cache rather than copying the arrays.
+
+Usage:
+```
+from data.timeseries_store import store
+
+eth_price = store["eth_1h"]
+timestamps, prices = eth_price.window("close", "2019-01-01", "2019-02-01")
+prices = eth_price.resample("close", start="2019-01-01", periods=365, dt=225)
+```
+
+The store is rebuilt automatically when a source dataset changes.
+"""
+
+import contextlib
+import json
+import os
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import model.constants as constants
+from experiments.simulation_configuration import DELTA_TIME
+
+STORE_VERSION = 1
+seconds_per_epoch = 24 * 60 * 60 / constants.epochs_per_day
+
+_data_directory = os.path.dirname(__file__)
+
+
+def _load_etherscan_csv(filename, column="Value"):
+    df = pd.read_csv(os.path.join(_data_directory, filename))
+    return df["UnixTimeStamp"].to_numpy(dtype=np.int64), {
+        "value": df[column].to_numpy(dtype=np.float64)
+    }
+
+
+def _load_cryptodatadownload_csv(filename, timestamp):
+    df = pd.read_csv(os.path.join(_data_directory, filename))
+    df.columns = [column.lower().replace(" ", "_") for column in df.columns]
+    return timestamp(df), {
+        column: df[column].to_numpy(dtype=np.float64)
+        for column in ["open", "high", "low", "close"]
+    }
+
+
+def _load_daily_extracted_mev():
+    with open(os.path.join(_data_directory, "daily_extracted_mev.json")) as file:
+        rows = json.load(file)["rows"]
+    return pd.to_datetime([date for date, _ in rows]).asi8 // 10**9, {
+        "value": np.array([value for _, value in rows], dtype=np.float64)
+    }
+
+
+# Dataset name: (source filename, loader returning Unix timestamps in seconds and a dictionary of columns)
+datasets = {
+    "eth_1h": (
+        "ETH_1H.csv.zip",
+        # The Unix timestamps are a mix of seconds and milliseconds, so the dates are parsed instead
+        lambda: _load_cryptodatadownload_csv(
+            "ETH_1H.csv.zip",
+            lambda df: pd.to_datetime(df["date"]).values.astype(np.int64) // 10**9,
+        ),
+    ),
+    "eth_day": (
+        "ETH_day.csv",
+        lambda: _load_cryptodatadownload_csv(
+            "ETH_day.csv",
+            lambda df: pd.to_datetime(df["date"]).values.astype(np.int64) // 10**9,
+        ),
+    ),
+    "ether_price": ("ether_price.csv", lambda: _load_etherscan_csv("ether_price.csv")),
+    "ether_avg_gas_price": (
+        "ether_avg_gas_price.csv",
+        lambda: _load_etherscan_csv("ether_avg_gas_price.csv", column="Value (Wei)"),
+    ),
+    "ether_gas_used": (
+        "ether_gas_used.csv",
+        lambda: _load_etherscan_csv("ether_gas_used.csv"),
+    ),
+    "ether_block_rewards": (
+        "ether_block_rewards.csv",
+        lambda: _load_etherscan_csv("ether_block_rewards.csv"),
+    ),
+    "ether_supply": (
+        "ether_supply.csv",
+        lambda: _load_etherscan_csv("ether_supply.csv"),
+    ),
+    "daily_extracted_mev": ("daily_extracted_mev.json", _load_daily_extracted_mev),
+}
+
+
+def _to_timestamp(date) -> int:
+    """Convert a date string, datetime, or Unix timestamp in seconds to a Unix timestamp in seconds"""
+    if isinstance(date, (int, np.integer)):
+        return int(date)
+    return pd.Timestamp(date).value // 10**9
+
+
+@contextlib.contextmanager
+def _temporary_file(directory, filename):
+    """Write a file atomically, to a unique temporary file in the same directory that replaces it once written"""
+    descriptor, temporary_path = tempfile.mkstemp(dir=directory, prefix=f".{filename}.")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            yield file
+        os.replace(temporary_path, os.path.join(directory, filename))
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+
+class TimeSeries:
+    """A date-indexed set of memory-mapped columns, sorted by timestamp"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        with open(os.path.join(directory, "meta.json")) as file:
+            self.columns = json.load(file)["columns"]
+        self.timestamps = np.load(
+            os.path.join(directory, "timestamp.npy"), mmap_mode="r"
+        )
+        self._columns = {
+            column: np.load(os.path.join(directory, f"{column}.npy"), mmap_mode="r")
+            for column in self.columns
+        }
+
+    def __reduce__(self):
+        # Pickle by directory, so that worker processes memory-map the store rather than copying the arrays
+        return (TimeSeries, (self.directory,))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, column) -> np.ndarray:
+        return self._columns[column]
+
+    @property
+    def start(self) -> datetime:
+        return datetime.utcfromtimestamp(int(self.timestamps[0]))
+
+    @property
+    def end(self) -> datetime:
+        return datetime.utcfromtimestamp(int(self.timestamps[-1]))
+
+    def window(self, column, start=None, end=None):
+        """
+        Get the timestamps and values of a column in the inclusive date window [start, end],
+        as read-only views of the memory-mapped arrays.
+        """
+        lower = (
+            0
+            if start is None
+            else np.searchsorted(self.timestamps, _to_timestamp(start), side="left")
+        )
+        upper = (
+            len(self)
+            if end is None
+            else np.searchsorted(self.timestamps, _to_timestamp(end), side="right")
+        )
+        return self.timestamps[lower:upper], self._columns[column][lower:upper]
+
+    def resample(
+        self, column, start, end=None, periods=None, dt=DELTA_TIME, method="linear"
+    ) -> np.ndarray:
+        """
+        Resample a column to a value every `dt` epochs from the start date,
+        for the given number of periods, or until the end date.
+
+        Args:
+            column (str): Column name
+            start: Start date, as a date string, datetime, or Unix timestamp in seconds
+            end (optional): End date, used if the number of periods isn't given
+            periods (int, optional): Number of values to return
+            dt (int): Number of epochs between values
+            method (str): "linear" interpolation, or the "previous" observed value
+
+        Returns:
+            np.ndarray: Resampled values, held constant at the first and last observed values outside the dataset
+        """
+        start = _to_timestamp(start)
+        step = dt * seconds_per_epoch
+        if periods is None:
+            if end is None:
+                raise ValueError(
+                    "Either the end date or number of periods must be given"
+                )
+            periods = int((_to_timestamp(end) - start) // step) + 1
+        times = start + np.arange(periods) * step
+
+        # Only the window of the dataset covering the resampled period is read from disk
+        lower = max(np.searchsorted(self.timestamps, times[0], side="right") - 1, 0)
+        upper = np.searchsorted(self.timestamps, times[-1], side="left") + 1
+        timestamps = np.asarray(self.timestamps[lower:upper])
+        values = np.asarray(self._columns[column][lower:upper])
+
+        if method == "linear":
+            return np.interp(times, timestamps, values)
+        elif method == "previous":
+            indices = np.clip(
+                np.searchsorted(timestamps, times, side="right") - 1,
+                0,
+                len(timestamps) - 1,
+            )
+            return values[indices]
+        else:
+            raise ValueError(
+                f"Invalid resampling method {method}, expected one of ['linear', 'previous']"
+            )
+
+
+class TimeSeriesStore:
+    """
+    A directory of converted datasets, each converted from its source on first access
+    and reconverted when the source changes.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or os.environ.get(
+            "TIMESERIES_STORE_DIRECTORY",
+            os.path.join(_data_directory, ".timeseries.cache"),
+        )
+        self._series = {}
+
+    def __getitem__(self, name) -> TimeSeries:
+        if name not in self._series:
+            if name not in datasets:
+                raise KeyError(
+                    f"Unknown dataset {name}, expected one of {list(datasets)}"
+                )
+            directory = os.path.join(self.directory, name)
+            if not self._is_current(name, directory):
+                self._convert(name, directory)
+            self._series[name] = TimeSeries(directory)
+        return self._series[name]
+
+    def _source_signature(self, name) -> dict:
+        filename, _ = datasets[name]
+        stat = os.stat(os.path.join(_data_directory, filename))
+        return {"version": STORE_VERSION, "size": stat.st_size, "mtime": stat.st_mtime}
+
+    def _is_current(self, name, directory) -> bool:
+        try:
+            with open(os.path.join(directory, "meta.json")) as file:
+                return json.load(file)["source"] == self._source_signature(name)
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def _convert(self, name, directory):
+        _, loader = datasets[name]
+        timestamps, columns = loader()
+
+        # Sort by timestamp, dropping duplicate observations
+        timestamps, indices = np.unique(timestamps, return_index=True)
+        os.makedirs(directory, exist_ok=True)
+        # Files are written to unique temporary files and then renamed,
+        # so that worker processes converting the same dataset concurrently don't overwrite each other's writes
+        for column, values in {"timestamp": timestamps, **columns}.items():
+            values = values if column == "timestamp" else values[indices]
+            with _temporary_file(directory, f"{column}.npy") as file:
+                np.save(file, values)
+
+        # The metadata is written last, so that an interrupted conversion is redone
+        with _temporary_file(directory, "meta.json") as file:
+            file.write(
+                json.dumps(
+                    {"columns": list(columns), "source": self._source_signature(name)}
+                ).encode()
+            )
+
+
+# Default store of the bundled datasets
+store = TimeSeriesStore()
@@ -0,0 +1,219 @@
+"""
+Adaptive grid refinement for phase-space analyses, e.g. yield contours over ETH price and ETH staked.
+
+Rather than evaluating a uniform grid, where most points are far from the features of interest,
+the grid starts coarse and cells are recursively subdivided (a quadtree in two dimensions)
+where the metric crosses one of a set of thresholds (e.g. the zero-profit contour),
+or where it changes by more than a tolerance across the cell (a steep gradient).
+
+All grid points lie on the lattice of the finest refinement level, and `AdaptiveGrid.to_dataframe()`
+returns the full lattice, interpolating (multilinear) within cells that weren't refined,
+in the format of the `eth_price_eth_staked_grid_analysis` results, so that the contour plots
+(e.g. `plot_validator_environment_yield_contour`) can be used unchanged.
+
+Usage:
+```
+from experiments.adaptive_grid import run_adaptive_grid_analysis
+from experiments.templates.eth_price_eth_staked_grid_analysis import adaptive_bounds
+
+grid = run_adaptive_grid_analysis(bounds=adaptive_bounds, thresholds=[0])
+df = grid.to_dataframe()
+df["total_profit_yields_pct"] = df["total_profit_yields"] * 100
+plot_validator_environment_yield_contour(df)
+```
+"""
+
+import itertools
+import logging
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from experiments.surrogate import get_grid_simulation, simulate
+
+
+class AdaptiveGrid:
+    """
+    A regular grid over `bounds` of `initial_divisions` cells per dimension,
+    that can be refined up to `max_depth` times, i.e. to a lattice of `initial_divisions * 2 ** max_depth` cells per dimension.
+
+    Attributes:
+        samples: The evaluated outputs, mapping lattice indices to arrays of outputs
+        leaves: The cells of the grid, as `(origin lattice index, size in lattice units)` tuples
+    """
+
+    def __init__(
+        self,
+        bounds: Dict[str, Tuple[float, float]],
+        outputs: List[str],
+        initial_divisions=4,
+        max_depth=3,
+    ):
+        self.bounds = bounds
+        self.outputs = list(outputs)
+        self.max_depth = max_depth
+        self.resolution = initial_divisions * 2 ** max_depth
+        self.samples = {}
+
+        size = 2 ** max_depth
+        self.leaves = [
+            (origin, size)
+            for origin in itertools.product(
+                range(0, self.resolution, size), repeat=len(bounds)
+            )
+        ]
+
+    def refine(
+        self,
+        evaluate: Callable[[np.ndarray], np.ndarray],
+        metric: str,
+        thresholds: List[float] = [],
+        gradient_tolerance: float = None,
+    ):
+        """
+        Evaluate the grid, and refine cells where the metric crosses one of the thresholds,
+        or where it changes by more than the gradient tolerance across the cell.
+
+        Args:
+            evaluate: A function of an array of points of shape `(n, len(bounds))`,
+                returning an array of outputs of shape `(n, len(outputs))`. Points are evaluated in batches,
+                one batch per refinement level.
+            metric: The output used as the refinement criterion
+        """
+        metric_index = self.outputs.index(metric)
+
+        for depth in range(self.max_depth + 1):
+            self._evaluate(evaluate, self.leaves)
+            if depth == self.max_depth:
+                break
+
+            refined = []
+            for origin, size in self.leaves:
+                values = np.array(
+                    [
+                        self.samples[corner][metric_index]
+                        for corner in _corners(origin, size)
+                    ]
+                )
+                low, high = values.min(), values.max()
+                crosses_threshold = any(
+                    low <= t <= high and low < high for t in thresholds
+                )
+                steep = (
+                    gradient_tolerance is not None and high - low > gradient_tolerance
+                )
+
+                if crosses_threshold or steep:
+                    half = size // 2
+                    refined.extend(
+                        (
+                            tuple(
+                                o + half * offset for o, offset in zip(origin, offsets)
+                            ),
+                            half,
+                        )
+                        for offsets in itertools.product([0, 1], repeat=len(origin))
+                    )
+                else:
+                    refined.append((origin, size))
+
+            logging.info(
+                f"Refinement level {depth + 1}: {len(refined)} cells, {len(self.samples)} points evaluated"
+            )
+            if len(refined) == len(self.leaves):
+                break
+            self.leaves = refined
+
+        return self
+
+    def to_points(self, indices) -> np.ndarray:
+        """Convert lattice indices to points within the bounds"""
+        indices = np.asarray(indices, dtype=float)
+        lower = np.array([low for low, _ in self.bounds.values()])
+        upper = np.array([high for _, high in self.bounds.values()])
+        return lower + indices / self.resolution * (upper - lower)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Return the outputs over the full lattice, with one row per lattice point and a `run` column numbering the points,
+        interpolating within cells that weren't refined, and an `evaluated` column marking evaluated points.
+        """
+        shape = (self.resolution + 1,) * len(self.bounds)
+        values = np.full(shape + (len(self.outputs),), np.nan)
+
+        for origin, size in self.leaves:
+            corners = {
+                corner: self.samples[corner] for corner in _corners(origin, size)
+            }
+            # Multilinear interpolation of the lattice points within the cell from its corners
+            offsets = np.arange(size + 1) / size
+            weights = np.meshgrid(*[offsets] * len(origin), indexing="ij")
+            cell = np.zeros(weights[0].shape + (len(self.outputs),))
+            for corner, value in corners.items():
+                weight = np.ones(weights[0].shape)
+                for o, w, c in zip(origin, weights, corner):
+                    weight = weight * (w if c > o else 1 - w)
+                cell += weight[..., None] * value
+            values[tuple(slice(o, o + size + 1) for o in origin)] = cell
+
+        # Points evaluated on the edges of larger neighbouring cells take precedence over interpolated values
+        for index, value in self.samples.items():
+            values[index] = value
+
+        indices = np.array(list(itertools.product(*[range(n) for n in shape])))
+        df = pd.DataFrame(self.to_points(indices), columns=list(self.bounds))
+        df[self.outputs] = values.reshape(-1, len(self.outputs))
+        df["evaluated"] = [tuple(index) in self.samples for index in indices]
+        # Order points with the first dimension varying fastest, as in the cartesian product grid templates
+        df = df.iloc[np.lexsort(indices.T)].reset_index(drop=True)
+        df.insert(0, "run", np.arange(1, len(df) + 1))
+        return df
+
+    def _evaluate(self, evaluate, cells):
+        pending = sorted(
+            {
+                corner
+                for origin, size in cells
+                for corner in _corners(origin, size)
+                if corner not in self.samples
+            }
+        )
+        if pending:
+            outputs = evaluate(self.to_points(pending))
+            self.samples.update(zip(pending, outputs))
+
+
+def _corners(origin, size):
+    return [
+        tuple(o + size * offset for o, offset in zip(origin, offsets))
+        for offsets in itertools.product([0, 1], repeat=len(origin))
+    ]
+
+
+def run_adaptive_grid_analysis(
+    bounds: Dict[str, Tuple[float, float]],
+    thresholds: List[float] = [0],
+    gradient_tolerance: float = None,
+    metric="total_profit_yields",
+    outputs: List[str] = ["total_revenue_yields", "total_profit_yields"],
+    initial_divisions=4,
+    max_depth=3,
+    simulation=None,
+) -> AdaptiveGrid:
+    """
+    Run an adaptive grid analysis of the model, over "eth_price", "eth_staked", or scalar System Parameter bounds,
+    using the single-timestep grid analysis simulation (see `experiments.surrogate.get_grid_simulation()`).
+
+    With the defaults, the zero-profit contour is resolved at the resolution of a 33 x 33 uniform grid.
+    Thresholds and the gradient tolerance are in units of the metric, e.g. decimal yields.
+    """
+    simulation = get_grid_simulation(simulation)
+    grid = AdaptiveGrid(bounds, outputs, initial_divisions, max_depth)
+    grid.refine(
+        lambda points: simulate(simulation, list(bounds), points, outputs),
+        metric=metric,
+        thresholds=thresholds,
+        gradient_tolerance=gradient_tolerance,
+    )
+    return grid
@@ -0,0 +1,333 @@
+"""
+Checkpoint and resume for long simulations, e.g. multi-year per-epoch (`dt=1`) simulations or large Monte Carlo analyses.
+
+The experiment configuration (Initial State, State Update Blocks, System Parameters including stochastic processes,
+and engine settings) is saved to a checkpoint directory, and each in-flight run periodically saves the
+results it has emitted since its previous checkpoint, every `interval` timesteps.
+The last emitted state is the full state of the run, so a run resumes from its last checkpoint,
+and completed runs are not re-run.
+
+A resumed simulation is bitwise identical to an uninterrupted one:
+* the System Parameters are restored from the checkpoint, including e.g. a `datetime.now()` start date,
+* stochastic processes are pre-generated sample arrays indexed by run and timestep (see `model/stochastic_processes.py`),
+  so their position is the timestep, and their (seeded) samples are checked to be unchanged, and
+* policies receive the same state history, restored from the emitted results.
+
+Resuming from a checkpoint raises a `ValueError` if the model or configuration has changed since it was created.
+
+Usage:
+```
+from experiments.checkpoint import load_checkpoint, run_checkpointed
+
+results = run_checkpointed(experiment, directory="checkpoints/experiment", interval=1000)
+# After a crash, continue from the last checkpoint:
+experiment = load_checkpoint("checkpoints/experiment")
+results = run_checkpointed(experiment, directory="checkpoints/experiment")
+```
+or from the command line, `python -m experiments.run --checkpoint-dir DIR` and `python -m experiments.run --resume DIR`.
+"""
+
+import logging
+import os
+import pickle
+import traceback
+
+import dill
+import radcad.core as core
+from radcad import Backend, Experiment, Model, Simulation
+from radcad.utils import extract_exceptions
+
+from experiments.utils import fingerprint
+
+MANIFEST = "manifest.pickle"
+
+
+def run_checkpointed(executable, directory, interval=None):
+    """
+    Run a radCAD Experiment or Simulation, checkpointing each run to the directory every `interval` timesteps,
+    or resuming from an existing checkpoint of the same configuration.
+
+    Runs are executed sequentially with the single-process backend, otherwise in parallel using a pathos process pool,
+    in which case each in-flight run is checkpointed independently.
+
+    Returns:
+        The simulation results, which are also assigned to `executable.results`
+    """
+    engine = executable.engine
+    engine.executable = executable
+    simulations = (
+        executable.simulations if isinstance(executable, Experiment) else [executable]
+    )
+    # The configuration is saved after the `before_experiment` hook, e.g. the compile pass, has updated it
+    experiment = executable if isinstance(executable, Experiment) else None
+    executable._before_experiment(experiment=experiment)
+    configuration = _get_configuration(simulations, engine)
+
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST)
+    if os.path.exists(manifest_path):
+        manifest = _load_manifest(directory)
+        if manifest["fingerprint"] != _fingerprint(configuration):
+            raise ValueError(
+                f"Experiment configuration differs from checkpoint {directory}, use `load_checkpoint()` to resume"
+            )
+        interval = interval or manifest["interval"]
+        logging.info(f"Resuming from checkpoint {directory}")
+    else:
+        interval = interval or 100
+        _atomic_write(
+            manifest_path,
+            dill.dumps(
+                {
+                    "configuration": configuration,
+                    "fingerprint": _fingerprint(configuration),
+                    "interval": interval,
+                }
+            ),
+        )
+
+    configs = [
+        (
+            simulation.model.initial_state,
+            simulation.model.state_update_blocks,
+            simulation.model.params,
+            simulation.timesteps,
+            simulation.runs,
+        )
+        for simulation in simulations
+    ]
+    run_args = (
+        (index, args, directory, interval, engine.raise_exceptions)
+        for index, args in enumerate(engine._run_stream(configs))
+    )
+
+    if engine.backend == Backend.SINGLE_PROCESS:
+        results = list(map(_checkpointed_run, run_args))
+    else:
+        from pathos.multiprocessing import ProcessPool
+
+        pool = ProcessPool(engine.processes)
+        try:
+            results = pool.map(_checkpointed_run, list(run_args))
+        finally:
+            pool.close()
+            pool.join()
+            pool.clear()
+
+    executable.results, executable.exceptions = extract_exceptions(results)
+    executable._after_experiment(experiment=experiment)
+    return executable.results
+
+
+def load_checkpoint(directory) -> Experiment:
+    """
+    Load the Experiment saved in a checkpoint directory, with the System Parameters and configuration it was created with,
+    to be resumed using `run_checkpointed()`.
+    """
+    manifest = _load_manifest(directory)
+    configuration = manifest["configuration"]
+    if _fingerprint(configuration) != manifest["fingerprint"]:
+        raise ValueError(
+            f"Model has changed since checkpoint {directory} was created, and can't be resumed"
+        )
+
+    simulations = [
+        Simulation(
+            model=Model(
+                initial_state=initial_state,
+                state_update_blocks=state_update_blocks,
+                params=params,
+            ),
+            timesteps=timesteps,
+            runs=runs,
+        )
+        for initial_state, state_update_blocks, params, timesteps, runs in configuration[
+            "simulations"
+        ]
+    ]
+    experiment = Experiment(simulations)
+    for key, value in configuration["engine"].items():
+        setattr(experiment.engine, key, value)
+    for simulation in simulations:
+        simulation.engine = experiment.engine
+    return experiment
+
+
+def _get_configuration(simulations, engine) -> dict:
+    return {
+        "simulations": [
+            (
+                simulation.model.initial_state,
+                simulation.model.state_update_blocks,
+                simulation.model.params,
+                simulation.timesteps,
+                simulation.runs,
+            )
+            for simulation in simulations
+        ],
+        "engine": {
+            "backend": engine.backend,
+            "processes": engine.processes,
+            "raise_exceptions": engine.raise_exceptions,
+            "deepcopy": engine.deepcopy,
+            "drop_substeps": engine.drop_substeps,
+        },
+    }
+
+
+def _fingerprint(configuration) -> str:
+    # Fingerprint the configuration as restored from the manifest, as dill doesn't preserve all function attributes,
+    # e.g. the `__qualname__` of wrapped functions
+    return fingerprint(dill.loads(dill.dumps(configuration)))
+
+
+def _load_manifest(directory) -> dict:
+    with open(os.path.join(directory, MANIFEST), "rb") as file:
+        return dill.load(file)
+
+
+def _checkpointed_run(args):
+    """Execute a run from its last checkpoint, returning the results and exception as `core._single_run_wrapper()`"""
+    index, run_args, directory, interval, raise_exceptions = args
+    run_directory = os.path.join(directory, f"run-{index}")
+    done_path = os.path.join(run_directory, "done.pickle")
+    os.makedirs(run_directory, exist_ok=True)
+
+    result = []
+    for segment in sorted(
+        name for name in os.listdir(run_directory) if name.startswith("segment-")
+    ):
+        with open(os.path.join(run_directory, segment), "rb") as file:
+            result.extend(pickle.load(file))
+
+    if os.path.exists(done_path):
+        with open(done_path, "rb") as file:
+            exception = dill.load(file)
+    else:
+        start = max(len(result) - 1, 0)
+        if start:
+            logging.info(f"Resuming run {index} from timestep {start}")
+
+        saved = len(result)
+
+        def checkpoint(result):
+            # Save the results emitted since the previous checkpoint, the last of which is the full state of the run
+            nonlocal saved
+            if len(result) > saved:
+                _atomic_write(
+                    os.path.join(
+                        run_directory, f"segment-{len(result) - 1:012d}.pickle"
+                    ),
+                    pickle.dumps(result[saved:], -1),
+                )
+                saved = len(result)
+
+        error, trace = None, None
+        try:
+            _single_run(result, start, run_args, interval, checkpoint)
+        except Exception as e:
+            error, trace = e, traceback.format_exc()
+            logging.warning(
+                f"Simulation {run_args.simulation} / run {run_args.run} / subset {run_args.subset} failed!"
+            )
+            if raise_exceptions:
+                raise
+        exception = {
+            "exception": error,
+            "traceback": trace,
+            "simulation": run_args.simulation,
+            "run": run_args.run,
+            "subset": run_args.subset,
+            "timesteps": run_args.timesteps,
+            "parameters": run_args.parameters,
+            "initial_state": run_args.initial_state,
+        }
+        try:
+            _atomic_write(done_path, dill.dumps(exception))
+        except Exception:
+            # Exceptions aren't necessarily serializable
+            _atomic_write(
+                done_path, dill.dumps({**exception, "exception": repr(error)})
+            )
+
+    return result, exception
+
+
+def _single_run(result, start, run_args, interval, checkpoint):
+    """
+    A copy of `radcad.core._single_run()` that continues from the `start` timestep of the results,
+    and checkpoints every `interval` timesteps and on completion.
+    """
+    (
+        simulation,
+        timesteps,
+        run,
+        subset,
+        initial_state,
+        state_update_blocks,
+        params,
+        deepcopy,
+        drop_substeps,
+    ) = run_args
+
+    if not result:
+        initial_state["simulation"] = simulation
+        initial_state["subset"] = subset
+        initial_state["run"] = run + 1
+        initial_state["substep"] = 0
+        if not initial_state.get("timestep", False):
+            initial_state["timestep"] = 0
+        result.append([initial_state])
+
+    for timestep in range(start, timesteps):
+        previous_state: dict = (
+            result[0][0].copy() if timestep == 0 else result[-1][-1:][0].copy()
+        )
+
+        substeps: list = []
+        substate: dict = previous_state.copy()
+
+        for substep, psu in enumerate(state_update_blocks):
+            substate: dict = (
+                previous_state.copy() if substep == 0 else substeps[substep - 1].copy()
+            )
+            substate_copy = (
+                pickle.loads(pickle.dumps(substate, -1))
+                if deepcopy
+                else substate.copy()
+            )
+            substate["substep"] = substep + 1
+
+            signals: dict = core.reduce_signals(
+                params, substep, result, substate_copy, psu, deepcopy
+            )
+
+            substate.update(
+                core._update_state(
+                    initial_state, params, substep, result, substate_copy, signals, item
+                )
+                for item in psu["variables"].items()
+            )
+            substate["timestep"] = (
+                (previous_state["timestep"] + 1) if timestep == 0 else timestep + 1
+            )
+            substeps.append(substate)
+
+        substeps = [substate] if not substeps else substeps
+        result.append(substeps if not drop_substeps else [substeps.pop()])
+
+        if (timestep + 1) % interval == 0:
+            checkpoint(result)
+
+    checkpoint(result)
+    return result
+
+
+def _atomic_write(path, data: bytes):
+    # Write to a temporary file and rename, so that a crash mid-write never leaves a corrupt checkpoint
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        file.write(data)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary_path, path)
@@ -7,20 +7,41 @@ The defaults are defined in their respective modules:
 * Simulation Configuration in `experiments/simulation_configuration.py`
 """
 
-from radcad import Simulation, Experiment, Backend
+from radcad import Model, Simulation, Experiment, Backend
+from radcad.core import generate_parameter_sweep
 
 from model import model
+from model.compiler import SimulationCompiler, compile_experiment
+from model.parts.utils import validate_parameters
+from model.utils import freeze_state_update_blocks
 from experiments.simulation_configuration import TIMESTEPS, DELTA_TIME, MONTE_CARLO_RUNS
 
 
-# Create Model Simulation
+def validate_simulation(simulation):
+    """Check model invariants once up front from the System Parameters of each subset, see `validate_parameters()`"""
+    for params in generate_parameter_sweep(simulation.model.params):
+        validate_parameters(params, simulation.model.initial_state, simulation.timesteps, simulation.runs)
+
+
+# Create Model Simulation,
+# with immutable State Variables so that deepcopy can be safely disabled (see `freeze_state_update_blocks()`)
 simulation = Simulation(
-    model=model,
+    model=Model(
+        params=model.params,
+        initial_state=model.initial_state,
+        state_update_blocks=freeze_state_update_blocks(model.state_update_blocks),
+    ),
     timesteps=TIMESTEPS,
     runs=MONTE_CARLO_RUNS
 )
 # Create Experiment of single Simulation
 experiment = Experiment([simulation])
+# Check model invariants up front, whether the Experiment or Simulation is run
+simulation.before_simulation = validate_simulation
+experiment.before_simulation = validate_simulation
+# Validate and compile the System Parameters of each subset before the Experiment or Simulation is run (see `model/compiler.py`)
+experiment.before_experiment = compile_experiment
+simulation.before_experiment = SimulationCompiler(simulation)
 # Configure Simulation & Experiment engine
 simulation.engine = experiment.engine
 experiment.engine.backend = Backend.SINGLE_PROCESS
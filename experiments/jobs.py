@@ -0,0 +1,181 @@
+"""
+Background simulation jobs, executed on a worker pool with progress polling,
+cancellation of superseded jobs, and coalescing of identical concurrent requests.
+
+Jobs are executed on a thread pool so that they can observe cancellation cooperatively:
+a simulation job checks its cancellation flag once per timestep from within the simulation,
+and stops by raising `JobCancelled`.
+
+Jobs are managed per process, so when serving an app with gunicorn use a single worker
+with multiple threads (e.g. `gunicorn -w 1 --threads 8 ...`), so that progress polling
+reaches the process executing the job.
+"""
+
+import copy
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from radcad.core import generate_parameter_sweep
+
+
+class JobCancelled(Exception):
+    """Raised from within a job when it has been cancelled"""
+
+    pass
+
+
+class Job:
+    """A unit of work submitted to the JobManager, identified by a key"""
+
+    def __init__(self, key):
+        self.key = key
+        self.future = None
+        self.progress = 0.0
+        self.subscribers = set()
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    @property
+    def status(self):
+        if self.cancelled:
+            return "cancelled"
+        elif not self.future.done():
+            return "running" if self.future.running() else "pending"
+        elif self.future.exception():
+            return "failed"
+        else:
+            return "done"
+
+    def cancel(self):
+        """Cancel the job: pending jobs never start, running jobs stop at their next cancellation check"""
+        self._cancelled.set()
+        if self.future:
+            self.future.cancel()
+
+    def check_cancelled(self):
+        """Cancellation check called from within the job, raises `JobCancelled` if the job has been cancelled"""
+        if self.cancelled:
+            raise JobCancelled(f"Job {self.key} cancelled")
+
+    def done(self):
+        return self.future.done()
+
+    def result(self, timeout=None):
+        return self.future.result(timeout=timeout)
+
+
+class JobManager:
+    """
+    Submits jobs to a worker pool.
+
+    * Jobs with the same key are coalesced: submitting a key that is already pending or running
+      returns the existing job rather than starting a new one.
+    * Failed jobs are returned to the next submission of their key, and resubmitted by the one after.
+    * Jobs are submitted on behalf of a group (e.g. a user session): when a group submits a new key,
+      its previous job is superseded, and cancelled if no other group is waiting on it.
+    """
+
+    def __init__(self, max_workers=4):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="simulation-job"
+        )
+        self.jobs = {}
+        self.groups = {}
+        self.lock = threading.Lock()
+
+    def submit(self, key, function, group=None) -> Job:
+        """Submit `function(job)` as a job identified by `key`, on behalf of `group`"""
+        with self.lock:
+            if group is not None:
+                self._supersede(group, key)
+
+            job = self.jobs.get(key)
+            if job is None or job.cancelled:
+                job = Job(key)
+                self.jobs[key] = job
+                job.future = self.executor.submit(self._execute, job, function)
+            elif job.status == "failed":
+                # A failed job is returned once, so that the poller receives the exception,
+                # and then evicted, so that the next submission retries it
+                del self.jobs[key]
+
+            if group is not None:
+                job.subscribers.add(group)
+                self.groups[group] = key
+
+            return job
+
+    def get(self, key):
+        with self.lock:
+            return self.jobs.get(key)
+
+    def cancel(self, key):
+        with self.lock:
+            job = self.jobs.pop(key, None)
+        if job:
+            job.cancel()
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            jobs = list(self.jobs.values())
+            self.jobs.clear()
+        for job in jobs:
+            job.cancel()
+        self.executor.shutdown(wait=wait)
+
+    def _supersede(self, group, key):
+        previous_key = self.groups.get(group)
+        if previous_key is None or previous_key == key:
+            return
+
+        previous_job = self.jobs.get(previous_key)
+        if previous_job:
+            previous_job.subscribers.discard(group)
+            if not previous_job.subscribers and not previous_job.done():
+                logging.info(f"Cancelling superseded job {previous_key}")
+                previous_job.cancel()
+                del self.jobs[previous_key]
+
+    def _execute(self, job, function):
+        job.check_cancelled()
+        result = function(job)
+        job.progress = 1.0
+
+        # Successful jobs are removed, with their results expected to be cached by the job function,
+        # whereas failed jobs are kept until the next submission, so that the poller receives the exception
+        with self.lock:
+            if self.jobs.get(job.key) is job:
+                del self.jobs[job.key]
+        return result
+
+
+def add_job_progress_block(simulation, job):
+    """
+    Create a copy of a radCAD Simulation with a State Update Block appended
+    that reports the job progress and checks for cancellation every timestep.
+    """
+    simulation = copy.deepcopy(simulation)
+    subsets = len(generate_parameter_sweep(simulation.model.params)) or 1
+    total_steps = simulation.timesteps * simulation.runs * subsets
+    steps = {"completed": 0}
+
+    def policy_job_progress(params, substep, state_history, previous_state):
+        job.check_cancelled()
+        steps["completed"] += 1
+        job.progress = steps["completed"] / total_steps
+        return {}
+
+    simulation.model.state_update_blocks = simulation.model.state_update_blocks + [
+        {
+            "description": """
+                Background job progress and cancellation
+            """,
+            "policies": {"job_progress": policy_job_progress},
+            "variables": {},
+        }
+    ]
+    return simulation
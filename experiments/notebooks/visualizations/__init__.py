@@ -12,6 +12,7 @@ from experiments.notebooks.visualizations.plotly_theme import (
     cadlabs_colors,
     cadlabs_colorway_sequence,
 )
+from experiments.notebooks.visualizations.downsampling import downsample_figure
 from model.system_parameters import parameters, validator_environments
 import model.constants as constants
 
@@ -181,7 +182,7 @@ def plot_validating_rewards(df, subplot_titles=[]):
         legend_title="",
     )
 
-    return fig
+    return fig_downsample(fig)
 
 
 def plot_validator_incentives_pie_chart(df):
@@ -602,6 +603,18 @@ def plot_validator_environment_yield_surface(df):
     return fig
 
 
+def fig_downsample(fig, parameters=parameters):
+    """
+    Downsample the figure's time-series traces to the configured point budget
+    (see `experiments.notebooks.visualizations.downsampling.max_points_per_trace`),
+    preserving the network upgrade stage transitions.
+    """
+    return downsample_figure(
+        fig,
+        preserve_x=[parameters["date_eip1559"][0], parameters["date_pos"][0]],
+    )
+
+
 def fig_add_stage_vrects(df, fig, parameters=parameters):
     date_start = parameters["date_start"][0]
     date_eip1559 = parameters["date_eip1559"][0]
@@ -739,7 +752,7 @@ def plot_eth_supply_over_all_stages(df):
         legend_title="",
     )
 
-    return fig
+    return fig_downsample(fig)
 
 
 def plot_eth_supply_and_inflation(df_historical, df_simulated, parameters=parameters):
@@ -878,7 +891,7 @@ def plot_eth_supply_and_inflation(df_historical, df_simulated, parameters=parame
     fig.update_yaxes(title_text="Network Inflation Rate (%/year)", secondary_y=False)
     fig.update_yaxes(title_text="ETH Supply (ETH)", secondary_y=True)
 
-    return fig
+    return fig_downsample(fig, parameters=parameters)
 
 
 def plot_network_inflation_over_all_stages(df):
@@ -908,7 +921,7 @@ def plot_network_inflation_over_all_stages(df):
         legend_title="",
     )
 
-    return fig
+    return fig_downsample(fig)
 
 
 def plot_eth_staked_over_all_stages(df):
@@ -929,7 +942,7 @@ def plot_eth_staked_over_all_stages(df):
         legend_title="",
     )
 
-    return fig
+    return fig_downsample(fig)
 
 
 def plot_number_of_validators_per_subset(df, scenario_names):
@@ -953,7 +966,7 @@ def plot_number_of_validators_per_subset(df, scenario_names):
     )
     fig.update_layout(hovermode="x unified")
 
-    return fig
+    return fig_downsample(fig)
 
 
 def plot_number_of_validators_in_activation_queue_over_time(df):
@@ -989,7 +1002,7 @@ def plot_number_of_validators_in_activation_queue_over_time(df):
 
     update_legend_names(fig)
 
-    return fig
+    return fig_downsample(fig)
 
 
 def plot_yields_per_subset_subplots(df, subplot_titles=[]):
@@ -1059,7 +1072,7 @@ def plot_yields_per_subset_subplots(df, subplot_titles=[]):
 
     update_legend_names(fig)
 
-    return fig
+    return fig_downsample(fig)
 
 
 def plot_yields_per_subset(df, scenario_names):
@@ -1127,7 +1140,7 @@ def plot_yields_per_subset(df, scenario_names):
 
     fig.update_layout(hovermode="x unified")
 
-    return fig
+    return fig_downsample(fig)
 
 
 def plot_cumulative_yields_per_subset(df, DELTA_TIME, scenario_names):
@@ -1210,7 +1223,7 @@ def plot_cumulative_yields_per_subset(df, DELTA_TIME, scenario_names):
 
     fig.update_layout(hovermode="x unified")
 
-    return fig
+    return fig_downsample(fig)
 
 
 def plot_cumulative_revenue_yields_per_subset(df, scenario_names):
@@ -1240,7 +1253,7 @@ def plot_cumulative_revenue_yields_per_subset(df, scenario_names):
 
     fig.update_layout(hovermode="x unified")
 
-    return fig
+    return fig_downsample(fig)
 
 
 def plot_stacked_cumulative_column_per_subset(df, column, scenario_names):
@@ -1279,7 +1292,7 @@ def plot_stacked_cumulative_column_per_subset(df, column, scenario_names):
         )
     )
 
-    return fig
+    return fig_downsample(fig)
 
 
 def plot_cumulative_returns_per_subset(df):
@@ -1369,7 +1382,7 @@ def plot_cumulative_returns_per_subset(df):
 
     fig.update_layout(hovermode="x unified")
 
-    return fig
+    return fig_downsample(fig)
 
 
 def plot_figure_widget_revenue_yields_over_time_foreach_subset(df):
@@ -1477,7 +1490,7 @@ def plot_revenue_yields_rolling_mean(df):
 
     update_legend_names(fig)
 
-    return fig
+    return fig_downsample(fig)
 
 
 def plot_profit_yields_by_environment_over_time(df):
@@ -1505,7 +1518,7 @@ def plot_profit_yields_by_environment_over_time(df):
         hovermode="x unified",
     )
 
-    return fig
+    return fig_downsample(fig)
 
 
 def plot_network_issuance_scenarios(df, simulation_names):
@@ -0,0 +1,199 @@
+"""
+Server-side downsampling of plotly figure traces.
+
+Long time-series, e.g. multi-run daily simulations, are reduced to a point budget per trace
+before the figure is rendered or exported, using either:
+* Largest-Triangle-Three-Buckets (LTTB), which preserves the visual shape of a series, or
+* min/max bucketing, which preserves the envelope of a series.
+
+The first and last points, the global extrema of each series,
+and the points either side of a set of preserved x-values (e.g. network upgrade stage transitions)
+are always kept.
+"""
+
+import numpy as np
+import pandas as pd
+
+max_points_per_trace = 2000
+"""
+The default point budget per trace. Set to `None` to disable downsampling.
+"""
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Select `n_out` indices of a series using the Largest-Triangle-Three-Buckets algorithm.
+
+    See https://skemman.is/bitstream/1946/15343/3/SS_MSthesis.pdf
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Split all points except the first and last into n_out - 2 buckets
+    bucket_edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    indices = np.empty(n_out, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        start, end = bucket_edges[i], bucket_edges[i + 1]
+        next_start = end
+        next_end = bucket_edges[i + 2] if i + 2 < len(bucket_edges) else n
+
+        # Select the point in the bucket forming the largest triangle
+        # with the previously selected point and the average of the next bucket
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+
+    return indices
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """Select up to `n_out` indices of a series, keeping the minimum and maximum of each of `n_out / 2` buckets"""
+    n = len(y)
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    bucket_edges = np.linspace(0, n, n_buckets + 1).astype(int)
+    indices = [
+        start + index
+        for start, end in zip(bucket_edges[:-1], bucket_edges[1:])
+        for index in (np.argmin(y[start:end]), np.argmax(y[start:end]))
+    ]
+    return np.array(indices, dtype=int)
+
+
+def downsample_indices(x, y, max_points, method="lttb", preserve_x=None) -> np.ndarray:
+    """
+    Select the sorted indices of a series to keep within a point budget,
+    always including the first and last points, the global extrema,
+    and the points either side of each of the `preserve_x` values.
+    """
+    x = _to_numeric(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if x is None or n <= max_points:
+        return np.arange(n)
+
+    # Replace missing values so that they don't propagate through bucket calculations
+    y_filled = np.where(np.isnan(y), np.nanmean(y), y)
+
+    if method == "lttb":
+        selected = lttb_indices(x, y_filled, max_points)
+    elif method == "minmax":
+        selected = minmax_indices(y_filled, max_points)
+    else:
+        raise ValueError(f"Invalid downsampling method {method}")
+
+    preserved = [0, n - 1, int(np.argmin(y_filled)), int(np.argmax(y_filled))]
+    preserve_x = _to_numeric([] if preserve_x is None else preserve_x)
+    for value in preserve_x if preserve_x is not None else []:
+        position = int(np.searchsorted(x, value))
+        preserved.extend([max(position - 1, 0), min(position, n - 1)])
+
+    return np.unique(np.concatenate([selected, preserved]))
+
+
+def downsample_figure(fig, max_points=None, method="lttb", preserve_x=None):
+    """
+    Downsample the scatter traces of a plotly figure in place.
+
+    Traces sharing the same x-values, e.g. stacked areas, filled bands or traces compared using
+    unified hover, are downsampled together using the union of their selected indices,
+    with the point budget split between them so that they stay aligned.
+
+    Args:
+        fig: A plotly Figure or FigureWidget
+        max_points (int, optional): The point budget per trace. Defaults to `max_points_per_trace`.
+        method (str, optional): "lttb" or "minmax". Defaults to "lttb".
+        preserve_x (list, optional): x-values, such as stage transition dates, to keep the points either side of.
+
+    Returns:
+        The downsampled figure
+    """
+    max_points = max_points or max_points_per_trace
+    if not max_points:
+        return fig
+
+    # Group traces by their x-values, looked up by length and endpoints and then compared exactly
+    groups = {}
+    for trace in fig.data:
+        if (
+            trace.type not in ["scatter", "scattergl"]
+            or trace.x is None
+            or trace.y is None
+        ):
+            continue
+        # Plotly ignores x-values beyond the length of y
+        x = np.asarray(trace.x)[: len(trace.y)]
+        if len(x) <= max_points:
+            continue
+        candidates = groups.setdefault((len(x), x[0], x[-1]), [])
+        for group_x, traces in candidates:
+            if np.array_equal(group_x, x):
+                traces.append(trace)
+                break
+        else:
+            candidates.append((x, [trace]))
+
+    for x, traces in [group for candidates in groups.values() for group in candidates]:
+        budget = max(max_points // len(traces), 3)
+        indices = np.unique(
+            np.concatenate(
+                [
+                    downsample_indices(x, trace.y, budget, method, preserve_x)
+                    for trace in traces
+                ]
+            )
+        )
+        for trace in traces:
+            _slice_points(trace, len(x), indices)
+            trace.x = x[indices]
+            trace.y = np.asarray(trace.y)[indices]
+
+    return fig
+
+
+# Per-point trace properties, sliced along with the x- and y-values so that e.g. hover data stays aligned
+per_point_properties = ["customdata", "text", "hovertext", "ids"]
+per_point_marker_properties = ["color", "size", "symbol", "opacity"]
+
+
+def _slice_points(trace, n, indices):
+    """Slice the per-point properties of a trace with `n` points, leaving scalar properties unchanged"""
+
+    def sliced(value):
+        if value is None or isinstance(value, str) or np.ndim(value) == 0:
+            return None
+        value = np.asarray(
+            value, dtype=object if isinstance(value, (list, tuple)) else None
+        )
+        return value[indices] if len(value) >= n else None
+
+    for name in per_point_properties:
+        value = sliced(trace[name])
+        if value is not None:
+            trace[name] = value
+    for name in per_point_marker_properties:
+        value = sliced(trace.marker[name])
+        if value is not None:
+            trace.marker[name] = value
+
+
+def _to_numeric(values):
+    """Convert numeric or datetime-like values to a float array, or None if they can't be converted"""
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.number):
+        return values.astype(float)
+    try:
+        return pd.to_datetime(values).values.astype("int64").astype(float)
+    except (TypeError, ValueError):
+        return None
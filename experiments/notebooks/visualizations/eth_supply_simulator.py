@@ -1,16 +1,29 @@
 from jupyter_dash import JupyterDash
 import dash_core_components as dcc
 import dash_html_components as html
-from dash.dependencies import Input, Output
+import dash
+from dash.dependencies import Input, Output, State
 from dash.exceptions import PreventUpdate
+import collections
+import concurrent.futures
 import copy
+import diskcache
+import functools
+import itertools
+import logging
+import numpy as np
+import os
+import threading
+import uuid
 from datetime import datetime
 import psutil
 
+import model
 import experiments.notebooks.visualizations as visualizations
 import experiments.notebooks.visualizations.plotly_theme
 import experiments.templates.eth_supply_analysis as eth_supply_analysis
 from experiments.run import run
+from experiments.jobs import JobManager, add_job_progress_block
 from data.historical_values import df_ether_supply
 
 
@@ -31,6 +44,38 @@ validator_scenarios = {
     'Low Adoption': default_validator_adoption * 0.5,
     'High Adoption': default_validator_adoption * 1.5
 }
+pos_launch_date_options = [
+    {'label': 'Dec 2021', 'value': '2021/12/1'},
+    {'label': 'Mar 2022', 'value': '2022/03/1'},
+    {'label': 'Jun 2022', 'value': '2022/06/1'},
+    {'label': 'Sep 2022', 'value': '2022/09/1'},
+    {'label': 'Dec 2022', 'value': '2022/12/1'},
+    {'label': 'Mar 2023', 'value': '2023/03/1'},
+    {'label': 'Jun 2023', 'value': '2023/06/1'}
+]
+# Discrete input space of the simulator, used to precompute the scenario grid
+validator_adoption_grid = list(np.arange(0, 7.5 + 0.5, 0.5))
+pos_launch_date_grid = [default_pos_launch_date] + [option['value'] for option in pos_launch_date_options]
+eip1559_base_fee_grid = list(range(0, 100 + 1, 1))
+
+# Configure result cache:
+# an in-memory LRU cache in front of a size-bounded disk cache shared between processes.
+# Only the result columns plotted by the app are cached, about 60 KB per scenario,
+# so that the full precomputed scenario grid (about 13,000 scenarios) fits within the disk cache size limit.
+RESULT_COLUMNS = ['timestamp', 'subset', 'eth_supply', 'supply_inflation_pct']
+RESULT_CACHE_MEMORY_SIZE = 128  # number of scenarios
+RESULT_CACHE_DISK_SIZE = 2 ** 31  # bytes
+result_cache = diskcache.Cache(
+    os.path.join(os.path.dirname(__file__), '.simulation.cache'),
+    size_limit=RESULT_CACHE_DISK_SIZE,
+    eviction_policy='least-recently-used',
+)
+memory_cache = collections.OrderedDict()
+memory_cache_lock = threading.Lock()
+
+# Configure background simulation jobs
+JOB_POLL_INTERVAL = 500  # milliseconds
+job_manager = JobManager(max_workers=4)
 
 
 # Load Data
@@ -38,7 +83,9 @@ external_stylesheets = ['assets/default_stylesheet.css']
 
 # Build App
 app = JupyterDash(__name__, external_stylesheets=external_stylesheets)
-app.layout = html.Div([
+# Expose Flask server, e.g. for `gunicorn -w 1 --threads 8 experiments.notebooks.visualizations.eth_supply_simulator:server`
+server = app.server
+layout = html.Div([
     # Inputs
     html.Div([
         # Validator Adoption
@@ -83,15 +130,7 @@ app.layout = html.Div([
                 id='pos-launch-date-dropdown',
                 clearable=False,
                 value=default_pos_launch_date,
-                options=[
-                    {'label': 'Dec 2021', 'value': '2021/12/1'},
-                    {'label': 'Mar 2022', 'value': '2022/03/1'},
-                    {'label': 'Jun 2022', 'value': '2022/06/1'},
-                    {'label': 'Sep 2022', 'value': '2022/09/1'},                  
-                    {'label': 'Dec 2022', 'value': '2022/12/1'},
-                    {'label': 'Mar 2023', 'value': '2023/03/1'},
-                    {'label': 'Jun 2023', 'value': '2023/06/1'}
-                ]
+                options=pos_launch_date_options
             )
         ], className='input-section'),
         # EIP-1559
@@ -138,11 +177,24 @@ app.layout = html.Div([
             id='loading-1',
             children=[dcc.Graph(id='graph')],
             type='default'
-        )
+        ),
+        html.Div(id='job-progress'),
+        dcc.Interval(id='job-poll-interval', interval=JOB_POLL_INTERVAL, disabled=True)
     ], className='output-row')
 ])
 
 
+def serve_layout():
+    """Serve the layout with a unique ID per page load, used to group the background simulation jobs of a session"""
+    return html.Div([
+        dcc.Store(id='session-id', data=str(uuid.uuid4())),
+        layout
+    ])
+
+
+app.layout = serve_layout
+
+
 # Callbacks
 @app.callback(
     Output('eip1559-base-fee-slider', 'value'),
@@ -166,33 +218,88 @@ def update_validator_adoption_sliders_by_scenarios(validator_dropdown):
     return validator_scenarios[validator_dropdown]
 
 
-# Define callback to update graph
+# Define callback to update graph,
+# when the inputs change or when polling a background simulation job for the current inputs
 @app.callback(
     Output('validator-dropdown', 'value'),
     Output('eip1559-dropdown', 'value'),
     Output('graph', 'figure'),
+    Output('job-poll-interval', 'disabled'),
+    Output('job-progress', 'children'),
     [Input('validator-adoption-slider', 'value'),
      Input('pos-launch-date-dropdown', 'value'),
-     Input('eip1559-base-fee-slider', 'value')]
+     Input('eip1559-base-fee-slider', 'value'),
+     Input('job-poll-interval', 'n_intervals')],
+    [State('session-id', 'data')]
 )
-def update_output_graph(validator_adoption, pos_launch_date, eip1559_base_fee):
-    df, parameters = run_simulation(validator_adoption, pos_launch_date, eip1559_base_fee)
-
+def update_output_graph(validator_adoption, pos_launch_date, eip1559_base_fee, _n_intervals, session_id):
     _validator_scenarios = dict((v, k) for k, v in validator_scenarios.items())
     validator_dropdown = _validator_scenarios.get(validator_adoption, 'Custom Value')
 
     _eip1559_scenarios = dict((v, k) for k, v in eip1559_scenarios.items())
     eip1559_dropdown = _eip1559_scenarios.get(eip1559_base_fee, 'Enabled (Custom Value)')
 
+    scenario = (validator_adoption, pos_launch_date, eip1559_base_fee)
+    df = get_cached_simulation_results(*scenario)
+    if df is None:
+        polling = any(
+            trigger['prop_id'].startswith('job-poll-interval.')
+            for trigger in dash.callback_context.triggered
+        )
+        if polling and job_manager.get(get_result_cache_key(*scenario)) is None:
+            # The job failed, and its failure was received by this or another session's poll,
+            # so it's only retried when the inputs change
+            return simulation_failed(validator_dropdown, eip1559_dropdown)
+
+        # Submit the scenario as a background job on behalf of this session,
+        # superseding the session's previous job and coalescing with identical jobs of other sessions
+        job = job_manager.submit(
+            get_result_cache_key(*scenario),
+            functools.partial(run_simulation_job, scenario),
+            group=session_id,
+        )
+        if not job.done():
+            return (
+                validator_dropdown,
+                eip1559_dropdown,
+                dash.no_update,
+                False,
+                f'Simulating scenario... {job.progress:.0%}',
+            )
+        try:
+            df = job.result()
+        except Exception as err:
+            logging.error(f"Simulating scenario {scenario} failed: {err}")
+            return simulation_failed(validator_dropdown, eip1559_dropdown)
+
+    return (
+        validator_dropdown,
+        eip1559_dropdown,
+        visualizations.plot_eth_supply_and_inflation(
+            df_ether_supply, df, parameters=get_simulation_parameters(pos_launch_date)
+        ),
+        True,
+        '',
+    )
+
+
+def simulation_failed(validator_dropdown, eip1559_dropdown):
+    """Stop polling, and show the failure of the scenario's job until the inputs change"""
     return (
         validator_dropdown,
         eip1559_dropdown,
-        visualizations.plot_eth_supply_and_inflation(df_ether_supply, df, parameters=parameters)
+        dash.no_update,
+        True,
+        'Simulating scenario failed, change the inputs to try again',
     )
 
 
-def run_simulation(validators_per_epoch, pos_launch_date, eip1559_base_fee):
-    simulation.model.params.update({
+def run_simulation(validators_per_epoch, pos_launch_date, eip1559_base_fee, job=None):
+    # Create a copy of the simulation, so that concurrent jobs don't share System Parameters
+    _simulation = (
+        add_job_progress_block(simulation, job) if job else copy.deepcopy(simulation)
+    )
+    _simulation.model.params.update({
         'validator_process': [
             lambda _run, _timestep: float(validators_per_epoch),
         ],
@@ -204,12 +311,124 @@ def run_simulation(validators_per_epoch, pos_launch_date, eip1559_base_fee):
         ],  # Gwei per gas
     })
 
-    df, _exceptions = run(simulation)
+    df, _exceptions = run(_simulation)
+
+    return df[RESULT_COLUMNS], _simulation.model.params
+
+
+def run_simulation_job(scenario, job):
+    """Run a scenario as a background job, reporting progress and caching the results"""
+    df, _parameters = run_simulation(*scenario, job=job)
+    cache_simulation_results(scenario, df)
+    return df
+
 
-    return df, simulation.model.params
+def get_simulation_parameters(pos_launch_date):
+    """Get the System Parameters used to annotate the simulation results, without running a simulation"""
+    return {
+        **simulation.model.params,
+        'date_pos': [datetime.strptime(pos_launch_date, '%Y/%m/%d')],
+    }
 
 
-def run_eth_supply_simulator(execution_mode=None):
+def get_result_cache_key(validators_per_epoch, pos_launch_date, eip1559_base_fee):
+    """
+    Create the result cache key for a scenario.
+
+    Includes the model version and simulation start date,
+    so that results cached on disk are not reused after either changes.
+    """
+    return (
+        model.__version__,
+        simulation.model.params['date_start'][0].strftime('%Y/%m/%d'),
+        float(validators_per_epoch),
+        pos_launch_date,
+        float(eip1559_base_fee),
+    )
+
+
+def cache_simulation_results(scenario, df):
+    """Store the simulation results for a scenario in the in-memory LRU cache and the disk cache"""
+    key = get_result_cache_key(*scenario)
+    result_cache.set(key, df)
+    _memory_cache_set(key, df)
+
+
+def _memory_cache_set(key, df):
+    with memory_cache_lock:
+        memory_cache[key] = df
+        memory_cache.move_to_end(key)
+        while len(memory_cache) > RESULT_CACHE_MEMORY_SIZE:
+            memory_cache.popitem(last=False)
+
+
+def get_cached_simulation_results(validators_per_epoch, pos_launch_date, eip1559_base_fee):
+    """
+    Get the post-processed simulation results for a scenario
+    from the in-memory LRU cache or the disk cache, or None if the scenario hasn't been simulated.
+    """
+    key = get_result_cache_key(validators_per_epoch, pos_launch_date, eip1559_base_fee)
+    with memory_cache_lock:
+        if key in memory_cache:
+            memory_cache.move_to_end(key)
+            return memory_cache[key]
+
+    df = result_cache.get(key)
+    if df is not None:
+        _memory_cache_set(key, df)
+    return df
+
+
+def get_simulation_results(validators_per_epoch, pos_launch_date, eip1559_base_fee):
+    """
+    Get the post-processed simulation results for a scenario,
+    from the in-memory LRU cache, the disk cache, or by running the simulation.
+    """
+    scenario = (validators_per_epoch, pos_launch_date, eip1559_base_fee)
+    df = get_cached_simulation_results(*scenario)
+    if df is None:
+        df, _parameters = run_simulation(*scenario)
+        cache_simulation_results(scenario, df)
+    return df
+
+
+def _precompute_scenario(scenario):
+    key = get_result_cache_key(*scenario)
+    if key not in result_cache:
+        df, _parameters = run_simulation(*scenario)
+        result_cache.set(key, df)
+    return scenario
+
+
+def precompute_scenario_grid(
+    validator_adoption_values=validator_adoption_grid,
+    pos_launch_dates=pos_launch_date_grid,
+    eip1559_base_fees=eip1559_base_fee_grid,
+    processes=None,
+):
+    """
+    Precompute the simulation results for the full grid of simulator inputs in parallel,
+    and store them in the disk cache for the app to render from.
+
+    Scenarios already in the disk cache are skipped, so the job can be interrupted and restarted.
+    Worker processes write directly to the disk cache, which is safe across processes.
+    """
+    scenarios = [
+        scenario for scenario in itertools.product(
+            validator_adoption_values, pos_launch_dates, eip1559_base_fees
+        )
+        if get_result_cache_key(*scenario) not in result_cache
+    ]
+    logging.info(f"Precomputing {len(scenarios)} ETH supply simulator scenarios")
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as executor:
+        for _scenario in executor.map(_precompute_scenario, scenarios, chunksize=8):
+            pass
+
+    logging.info("Precomputed ETH supply simulator scenarios")
+
+
+def run_eth_supply_simulator(execution_mode=None, precompute=False, processes=None):
     '''
     Run app and display result in the notebook:
     
@@ -219,9 +438,19 @@ def run_eth_supply_simulator(execution_mode=None):
     To display either in "inline" mode when using Jupyter Notebook,
     or "jupyterlab" mode when using Jupyter Lab:
     `run_eth_supply_simulator()`
+
+    To precompute the full scenario grid in parallel in the background while the app is running:
+    `run_eth_supply_simulator(precompute=True)`
     '''
-    processes = psutil.Process().parent().cmdline()
-    is_jupyter_lab = any('lab' in p for p in processes)
+    if precompute:
+        threading.Thread(
+            target=precompute_scenario_grid,
+            kwargs={'processes': processes},
+            daemon=True,
+        ).start()
+
+    parent_cmdline = psutil.Process().parent().cmdline()
+    is_jupyter_lab = any('lab' in p for p in parent_cmdline)
     if execution_mode:
         pass
     elif is_jupyter_lab:
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 from radcad.core import generate_parameter_sweep
 
@@ -17,74 +18,218 @@ def assign_parameters(df: pd.DataFrame, parameters: Parameters, set_params=[]):
     return df
 
 
-def post_process(df: pd.DataFrame, drop_timestep_zero=True, parameters=parameters):
+derived_metrics = {}
+"""
+Registry of derived metrics, mapping each column name to the tuple of columns computed together and the function computing them
+"""
+
+
+def derived_metric(*columns):
+    """
+    Register a function of the `df.metrics` accessor computing one or more derived metric columns,
+    which are computed on first access, and cached as DataFrame columns.
+    """
+    def decorator(function):
+        for column in columns:
+            derived_metrics[column] = (columns, function)
+        return function
+    return decorator
+
+
+@pd.api.extensions.register_dataframe_accessor('metrics')
+class MetricsAccessor:
+    """
+    Access derived metrics of a simulation results DataFrame, computing them and their dependencies on first access,
+    and caching them as columns of the DataFrame, e.g. `df.metrics['supply_inflation_pct']`.
+    """
+    def __init__(self, df: pd.DataFrame):
+        self._df = df
+        self._pending = None
+
+    def __getitem__(self, column) -> pd.Series:
+        if column in self._df.columns:
+            return self._df[column]
+        if self._pending is not None and column in self._pending:
+            return self._pending[column]
+        if column not in derived_metrics:
+            raise KeyError(f'Invalid column or derived metric {column}')
+
+        columns, function = derived_metrics[column]
+        values = function(self)
+        if len(columns) == 1:
+            values = {column: pd.Series(values, index=self._df.index, name=column)}
+        else:
+            values = {
+                key: pd.Series(value, index=self._df.index, name=key)
+                for key, value in zip(columns, np.asarray(values).T)
+            }
+
+        if self._pending is not None:
+            self._pending.update(values)
+        else:
+            for key, value in values.items():
+                self._df[key] = value
+        return values[column]
+
+    def compute(self, *columns) -> pd.DataFrame:
+        """
+        Compute the derived metrics, by default all registered metrics,
+        returning a new DataFrame with the metrics added at once, rather than one column at a time.
+        """
+        self._pending = {}
+        try:
+            for column in columns or derived_metrics:
+                self[column]
+            pending = self._pending
+        finally:
+            self._pending = None
+        return pd.concat([self._df, pd.DataFrame(pending, index=self._df.index)], axis=1)
+
+    @property
+    def available(self):
+        return list(derived_metrics)
+
+
+def _environment_columns(suffix, prefix=''):
+    return [prefix + validator.type + suffix for validator in validator_environments]
+
+
+def _disaggregate(df: MetricsAccessor, column):
+    # Stack arrays with one value per validator environment into a 2D array, with one column per environment
+    return np.stack([np.ravel(value) for value in df[column]]).astype('float32')
+
+
+# Dissagregate validator count
+@derived_metric(*_environment_columns('_validator_count'))
+def _validator_count(df):
+    return _disaggregate(df, 'validator_count_distribution')
+
+
+# Dissagregate validator costs
+@derived_metric(*_environment_columns('_costs'))
+def _costs(df):
+    return _disaggregate(df, 'validator_costs')
+
+
+@derived_metric(*_environment_columns('_hardware_costs'))
+def _hardware_costs(df):
+    return _disaggregate(df, 'validator_hardware_costs')
+
+
+@derived_metric(*_environment_columns('_cloud_costs'))
+def _cloud_costs(df):
+    return _disaggregate(df, 'validator_cloud_costs')
+
+
+@derived_metric(*_environment_columns('_third_party_costs'))
+def _third_party_costs(df):
+    return _disaggregate(df, 'validator_third_party_costs')
+
+
+# Dissagregate individual validator costs
+@derived_metric(*_environment_columns('_costs', prefix='individual_validator_'))
+def _individual_validator_costs(df):
+    costs = np.column_stack([df[column] for column in _environment_columns('_costs')])
+    counts = np.column_stack([df[column] for column in _environment_columns('_validator_count')])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return costs / counts
+
+
+# Dissagregate revenue and profit
+@derived_metric(*_environment_columns('_revenue'))
+def _revenue(df):
+    return _disaggregate(df, 'validator_revenue')
+
+
+@derived_metric(*_environment_columns('_profit'))
+def _profit(df):
+    return _disaggregate(df, 'validator_profit')
+
+
+# Dissagregate yields
+@derived_metric(*_environment_columns('_revenue_yields'))
+def _revenue_yields(df):
+    return _disaggregate(df, 'validator_revenue_yields')
+
+
+@derived_metric(*_environment_columns('_profit_yields'))
+def _profit_yields(df):
+    return _disaggregate(df, 'validator_profit_yields')
+
+
+# Convert decimals to percentages
+for _yields in ['_revenue_yields', '_profit_yields']:
+    for _validator in validator_environments:
+        derived_metric(_validator.type + _yields + '_pct')(
+            lambda df, column=_validator.type + _yields: df[column] * 100
+        )
+
+for _column in ['supply_inflation', 'total_revenue_yields', 'total_profit_yields']:
+    derived_metric(_column + '_pct')(lambda df, column=_column: df[column] * 100)
+
+
+# Calculate revenue-profit yield spread
+@derived_metric('revenue_profit_yield_spread_pct')
+def _revenue_profit_yield_spread_pct(df):
+    return df['total_revenue_yields_pct'] - df['total_profit_yields_pct']
+
+
+# Convert validator rewards and penalties from Gwei to ETH
+validator_rewards = [
+    'validating_rewards',
+    'validating_penalties',
+    'total_online_validator_rewards',
+    'total_priority_fee_to_validators',
+    'source_reward',
+    'target_reward',
+    'head_reward',
+    'block_proposer_reward',
+    'sync_reward',
+    'whistleblower_rewards'
+]
+validator_penalties = ['validating_penalties', 'amount_slashed']
+
+for _column in dict.fromkeys(validator_rewards + validator_penalties):
+    derived_metric(_column + '_eth')(lambda df, column=_column: df[column] / constants.gwei)
+
+
+# Calculate cumulative revenue and profit yields
+# NOTE The initial state has zero yields, so cumulative yields accessed after dropping it are unchanged
+@derived_metric('daily_revenue_yields_pct')
+def _daily_revenue_yields_pct(df):
+    return df['total_revenue_yields_pct'] / (constants.epochs_per_year / df['dt'])
+
+
+@derived_metric('cumulative_revenue_yields_pct')
+def _cumulative_revenue_yields_pct(df):
+    return df['daily_revenue_yields_pct'].groupby(df['subset']).transform('cumsum')
+
+
+@derived_metric('daily_profit_yields_pct')
+def _daily_profit_yields_pct(df):
+    return df['total_profit_yields_pct'] / (constants.epochs_per_year / df['dt'])
+
+
+@derived_metric('cumulative_profit_yields_pct')
+def _cumulative_profit_yields_pct(df):
+    return df['daily_profit_yields_pct'].groupby(df['subset']).transform('cumsum')
+
+
+def post_process(df: pd.DataFrame, drop_timestep_zero=True, parameters=parameters, metrics=None):
+    """
+    Post-process the simulation results DataFrame, computing the derived metrics, by default all registered metrics.
+
+    Pass a list of `metrics` to compute only those metrics and their dependencies,
+    or an empty list to defer all metrics until first accessed using the `df.metrics` accessor.
+    """
     # Assign parameters to DataFrame
     assign_parameters(df, parameters, [
         # Parameters to assign to DataFrame
         'dt'
     ])
 
-    # Dissagregate validator count
-    df[[validator.type + '_validator_count' for validator in validator_environments]] = df.apply(lambda row: list(row.validator_count_distribution), axis=1, result_type='expand').astype('float32')
-
-    # Dissagregate validator costs
-    df[[validator.type + '_costs' for validator in validator_environments]] = df.apply(lambda row: list(row.validator_costs), axis=1, result_type='expand').astype('float32')
-    df[[validator.type + '_hardware_costs' for validator in validator_environments]] = df.apply(lambda row: list(row.validator_hardware_costs), axis=1, result_type='expand').astype('float32')
-    df[[validator.type + '_cloud_costs' for validator in validator_environments]] = df.apply(lambda row: list(row.validator_cloud_costs), axis=1, result_type='expand').astype('float32')
-    df[[validator.type + '_third_party_costs' for validator in validator_environments]] = df.apply(lambda row: list(row.validator_third_party_costs), axis=1, result_type='expand').astype('float32')
-
-    # Dissagregate individual validator costs
-    _mapping = dict(zip(
-        [validator.type + '_costs' for validator in validator_environments],
-        [validator.type + '_validator_count' for validator in validator_environments]
-    ))
-
-    df[['individual_validator_' + validator.type + '_costs' for validator in validator_environments]] = \
-        df[[validator.type + '_costs' for validator in validator_environments]].rename(columns=_mapping) / \
-        df[[validator.type + '_validator_count' for validator in validator_environments]]
-
-    # Dissagregate revenue and profit
-    df[[validator.type + '_revenue' for validator in validator_environments]] = df.apply(lambda row: list(row.validator_revenue), axis=1, result_type='expand').astype('float32')
-    df[[validator.type + '_profit' for validator in validator_environments]] = df.apply(lambda row: list(row.validator_profit), axis=1, result_type='expand').astype('float32')
-
-    # Dissagregate yields
-    df[[validator.type + '_revenue_yields' for validator in validator_environments]] = df.apply(lambda row: list(row.validator_revenue_yields), axis=1, result_type='expand').astype('float32')
-    df[[validator.type + '_profit_yields' for validator in validator_environments]] = df.apply(lambda row: list(row.validator_profit_yields), axis=1, result_type='expand').astype('float32')
-
-    # Convert decimals to percentages
-    df[[validator.type + '_revenue_yields_pct' for validator in validator_environments]] = df[[validator.type + '_revenue_yields' for validator in validator_environments]] * 100
-    df[[validator.type + '_profit_yields_pct' for validator in validator_environments]] = df[[validator.type + '_profit_yields' for validator in validator_environments]] * 100
-    df['supply_inflation_pct'] = df['supply_inflation'] * 100
-    df['total_revenue_yields_pct'] = df['total_revenue_yields'] * 100
-    df['total_profit_yields_pct'] = df['total_profit_yields'] * 100
-
-    # Calculate revenue-profit yield spread
-    df['revenue_profit_yield_spread_pct'] = df['total_revenue_yields_pct'] - df['total_profit_yields_pct']
-
-    # Convert validator rewards from Gwei to ETH
-    validator_rewards = [
-        'validating_rewards',
-        'validating_penalties',
-        'total_online_validator_rewards',
-        'total_priority_fee_to_validators',
-        'source_reward',
-        'target_reward',
-        'head_reward',
-        'block_proposer_reward',
-        'sync_reward',
-        'whistleblower_rewards'
-    ]
-    df[[reward + '_eth' for reward in validator_rewards]] = df[validator_rewards] / constants.gwei
-
-    # Convert validator penalties from Gwei to ETH
-    validator_penalties = ['validating_penalties', 'amount_slashed']
-    df[[penalty + '_eth' for penalty in validator_penalties]] = df[validator_penalties] / constants.gwei
-
-    # Calculate cumulative revenue and profit yields
-    df["daily_revenue_yields_pct"] = df["total_revenue_yields_pct"] / (constants.epochs_per_year / df['dt'])
-    df["cumulative_revenue_yields_pct"] = df.groupby('subset')["daily_revenue_yields_pct"].transform('cumsum')
-    df["daily_profit_yields_pct"] = df["total_profit_yields_pct"] / (constants.epochs_per_year / df['dt'])
-    df["cumulative_profit_yields_pct"] = df.groupby('subset')["daily_profit_yields_pct"].transform('cumsum')
+    if metrics is None or metrics:
+        df = df.metrics.compute(*(metrics or []))
 
     # Drop the initial state for plotting
     if drop_timestep_zero:
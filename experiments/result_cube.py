@@ -0,0 +1,237 @@
+"""
+An N-dimensional labeled container for simulation results, as an alternative to the long-form DataFrame.
+
+Each State Variable is stored as a Numpy array with dimensions `(subset, run, timestep)`, and array State Variables
+with one value per validator environment (e.g. `validator_profit_yields`) have an additional `validator_environment` dimension,
+rather than repeating the subset, run, and timestep columns on every row and storing object-dtype arrays.
+
+Swept System Parameters are coordinates on the subset axis, so that a slice such as
+"all runs at timestep t for BASE_REWARD_FACTOR=64" is a label lookup and a Numpy view:
+```
+cube = ResultCube.from_dataframe(df, parameters=simulation.model.params)
+cube.sel(timestep=t, BASE_REWARD_FACTOR=64)["eth_supply"]  # Numpy array of shape (runs,)
+df = cube.to_dataframe()
+```
+"""
+
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+from radcad.core import generate_parameter_sweep
+
+from model.system_parameters import validator_environments
+
+DIMENSIONS = ["subset", "run", "timestep"]
+ENVIRONMENT_DIMENSION = "validator_environment"
+
+
+class ResultCube:
+    """
+    Simulation results as a mapping of State Variable names to arrays with dimensions `(subset, run, timestep[, validator_environment])`,
+    with coordinates (labels) for each dimension, and swept System Parameter values per subset.
+
+    Attributes:
+        variables: A dictionary of State Variable names to Numpy arrays
+        coords: A dictionary of dimension names to Numpy arrays of labels
+        subset_params: A DataFrame of the swept System Parameter values, indexed by subset
+    """
+
+    def __init__(self, variables, coords, subset_params=None):
+        self.variables: Dict[str, np.ndarray] = variables
+        self.coords: Dict[str, np.ndarray] = coords
+        self.subset_params = (
+            subset_params
+            if subset_params is not None
+            else pd.DataFrame(index=pd.Index(coords.get("subset", []), name="subset"))
+        )
+        self._positions = {
+            dimension: {label: position for position, label in enumerate(labels)}
+            for dimension, labels in coords.items()
+        }
+
+    @property
+    def dims(self) -> List[str]:
+        return [dimension for dimension in DIMENSIONS if dimension in self.coords]
+
+    def __getitem__(self, variable) -> np.ndarray:
+        return self.variables[variable]
+
+    def __contains__(self, variable):
+        return variable in self.variables
+
+    def __repr__(self):
+        shape = ", ".join(
+            f"{dimension}: {len(labels)}" for dimension, labels in self.coords.items()
+        )
+        return f"ResultCube({shape}; {len(self.variables)} variables; swept {list(self.subset_params.columns)})"
+
+    def isel(self, **indexers) -> "ResultCube":
+        """
+        Select by position along the `subset`, `run`, `timestep`, or `validator_environment` dimensions.
+        Integers and slices select Numpy views, and drop the dimension for integers.
+        """
+        unknown = set(indexers) - set(self.coords)
+        if unknown:
+            raise KeyError(
+                f"Invalid dimensions {unknown}, expected one of {list(self.coords)}"
+            )
+
+        def index(dimensions):
+            return tuple(
+                indexers.get(dimension, slice(None)) for dimension in dimensions
+            )
+
+        variables = {
+            name: values[index(self._variable_dimensions(values))]
+            for name, values in self.variables.items()
+        }
+        coords = {
+            dimension: labels[indexers.get(dimension, slice(None))]
+            for dimension, labels in self.coords.items()
+            if np.ndim(indexers.get(dimension, slice(None))) > 0
+            or isinstance(indexers.get(dimension, slice(None)), slice)
+        }
+        subset_params = self.subset_params
+        if "subset" in indexers:
+            subset_params = subset_params.iloc[
+                np.atleast_1d(np.arange(len(subset_params))[indexers["subset"]])
+            ]
+        return ResultCube(variables, coords, subset_params)
+
+    def sel(self, **labels) -> "ResultCube":
+        """
+        Select by label along the dimensions, or by swept System Parameter value on the subset dimension,
+        e.g. `cube.sel(timestep=10, BASE_REWARD_FACTOR=64)`.
+        Single labels select Numpy views, whereas a parameter value matching multiple subsets selects a copy.
+        """
+        indexers = {}
+        params = {key: value for key, value in labels.items() if key not in self.coords}
+        for dimension, label in labels.items():
+            if dimension in params:
+                continue
+            indexers[dimension] = self._label_index(dimension, label)
+
+        if params:
+            unknown = set(params) - set(self.subset_params.columns)
+            if unknown:
+                raise KeyError(
+                    f"Invalid dimensions or swept System Parameters {unknown}"
+                )
+            mask = np.ones(len(self.subset_params), dtype=bool)
+            for key, value in params.items():
+                mask &= (self.subset_params[key] == value).to_numpy()
+            subsets = np.flatnonzero(mask)
+            if "subset" in indexers:
+                raise KeyError(
+                    "Select either a subset or swept System Parameter values, not both"
+                )
+            if len(subsets) == 0:
+                raise KeyError(f"No subset with System Parameters {params}")
+            indexers["subset"] = int(subsets[0]) if len(subsets) == 1 else subsets
+        return self.isel(**indexers)
+
+    def _label_index(self, dimension, label):
+        positions = self._positions[dimension]
+        if isinstance(label, slice):
+            labels = self.coords[dimension]
+            start = (
+                0
+                if label.start is None
+                else np.searchsorted(labels, label.start, side="left")
+            )
+            stop = (
+                len(labels)
+                if label.stop is None
+                else np.searchsorted(labels, label.stop, side="right")
+            )
+            return slice(start, stop, label.step)
+        if np.ndim(label) > 0:
+            return np.array([positions[item] for item in label])
+        return positions[label]
+
+    def _variable_dimensions(self, values):
+        dimensions = [dimension for dimension in DIMENSIONS if dimension in self.coords]
+        if values.ndim > len(dimensions):
+            dimensions.append(ENVIRONMENT_DIMENSION)
+        return dimensions
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame, parameters=None) -> "ResultCube":
+        """
+        Create a ResultCube from the long-form simulation results DataFrame, keeping the last substep of each timestep.
+
+        Args:
+            parameters: The System Parameters of the simulation, to assign the swept parameters as subset coordinates
+        """
+        df = df[df.groupby(DIMENSIONS)["substep"].transform("max") == df["substep"]]
+        df = df.sort_values(DIMENSIONS)
+
+        coords = {
+            dimension: np.sort(df[dimension].unique()) for dimension in DIMENSIONS
+        }
+        shape = tuple(len(coords[dimension]) for dimension in DIMENSIONS)
+        if np.prod(shape) != len(df):
+            raise ValueError(
+                f"Results are not rectangular over {DIMENSIONS}: expected {np.prod(shape)} rows, found {len(df)}"
+            )
+
+        variables = {}
+        environments = None
+        for column in df.columns:
+            if column in DIMENSIONS:
+                continue
+            values = df[column].to_numpy()
+            if (
+                values.dtype == object
+                and len(values)
+                and isinstance(values[0], np.ndarray)
+            ):
+                # Initial states may be column vectors, e.g. `validator_eth_staked` of shape (7, 1)
+                values = np.stack([np.ravel(value) for value in values])
+                if environments is None and values.shape[1] == len(
+                    validator_environments
+                ):
+                    environments = np.array(
+                        [validator.type for validator in validator_environments]
+                    )
+            variables[column] = values.reshape(shape + values.shape[1:])
+        if environments is not None:
+            coords[ENVIRONMENT_DIMENSION] = environments
+
+        subset_params = None
+        if parameters is not None:
+            subset_params = _swept_parameters(parameters).loc[coords["subset"]]
+        return cls(variables, coords, subset_params)
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Convert the ResultCube to a long-form DataFrame, with array State Variables as object-dtype columns of Numpy arrays"""
+        dimensions = self.dims
+        shape = tuple(len(self.coords[dimension]) for dimension in dimensions)
+        index = pd.MultiIndex.from_product(
+            [self.coords[dimension] for dimension in dimensions], names=dimensions
+        )
+        size = int(np.prod(shape))
+
+        columns = {}
+        for name, values in self.variables.items():
+            values = values.reshape((size,) + values.shape[len(dimensions) :])
+            if values.ndim > 1:
+                column = np.empty(size, dtype=object)
+                column[:] = list(values)
+                values = column
+            columns[name] = values
+        return pd.DataFrame(columns, index=index).reset_index()
+
+
+def _swept_parameters(parameters) -> pd.DataFrame:
+    """Get a DataFrame of the scalar System Parameters that vary between subsets, indexed by subset"""
+    subsets = generate_parameter_sweep(parameters) or [parameters]
+    swept = {}
+    for key in parameters:
+        values = [subset[key] for subset in subsets]
+        if not all(np.isscalar(value) for value in values):
+            continue
+        if len(set(values)) > 1:
+            swept[key] = values
+    return pd.DataFrame(swept, index=pd.Index(range(len(subsets)), name="subset"))
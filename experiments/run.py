@@ -1,29 +1,74 @@
-import pandas as pd
+"""
+Run an experiment, by default the default experiment, from the command line.
+
+Usage:
+```
+python -m experiments.run --template monte_carlo_analysis --timesteps 365 --runs 10 --output outputs/results.parquet --report report.json
+```
+
+Long simulations can be checkpointed with `--checkpoint-dir DIR`, and resumed after a crash with `--resume DIR`.
+
+The run report is JSON with per-phase durations in seconds (`import`, `process_generation`, `simulation`, `post_processing`, `write`),
+peak memory in megabytes, and throughput, written to the `--report` path or printed to stdout. Logs are written to stderr.
+"""
+
+import time
+
+_import_start_time = time.time()
+
+import argparse
+import copy
+import importlib
+import json
 import logging
+import os
 import sys
-import time
+from enum import Enum
+
+import numpy as np
+import pandas as pd
+from radcad import Backend
 
+from experiments.checkpoint import load_checkpoint, run_checkpointed
 from experiments.default_experiment import experiment
 from experiments.post_processing import post_process
+from model.types import ValidationLevel
+
+_import_duration = time.time() - _import_start_time
 
 # Configure logging framework
 # e.g. Use logging.debug(...) to log to log file
 logger = logging.getLogger()
 logger.setLevel(logging.DEBUG)
 # handler = logging.FileHandler(filename=f'logs/experiment-{datetime.now()}.log')
-handler = logging.StreamHandler(sys.stdout)
+handler = logging.StreamHandler(sys.stderr)
 formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 handler.setFormatter(formatter)
 logger.addHandler(handler)
 
+formats = ["parquet", "csv", "feather"]
+
+
+def run(executable=experiment, timings=None, checkpoint_directory=None, checkpoint_interval=None):
+    """
+    Run the experiment or simulation and post-process the results,
+    recording the `simulation` and `post_processing` durations in the `timings` dictionary if provided.
+
+    If a checkpoint directory is provided, runs are checkpointed every `checkpoint_interval` timesteps,
+    and resumed from an existing checkpoint (see `experiments/checkpoint.py`).
+    """
+    timings = timings if timings is not None else {}
 
-def run(executable=experiment):
     logging.info("Running experiment")
     start_time = time.time()
 
-    executable.run()
+    if checkpoint_directory:
+        run_checkpointed(executable, checkpoint_directory, checkpoint_interval)
+    else:
+        executable.run()
 
     experiment_duration = time.time() - start_time
+    timings["simulation"] = experiment_duration
     logging.info(f"Experiment complete in {experiment_duration} seconds")
 
     logging.info("Post-processing results")
@@ -38,11 +83,198 @@ def run(executable=experiment):
     df = post_process(df, parameters=parameters)
 
     post_processing_duration = time.time() - start_time - experiment_duration
+    timings["post_processing"] = post_processing_duration
     logging.info(f"Post-processing complete in {post_processing_duration} seconds")
 
     return df, executable.exceptions
 
 
+def load_experiment(template):
+    """
+    Import an experiment by template module name, e.g. "monte_carlo_analysis" for `experiments/templates/monte_carlo_analysis.py`,
+    or by module path, returning a copy of the module's `experiment` to avoid mutation.
+    """
+    if template == "default_experiment":
+        module = "experiments.default_experiment"
+    elif "." in template:
+        module = template
+    else:
+        module = "experiments.templates." + template
+    return copy.deepcopy(importlib.import_module(module).experiment)
+
+
+def configure(executable, timesteps=None, runs=None, backend=None, dt=None, validation_level=None):
+    """Override the Simulation Configuration of each simulation of the experiment"""
+    for simulation in executable.simulations:
+        if timesteps is not None:
+            simulation.timesteps = timesteps
+        if runs is not None:
+            simulation.runs = runs
+        if dt is not None:
+            simulation.model.params.update({"dt": [dt]})
+        if validation_level is not None:
+            simulation.model.params.update({"validation_level": [ValidationLevel[validation_level.upper()]]})
+    if backend is not None:
+        executable.engine.backend = Backend[backend.upper()]
+    return executable
+
+
+def get_results_format(path, format=None):
+    """
+    Get the results format, by default inferred from the file extension,
+    checking that the format is valid and its dependencies are installed,
+    so that e.g. a missing `pyarrow` dependency is reported before the experiment is run.
+    """
+    format = format or os.path.splitext(path)[1].lstrip(".")
+    if format not in formats:
+        raise ValueError(f"Invalid results format {format}, expected one of {formats}")
+    if format in ["parquet", "feather"]:
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError(f"Writing results in {format} format requires the `pyarrow` dependency")
+    return format
+
+
+def write_results(df: pd.DataFrame, path, format=None):
+    """
+    Write the results to disk in Parquet, CSV, or Feather format, by default inferred from the file extension.
+
+    Parquet and Feather require the `pyarrow` dependency. For these formats
+    array State Variables are written as lists, and enumerations (e.g. `stage`) by name.
+    """
+    format = get_results_format(path, format)
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    if format == "csv":
+        df.to_csv(path, index=False)
+        return
+
+    df = df.reset_index(drop=True)
+    for column in df.columns[df.dtypes == object]:
+        value = df[column].iloc[0] if len(df) else None
+        if isinstance(value, np.ndarray):
+            df[column] = [np.ravel(value).tolist() for value in df[column]]
+        elif isinstance(value, Enum):
+            df[column] = [value.name for value in df[column]]
+    if format == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_feather(path)
+
+
+def peak_memory():
+    """The peak resident memory in megabytes of this process and its (terminated) child processes, if available"""
+    try:
+        import resource
+    except ImportError:
+        return {"self": None, "children": None}
+
+    # `ru_maxrss` is in kilobytes on Linux, and bytes on macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit / 2 ** 20,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit / 2 ** 20,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run an experiment and write a JSON run report")
+    parser.add_argument(
+        "--template", default="default_experiment",
+        help='Experiment template module, e.g. "monte_carlo_analysis", or a module path exposing an `experiment`'
+    )
+    parser.add_argument("--timesteps", type=int, help="Override the number of timesteps")
+    parser.add_argument("--runs", type=int, help="Override the number of Monte Carlo runs")
+    parser.add_argument(
+        "--backend", choices=[backend.name.lower() for backend in Backend],
+        help="Override the radCAD execution backend"
+    )
+    parser.add_argument("--dt", type=int, help="Override the number of epochs per timestep")
+    parser.add_argument(
+        "--validation-level", choices=[level.name.lower() for level in ValidationLevel], default="sampled",
+        help="Level of checking of model invariants, by default checked up front and on sampled timesteps"
+    )
+    parser.add_argument("--output", help="Path to write the post-processed results to")
+    parser.add_argument("--format", choices=formats, help="Results format, by default inferred from the output path")
+    parser.add_argument("--report", help="Path to write the JSON run report to, by default printed to stdout")
+    parser.add_argument("--checkpoint-dir", help="Directory to checkpoint runs to, to be resumed using --resume")
+    parser.add_argument("--checkpoint-interval", type=int, help="Number of timesteps between checkpoints")
+    parser.add_argument(
+        "--resume", metavar="CHECKPOINT_DIR",
+        help="Resume the experiment from the last checkpoint in the directory, ignoring the template and overrides"
+    )
+    args = parser.parse_args(argv)
+    if args.output:
+        get_results_format(args.output, args.format)
+
+    timings = {"import": _import_duration}
+    start_time = time.time()
+
+    if args.resume:
+        # The checkpoint includes the stochastic process realizations
+        executable = load_checkpoint(args.resume)
+        timings["process_generation"] = time.time() - start_time
+        checkpoint_directory = args.resume
+    else:
+        # Templates generate their stochastic process realizations on import
+        executable = load_experiment(args.template)
+        timings["process_generation"] = time.time() - start_time
+        configure(
+            executable, timesteps=args.timesteps, runs=args.runs, backend=args.backend, dt=args.dt,
+            validation_level=args.validation_level
+        )
+        checkpoint_directory = args.checkpoint_dir
+
+    df, exceptions = run(
+        executable, timings=timings,
+        checkpoint_directory=checkpoint_directory, checkpoint_interval=args.checkpoint_interval
+    )
+
+    timings["write"] = 0.0
+    if args.output:
+        logging.info(f"Writing results to {args.output}")
+        write_start_time = time.time()
+        write_results(df, args.output, args.format)
+        timings["write"] = time.time() - write_start_time
+    timings["total"] = sum(timings.values())
+
+    # radCAD parameter sweeps have as many subsets as the longest System Parameter list
+    state_updates = sum(
+        simulation.timesteps
+        * simulation.runs
+        * max(len(values) for values in simulation.model.params.values())
+        * len(simulation.model.state_update_blocks)
+        for simulation in executable.simulations
+    )
+    report = {
+        "template": args.template,
+        "overrides": {
+            key: getattr(args, key) for key in ["timesteps", "runs", "backend", "dt", "validation_level"]
+            if getattr(args, key) is not None
+        },
+        "durations": timings,
+        "peak_memory_mb": peak_memory(),
+        "results": {
+            "rows": len(df),
+            "columns": len(df.columns),
+            "exceptions": sum(1 for exception in exceptions if exception and exception.get("exception")),
+            "output": args.output,
+        },
+        "throughput": {
+            "rows_per_second": len(df) / timings["simulation"] if timings["simulation"] else None,
+            "state_updates_per_second": state_updates / timings["simulation"] if timings["simulation"] else None,
+        },
+    }
+
+    if args.report:
+        with open(args.report, "w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+    return report
+
+
 if __name__ == '__main__':
-    df, _exceptions = run()
-    print(df)
+    main()
@@ -0,0 +1,236 @@
+"""
+Concurrent scheduling of several experiments, e.g. the templates of an analysis notebook, on a shared worker pool.
+
+The experiments are planned as a single job graph: each experiment depends on the simulation runs it consists of,
+and identical runs shared between experiments (the same System Parameters, Initial State, State Update Blocks,
+timesteps, and run index) are deduplicated, using a content fingerprint (see `experiments.utils.fingerprint`),
+and executed once.
+
+Runs are submitted to the pool (see `experiments/worker_pool.py`) in order of the experiments' priority,
+a run shared between experiments taking the highest priority of those that depend on it,
+and each experiment's results are streamed back as soon as all of its runs complete.
+
+Usage:
+```
+from experiments.scheduler import run_experiments
+
+experiments = {
+    "eth_staked_sweep_analysis": eth_staked_sweep_analysis.experiment,
+    "eth_price_sweep_analysis": eth_price_sweep_analysis.experiment,
+}
+
+for name, experiment in run_experiments(experiments, priorities={"eth_price_sweep_analysis": 1}):
+    df = pd.DataFrame(experiment.results)
+```
+"""
+
+import queue
+
+from radcad import Experiment
+from radcad.utils import extract_exceptions, flatten
+
+from experiments.utils import fingerprint
+from experiments.worker_pool import WorkerPool
+
+
+def plan_experiments(experiments, priorities=None):
+    """
+    Plan the runs of the experiments as a job graph, deduplicating identical runs, calling the experiments' hooks.
+
+    Args:
+        experiments (list or dict): radCAD Experiments or Simulations, by key, or a list indexed by position
+        priorities (list or dict, optional): The priority of each experiment, by key, higher priorities first, by default 0
+
+    Returns:
+        tuple: The unique runs as a list of `(priority, RunArgs, raise_exceptions)` in order of execution,
+        and for each experiment key the list of `(task index, RunArgs)` it depends on, in the order of its results
+    """
+    experiments = _items(experiments)
+    priorities = dict(_items(priorities or {}))
+
+    tasks = {}
+    jobs = {}
+    for key, executable in experiments:
+        priority = priorities.get(key, 0)
+        engine = executable.engine
+        engine.executable = executable
+        simulations = (
+            executable.simulations
+            if isinstance(executable, Experiment)
+            else [executable]
+        )
+        executable._before_experiment(
+            experiment=executable if isinstance(executable, Experiment) else None
+        )
+
+        configs = [
+            (
+                simulation.model.initial_state,
+                simulation.model.state_update_blocks,
+                simulation.model.params,
+                simulation.timesteps,
+                simulation.runs,
+            )
+            for simulation in simulations
+        ]
+        # The State Update Blocks are shared by every run of a simulation, and so fingerprinted once
+        block_fingerprints = {}
+        jobs[key] = []
+        for run_args in engine._run_stream(configs):
+            blocks = run_args.state_update_blocks
+            if id(blocks) not in block_fingerprints:
+                block_fingerprints[id(blocks)] = fingerprint(blocks)
+            task_key = fingerprint(
+                (
+                    block_fingerprints[id(blocks)],
+                    run_args.initial_state,
+                    run_args.parameters,
+                    run_args.timesteps,
+                    run_args.run,
+                    run_args.deepcopy,
+                    run_args.drop_substeps,
+                    engine.raise_exceptions,
+                )
+            )
+            if task_key not in tasks:
+                tasks[task_key] = {
+                    "priority": priority,
+                    "order": len(tasks),
+                    "run_args": run_args,
+                    "raise_exceptions": engine.raise_exceptions,
+                }
+            else:
+                tasks[task_key]["priority"] = max(tasks[task_key]["priority"], priority)
+            jobs[key].append((task_key, run_args))
+
+    # Runs are executed in order of priority, and then in the order they were planned
+    ordered_keys = sorted(
+        tasks,
+        key=lambda task_key: (-tasks[task_key]["priority"], tasks[task_key]["order"]),
+    )
+    indices = {task_key: index for index, task_key in enumerate(ordered_keys)}
+    plan = [
+        (
+            tasks[task_key]["priority"],
+            tasks[task_key]["run_args"],
+            tasks[task_key]["raise_exceptions"],
+        )
+        for task_key in ordered_keys
+    ]
+    jobs = {
+        key: [(indices[task_key], run_args) for task_key, run_args in runs]
+        for key, runs in jobs.items()
+    }
+    return plan, jobs
+
+
+def run_experiments(experiments, priorities=None, pool=None, processes=None):
+    """
+    Run the experiments concurrently on a worker pool, yielding each experiment as soon as all of its runs complete,
+    with its results assigned to `experiment.results` as `experiment.run()` would.
+
+    Args:
+        experiments (list or dict): radCAD Experiments or Simulations, by key, or a list indexed by position
+        priorities (list or dict, optional): The priority of each experiment, by key, higher priorities first, by default 0
+        pool (WorkerPool, optional): The worker pool to run on, by default a new pool closed once all experiments complete,
+            or terminated if a run fails or the caller stops iterating
+        processes (int, optional): Number of worker processes of a new pool
+
+    Yields:
+        tuple: The `(key, experiment)` of each completed experiment, in order of completion
+    """
+    executables = dict(_items(experiments))
+    plan, jobs = plan_experiments(experiments, priorities)
+
+    # Experiments without runs are complete before any runs are executed
+    for key in [key for key, runs in jobs.items() if not runs]:
+        _complete(executables[key], [])
+        del jobs[key]
+        yield key, executables[key]
+
+    dependants = {}
+    for key, runs in jobs.items():
+        for index, _ in runs:
+            dependants.setdefault(index, set()).add(key)
+
+    owns_pool = pool is None
+    pool = pool or WorkerPool(processes=processes)
+    completed = queue.Queue()
+    finished = False
+    try:
+        for index, (_priority, run_args, raise_exceptions) in enumerate(plan):
+            pool.submit(
+                run_args,
+                raise_exceptions,
+                callback=lambda result, index=index: completed.put((index, result)),
+                error_callback=lambda error: completed.put((None, error)),
+            )
+
+        results = {}
+        remaining = {key: {index for index, _ in runs} for key, runs in jobs.items()}
+        while remaining:
+            index, result = completed.get()
+            if index is None:
+                raise result
+            results[index] = result
+
+            for key in [
+                key for key in jobs if key in remaining and key in dependants[index]
+            ]:
+                remaining[key].discard(index)
+                if remaining[key]:
+                    continue
+                del remaining[key]
+                _complete(
+                    executables[key],
+                    [
+                        _relabel(results[task_index], plan[task_index][1], run_args)
+                        for task_index, run_args in jobs[key]
+                    ],
+                )
+                # Release the results of runs no remaining experiment depends on
+                for task_index, _ in jobs[key]:
+                    if not dependants[task_index] & set(remaining):
+                        results.pop(task_index, None)
+                yield key, executables[key]
+        finished = True
+    finally:
+        if owns_pool and finished:
+            pool.close()
+        elif owns_pool:
+            # A run failed, or the caller stopped iterating, so the queued runs are abandoned
+            pool.terminate()
+
+
+def _items(values):
+    return list(values.items() if isinstance(values, dict) else enumerate(values))
+
+
+def _relabel(result, executed_run_args, run_args):
+    """Label the results of a run with the simulation, run, and subset of the experiment it's shared with"""
+    records, exception = result
+    labels = {
+        "simulation": run_args.simulation,
+        "subset": run_args.subset,
+        "run": run_args.run + 1,
+    }
+    executed_labels = {
+        "simulation": executed_run_args.simulation,
+        "subset": executed_run_args.subset,
+        "run": executed_run_args.run + 1,
+    }
+    if labels == executed_labels:
+        return result
+    records = [{**record, **labels} for record in flatten(flatten(records))]
+    if isinstance(exception, dict):
+        exception = {**exception, **labels, "run": run_args.run}
+    return records, exception
+
+
+def _complete(executable, results):
+    experiment = executable if isinstance(executable, Experiment) else None
+    if results:
+        executable.results, executable.exceptions = extract_exceptions(results)
+    else:
+        executable.results, executable.exceptions = [], []
+    executable._after_experiment(experiment=experiment)
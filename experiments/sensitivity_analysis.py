@@ -0,0 +1,346 @@
+"""
+Global sensitivity analysis of model outputs to System Parameters.
+
+Rather than hand-building cartesian product sweeps, which grow exponentially with the number of parameters,
+parameter samples are drawn from the ranges of a set of parameters (the "problem"),
+and evaluated in batches of radCAD parameter sweep subsets, with evaluations cached to disk for reuse across analyses.
+
+Two methods are implemented:
+* Sobol' variance-based sensitivity analysis, using the Saltelli sampling scheme and Jansen estimators,
+  reporting first-order (`S1`) and total-order (`ST`) indices
+  (see Saltelli et al. (2010), https://doi.org/10.1016/j.cpc.2009.09.018)
+* Morris elementary effects screening, reporting the mean absolute elementary effect (`mu_star`)
+  and standard deviation (`sigma`), which is cheaper and suited to screening many parameters
+  (see Campolongo et al. (2007), https://doi.org/10.1016/j.envsoft.2006.10.004)
+
+Confidence intervals are estimated by bootstrap resampling of the evaluations.
+
+A problem maps System Parameter names to `(lower, upper)` bounds:
+* for scalar parameters the sampled value is used directly, rounded for integer parameters, and
+* for array parameters (e.g. `validator_hardware_costs_per_epoch`) the sampled value scales the default array.
+
+Usage:
+```
+from experiments.sensitivity_analysis import sobol_analysis
+
+df_indices = sobol_analysis(
+    problem={
+        "BASE_REWARD_FACTOR": (32, 128),
+        "mev_per_block": (0, 0.1),
+        "slashing_events_per_1000_epochs": (0, 10),
+        "validator_hardware_costs_per_epoch": (0.5, 2),
+    },
+    outputs=["total_profit_yields", "supply_inflation"],
+    samples=512,
+)
+```
+"""
+
+import copy
+import datetime
+import logging
+import os
+from typing import Dict, List, Tuple
+
+import diskcache
+import numpy as np
+import pandas as pd
+
+from experiments.default_experiment import experiment
+from experiments.utils import fingerprint
+
+
+Problem = Dict[str, Tuple[float, float]]
+
+cache = diskcache.Cache(
+    os.path.join(os.path.dirname(__file__), ".sensitivity.cache"),
+    size_limit=2 ** 30,
+)
+"""
+Cache of model evaluations, keyed by the fingerprint of the base simulation, parameter sample, and outputs
+"""
+
+
+def sobol_analysis(
+    problem: Problem,
+    outputs: List[str],
+    samples=256,
+    simulation=None,
+    statistic="mean",
+    bootstrap_resamples=1000,
+    confidence_level=0.95,
+    seed=1,
+    **evaluate_kwargs,
+) -> pd.DataFrame:
+    """
+    Estimate first-order and total-order Sobol' indices of the outputs to each parameter of the problem.
+
+    Requires `samples * (len(problem) + 2)` model evaluations.
+
+    Returns:
+        A DataFrame with one row per output and parameter, and `S1`, `S1_conf`, `ST`, and `ST_conf` columns,
+        where `*_conf` is the half-width of the bootstrap confidence interval.
+    """
+    rng = np.random.default_rng(seed)
+    dimensions = len(problem)
+
+    # Saltelli sampling scheme: two independent sample matrices A and B,
+    # and for each parameter i a matrix AB_i of A with column i taken from B
+    a = rng.random((samples, dimensions))
+    b = rng.random((samples, dimensions))
+    ab = np.repeat(a[None, :, :], dimensions, axis=0)
+    for i in range(dimensions):
+        ab[i, :, i] = b[:, i]
+
+    unit_samples = np.concatenate([a, b, ab.reshape(-1, dimensions)])
+    y = evaluate(
+        problem,
+        unit_samples,
+        outputs,
+        simulation=simulation,
+        statistic=statistic,
+        **evaluate_kwargs,
+    )
+    y_a, y_b = y[:samples], y[samples : 2 * samples]
+    y_ab = y[2 * samples :].reshape(dimensions, samples, len(outputs))
+
+    def indices(rows):
+        variance = np.var(np.concatenate([y_a[rows], y_b[rows]]), axis=0)
+        first_order = (
+            np.mean(y_b[rows] * (y_ab[:, rows] - y_a[rows]), axis=1) / variance
+        )
+        total_order = 0.5 * np.mean((y_a[rows] - y_ab[:, rows]) ** 2, axis=1) / variance
+        return first_order, total_order
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        first_order, total_order = indices(np.arange(samples))
+        resamples = [
+            indices(rng.integers(0, samples, samples))
+            for _ in range(bootstrap_resamples)
+        ]
+    first_order_conf = _confidence_half_width(
+        [s1 for s1, _ in resamples], confidence_level
+    )
+    total_order_conf = _confidence_half_width(
+        [st for _, st in resamples], confidence_level
+    )
+
+    return _to_dataframe(
+        problem,
+        outputs,
+        {
+            "S1": first_order,
+            "S1_conf": first_order_conf,
+            "ST": total_order,
+            "ST_conf": total_order_conf,
+        },
+    )
+
+
+def morris_analysis(
+    problem: Problem,
+    outputs: List[str],
+    trajectories=20,
+    levels=4,
+    simulation=None,
+    statistic="mean",
+    bootstrap_resamples=1000,
+    confidence_level=0.95,
+    seed=1,
+    **evaluate_kwargs,
+) -> pd.DataFrame:
+    """
+    Screen the parameters of the problem using Morris elementary effects.
+
+    Requires `trajectories * (len(problem) + 1)` model evaluations.
+
+    Returns:
+        A DataFrame with one row per output and parameter, and `mu`, `mu_star`, `mu_star_conf`, and `sigma` columns,
+        with elementary effects in output units per unit of the (normalized) parameter range.
+    """
+    rng = np.random.default_rng(seed)
+    dimensions = len(problem)
+    delta = levels / (2 * (levels - 1))
+
+    # Each trajectory starts from a random point on the lower half of the level grid,
+    # and steps each parameter by delta in a random order
+    trajectory_samples = np.empty((trajectories, dimensions + 1, dimensions))
+    orders = np.empty((trajectories, dimensions), dtype=int)
+    for t in range(trajectories):
+        point = rng.integers(0, levels // 2, dimensions) / (levels - 1)
+        orders[t] = rng.permutation(dimensions)
+        trajectory_samples[t, 0] = point
+        for step, i in enumerate(orders[t]):
+            point = point.copy()
+            point[i] += delta
+            trajectory_samples[t, step + 1] = point
+
+    y = evaluate(
+        problem,
+        trajectory_samples.reshape(-1, dimensions),
+        outputs,
+        simulation=simulation,
+        statistic=statistic,
+        **evaluate_kwargs,
+    ).reshape(trajectories, dimensions + 1, len(outputs))
+
+    # Elementary effects with shape (trajectories, dimensions, outputs)
+    effects = np.empty((trajectories, dimensions, len(outputs)))
+    for t in range(trajectories):
+        effects[t, orders[t]] = np.diff(y[t], axis=0) / delta
+
+    mu_star_resamples = [
+        np.mean(np.abs(effects[rng.integers(0, trajectories, trajectories)]), axis=0)
+        for _ in range(bootstrap_resamples)
+    ]
+
+    return _to_dataframe(
+        problem,
+        outputs,
+        {
+            "mu": np.mean(effects, axis=0),
+            "mu_star": np.mean(np.abs(effects), axis=0),
+            "mu_star_conf": _confidence_half_width(mu_star_resamples, confidence_level),
+            "sigma": np.std(effects, axis=0, ddof=1),
+        },
+    )
+
+
+def evaluate(
+    problem: Problem,
+    unit_samples: np.ndarray,
+    outputs: List[str],
+    simulation=None,
+    statistic="mean",
+    batch_size=256,
+    backend=None,
+    processes=None,
+    use_cache=True,
+) -> np.ndarray:
+    """
+    Evaluate the outputs of the model for each row of the unit-scaled samples,
+    one column per parameter of the problem, in batches of `batch_size` parameter sweep subsets.
+
+    Outputs are State Variables, reduced over the timesteps of each run using the `statistic`:
+    "mean" (excluding the initial state) or "final", and averaged across runs.
+
+    Args:
+        simulation: The base radCAD Simulation, defaults to a copy of the default experiment simulation
+        backend: The radCAD execution backend, e.g. `Backend.MULTIPROCESSING` to evaluate subsets in parallel,
+            defaults to the simulation's engine backend.
+
+    Returns:
+        A Numpy array of shape `(len(unit_samples), len(outputs))`
+    """
+    simulation = copy.deepcopy(simulation or experiment.simulations[0])
+    params = simulation.model.params
+    if any(len(values) > 1 for values in params.values()):
+        raise ValueError(
+            "Sensitivity analysis requires a base simulation without a parameter sweep"
+        )
+    if statistic not in ["mean", "final"]:
+        raise ValueError(f"Invalid statistic {statistic}")
+
+    # Truncate a `datetime.now()` start date to the day, so that evaluations can be cached across sessions
+    date_start = params["date_start"][0]
+    params["date_start"] = [
+        datetime.datetime.combine(date_start.date(), datetime.time())
+    ]
+
+    samples = [_scale_sample(problem, params, row) for row in unit_samples]
+
+    base_key = fingerprint(
+        (
+            simulation.model.initial_state,
+            simulation.model.state_update_blocks,
+            {key: value for key, value in params.items() if key not in problem},
+            simulation.timesteps,
+            simulation.runs,
+            list(outputs),
+            statistic,
+        )
+    )
+    keys = [fingerprint((base_key, sample)) for sample in samples]
+
+    y = np.empty((len(samples), len(outputs)))
+    pending = []
+    for index, key in enumerate(keys):
+        cached = cache.get(key) if use_cache else None
+        if cached is None:
+            pending.append(index)
+        else:
+            y[index] = cached
+    logging.info(
+        f"Evaluating {len(pending)} of {len(samples)} samples, {len(samples) - len(pending)} cached"
+    )
+
+    simulation.engine.deepcopy = False
+    simulation.engine.drop_substeps = True
+    if backend:
+        simulation.engine.backend = backend
+    if processes:
+        simulation.engine.processes = processes
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start : start + batch_size]
+        simulation.model.params.update(
+            {key: [samples[index][key] for index in batch] for key in problem}
+        )
+        y[batch] = _run_batch(simulation, outputs, statistic, len(batch))
+        if use_cache:
+            for index in batch:
+                cache.set(keys[index], y[index])
+
+    return y
+
+
+def _run_batch(simulation, outputs, statistic, subsets) -> np.ndarray:
+    results = simulation.run()
+    failed = [e for e in simulation.exceptions if e and e.get("exception")]
+    if failed:
+        raise RuntimeError(
+            f"Model evaluation failed for {len(failed)} subsets"
+        ) from failed[0]["exception"]
+
+    df = pd.DataFrame(results, columns=["subset", "run", "timestep"] + list(outputs))
+    if statistic == "mean":
+        df = df[df.timestep > 0]
+    else:
+        df = df[df.timestep == df.timestep.max()]
+
+    y = df.groupby(["subset", "run"])[outputs].mean().groupby("subset").mean()
+    if len(y) != subsets:
+        raise RuntimeError(f"Expected {subsets} subset results, received {len(y)}")
+    return y.to_numpy()
+
+
+def _scale_sample(problem: Problem, params, unit_sample) -> dict:
+    sample = {}
+    for (key, (lower, upper)), u in zip(problem.items(), unit_sample):
+        if key not in params:
+            raise KeyError(f"Invalid System Parameter {key}")
+        value = lower + u * (upper - lower)
+        default = params[key][0]
+        if isinstance(default, np.ndarray):
+            value = default * value
+        elif isinstance(default, (int, np.integer)) and not isinstance(default, bool):
+            value = int(round(value))
+        sample[key] = value
+    return sample
+
+
+def _confidence_half_width(resamples, confidence_level) -> np.ndarray:
+    alpha = (1 - confidence_level) / 2
+    lower, upper = np.nanquantile(np.array(resamples), [alpha, 1 - alpha], axis=0)
+    return (upper - lower) / 2
+
+
+def _to_dataframe(problem: Problem, outputs: List[str], columns: dict) -> pd.DataFrame:
+    # Columns have shape (parameters, outputs)
+    index = pd.MultiIndex.from_product(
+        [outputs, list(problem)], names=["output", "parameter"]
+    )
+    return pd.DataFrame(
+        {name: np.asarray(values).T.ravel() for name, values in columns.items()},
+        index=index,
+    )
@@ -0,0 +1,294 @@
+"""
+Streaming aggregation of Monte Carlo simulation results.
+
+Rather than collecting the results of every run into a single DataFrame and grouping by timestep,
+runs are aggregated as they complete into per-timestep running statistics for a set of metrics:
+* the mean and variance, using Welford's online algorithm, and
+* approximate quantiles, using the P² (piecewise-parabolic) algorithm of Jain & Chlamtac (1985),
+  see https://www.cse.wustl.edu/~jain/papers/ftp/psqr.pdf
+
+Memory usage is O(timesteps) per metric and quantile, independent of the number of runs,
+so that large Monte Carlo studies only return summary bands.
+
+Usage:
+```
+from experiments.streaming import StreamingAggregator, run_streaming
+
+aggregator = StreamingAggregator(metrics=["eth_price", "supply_inflation"])
+run_streaming(experiment, aggregator)
+df_bands = aggregator.summary()
+```
+"""
+
+import logging
+from typing import Callable, Dict, List, Union
+
+import numpy as np
+import pandas as pd
+import radcad.core as core
+from radcad import Backend, Experiment
+
+
+class RunningMoments:
+    """Per-timestep running count, mean, and variance using Welford's online algorithm"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = None
+        self._m2 = None
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        if self.mean is None:
+            self.mean = np.zeros_like(values)
+            self._m2 = np.zeros_like(values)
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (values - self.mean)
+
+    @property
+    def variance(self) -> np.ndarray:
+        """The sample variance, NaN for less than two observations"""
+        if self.count < 2:
+            return np.full_like(self.mean, np.nan)
+        return self._m2 / (self.count - 1)
+
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+
+class P2Quantile:
+    """
+    Per-timestep approximate quantile using the P² algorithm,
+    vectorized across timesteps: each observation is an array with one value per timestep.
+
+    Five markers are maintained per timestep: the minimum, the maximum, the estimated quantile,
+    and two intermediate markers, with heights adjusted using piecewise-parabolic interpolation.
+    """
+
+    def __init__(self, p: float):
+        if not 0 < p < 1:
+            raise ValueError(f"Quantile {p} must be between 0 and 1")
+        self.p = p
+        self.count = 0
+        self._initial = []
+        # Marker heights and positions, with shape (5, timesteps)
+        self._heights = None
+        self._positions = None
+        self._desired_positions = None
+        self._increments = np.array([0, p / 2, p, (1 + p) / 2, 1])
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        self.count += 1
+
+        if self._heights is None:
+            self._initial.append(values)
+            if self.count == 5:
+                self._heights = np.sort(np.array(self._initial), axis=0)
+                self._positions = np.tile(
+                    np.arange(5, dtype=float)[:, None], values.shape
+                )
+                self._desired_positions = np.tile(
+                    (4 * self._increments)[:, None], values.shape
+                )
+                self._initial = []
+            return
+
+        q, n = self._heights, self._positions
+
+        # Update the extreme markers, and find the cell k such that q[k] <= x < q[k + 1]
+        q[0] = np.minimum(q[0], values)
+        q[4] = np.maximum(q[4], values)
+        k = np.clip((values[None, :] >= q[1:4]).sum(axis=0), 0, 3)
+
+        # Increment the positions of markers above the cell
+        n += np.arange(5)[:, None] > k[None, :]
+        self._desired_positions += self._increments[:, None]
+
+        # Adjust the heights of the three middle markers if they're off their desired positions
+        for i in (1, 2, 3):
+            d = self._desired_positions[i] - n[i]
+            adjust = ((d >= 1) & (n[i + 1] - n[i] > 1)) | (
+                (d <= -1) & (n[i - 1] - n[i] < -1)
+            )
+            if not adjust.any():
+                continue
+            d = np.sign(d) * adjust
+
+            # Markers that aren't adjusted have d == 0, and are masked out below
+            with np.errstate(divide="ignore", invalid="ignore"):
+                parabolic = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+                )
+                neighbour = i + d.astype(int)
+                columns = np.arange(q.shape[1])
+                linear = q[i] + d * (q[neighbour, columns] - q[i]) / (
+                    n[neighbour, columns] - n[i]
+                )
+            in_bounds = (q[i - 1] < parabolic) & (parabolic < q[i + 1])
+
+            q[i] = np.where(adjust, np.where(in_bounds, parabolic, linear), q[i])
+            n[i] += d
+
+    @property
+    def value(self) -> np.ndarray:
+        """The current quantile estimate, exact for less than five observations"""
+        if self._heights is None:
+            if not self._initial:
+                return None
+            return np.quantile(np.array(self._initial), self.p, axis=0)
+        return self._heights[2].copy()
+
+
+class StreamingAggregator:
+    """
+    Aggregates simulation runs into per-timestep summary statistics of a set of metrics,
+    grouped by simulation and subset, so that results across Monte Carlo runs are reduced as they complete.
+
+    Metrics are either State Variable names, or a mapping of metric names to
+    functions of the State Variables at each timestep, e.g. `{"eth_supply_usd": lambda s: s["eth_supply"] * s["eth_price"]}`.
+    """
+
+    def __init__(
+        self,
+        metrics: Union[List[str], Dict[str, Callable[[dict], float]]],
+        quantiles: List[float] = [0.05, 0.25, 0.5, 0.75, 0.95],
+    ):
+        if not isinstance(metrics, dict):
+            metrics = {metric: None for metric in metrics}
+        self.metrics = metrics
+        self.quantiles = list(quantiles)
+        self.groups = {}
+        self.timesteps = {}
+        self.runs = 0
+        self.failed_runs = 0
+
+    def update(self, run_result: list, exception=None):
+        """
+        Aggregate the results of a single run, as returned by radCAD's `core.single_run()`:
+        a list of substeps per timestep, of which the last substep is used.
+        Runs that failed are counted but not aggregated, as their partial results would skew the bands.
+        """
+        if exception or not run_result:
+            self.failed_runs += 1
+            return
+
+        states = [substeps[-1] for substeps in run_result]
+        key = (states[0]["simulation"], states[0]["subset"])
+        timesteps = np.array([state["timestep"] for state in states])
+
+        if key not in self.groups:
+            self.timesteps[key] = timesteps
+            self.groups[key] = {
+                metric: (RunningMoments(), [P2Quantile(p) for p in self.quantiles])
+                for metric in self.metrics
+            }
+        elif not np.array_equal(self.timesteps[key], timesteps):
+            raise ValueError(
+                f"Run timesteps don't match previous runs of simulation {key[0]} / subset {key[1]}"
+            )
+
+        for metric, function in self.metrics.items():
+            values = np.array(
+                [function(state) if function else state[metric] for state in states],
+                dtype=float,
+            )
+            moments, quantiles = self.groups[key][metric]
+            moments.update(values)
+            for quantile in quantiles:
+                quantile.update(values)
+
+        self.runs += 1
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Return a DataFrame of summary statistics with one row per simulation, subset, and timestep,
+        and `{metric}_mean`, `{metric}_std`, and `{metric}_q{percentile}` (e.g. `eth_price_q5`) columns.
+        """
+        frames = []
+        for (simulation, subset), group in self.groups.items():
+            df = pd.DataFrame({"timestep": self.timesteps[(simulation, subset)]})
+            df.insert(0, "subset", subset)
+            df.insert(0, "simulation", simulation)
+            df["runs"] = next(iter(group.values()))[0].count
+            for metric, (moments, quantiles) in group.items():
+                df[f"{metric}_mean"] = moments.mean
+                df[f"{metric}_std"] = moments.std
+                for quantile in quantiles:
+                    df[f"{metric}_q{quantile.p * 100:g}"] = quantile.value
+            frames.append(df)
+        return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def run_streaming(executable, aggregator: StreamingAggregator) -> StreamingAggregator:
+    """
+    Run a radCAD Experiment or Simulation, aggregating each run as it completes
+    rather than collecting the full results.
+
+    The executable's engine configuration is used: with the single-process backend runs are executed
+    sequentially, otherwise using an unordered pathos process pool so that runs are aggregated
+    in order of completion. Substeps are always dropped. `executable.results` is left empty,
+    and `executable.exceptions` contains the exceptions of failed runs only.
+    """
+    engine = executable.engine
+    engine.executable = executable
+    simulations = (
+        executable.simulations if isinstance(executable, Experiment) else [executable]
+    )
+    configs = [
+        (
+            simulation.model.initial_state,
+            simulation.model.state_update_blocks,
+            simulation.model.params,
+            simulation.timesteps,
+            simulation.runs,
+        )
+        for simulation in simulations
+    ]
+
+    experiment = executable if isinstance(executable, Experiment) else None
+    executable._before_experiment(experiment=experiment)
+
+    run_args = (
+        (args._replace(drop_substeps=True), engine.raise_exceptions)
+        for args in engine._run_stream(configs)
+    )
+
+    if engine.backend == Backend.SINGLE_PROCESS:
+        exceptions = _aggregate(aggregator, map(core._single_run_wrapper, run_args))
+    else:
+        from pathos.multiprocessing import ProcessPool
+
+        pool = ProcessPool(engine.processes)
+        try:
+            exceptions = _aggregate(
+                aggregator, pool.uimap(core._single_run_wrapper, run_args)
+            )
+        finally:
+            pool.close()
+            pool.join()
+            pool.clear()
+
+    executable.results, executable.exceptions = [], exceptions
+    executable._after_experiment(experiment=experiment)
+
+    logging.info(f"Aggregated {aggregator.runs} runs, {aggregator.failed_runs} failed")
+    return aggregator
+
+
+def _aggregate(aggregator, results):
+    exceptions = []
+    for run_result, exception in results:
+        if isinstance(exception, dict) and exception["exception"]:
+            exceptions.append(exception)
+            aggregator.update(run_result, exception["exception"])
+        elif isinstance(exception, Exception):
+            exceptions.append({"exception": exception})
+            aggregator.update(run_result, exception)
+        else:
+            aggregator.update(run_result)
+    return exceptions
@@ -0,0 +1,322 @@
+"""
+Surrogate model of validator yields, for instant queries without running a simulation.
+
+The model is evaluated over a grid of ETH price, ETH staked, and optionally other System Parameter values,
+using the same single-timestep configuration as the `eth_price_eth_staked_grid_analysis` experiment template
+(yields over the default simulation period), and the yields are interpolated (multilinear) between grid points.
+
+The surrogate's error is measured against the model at randomly selected grid cell midpoints,
+the points furthest from the fitted grid, and exposed as `YieldSurrogate.error`.
+
+Surrogates are persisted to disk together with a fingerprint of the model inputs,
+and `get_surrogate()` automatically refits when the model or its System Parameters change.
+
+Usage:
+```
+from experiments.surrogate import get_surrogate
+
+surrogate = get_surrogate()
+surrogate.predict(eth_price=2000, eth_staked=10e6)["total_profit_yields"]
+surrogate.predict(eth_price=[1000, 2000], eth_staked=[5e6, 10e6])  # returns a DataFrame
+```
+"""
+
+import bisect
+import copy
+import datetime
+import itertools
+import logging
+import os
+import pickle
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from experiments.default_experiment import experiment, TIMESTEPS, DELTA_TIME
+from experiments.utils import fingerprint
+from model.state_variables import eth_staked, eth_supply, eth_price_max
+from model.system_parameters import validator_environments
+
+default_axes = {
+    # ETH price range from 100 USD/ETH to the maximum over the last 12 months
+    "eth_price": np.linspace(start=100, stop=eth_price_max, num=20),
+    # ETH staked range from the genesis requirement to the maximum of 2 x ETH staked and 30% of total ETH supply,
+    # geometrically spaced as yields are steepest at low ETH staked
+    "eth_staked": np.geomspace(
+        start=524_288, stop=max(eth_staked * 2, eth_supply * 0.3), num=20
+    ),
+}
+
+default_outputs = (
+    ["total_revenue_yields", "total_profit_yields"]
+    + [validator.type + "_revenue_yields" for validator in validator_environments]
+    + [validator.type + "_profit_yields" for validator in validator_environments]
+)
+
+default_path = os.path.join(os.path.dirname(__file__), "outputs", "surrogate.pickle")
+
+
+class YieldSurrogate:
+    """
+    A multilinear interpolator of model outputs over a regular (not necessarily uniform) grid.
+
+    Attributes:
+        axes: The grid axes, mapping the query variable names to their sorted grid values
+        outputs: The output names
+        values: The model outputs at the grid points, with shape `(*grid shape, len(outputs))`
+        error: The maximum absolute and root-mean-square error per output at the validation points
+        fingerprint: The fingerprint of the model inputs the surrogate was fitted to
+    """
+
+    def __init__(self, axes, outputs, values, error=None, fingerprint=None):
+        self.axes = {name: np.asarray(grid, dtype=float) for name, grid in axes.items()}
+        self.outputs = list(outputs)
+        self.values = np.asarray(values, dtype=float)
+        self.error = error
+        self.fingerprint = fingerprint
+
+    def predict(self, bounds_error=True, **query):
+        """
+        Query the surrogate at a point, returning a dictionary of outputs,
+        or at a batch of points (array-like query values), returning a DataFrame of outputs.
+
+        Query values outside of the grid raise a `ValueError` if `bounds_error` is set,
+        otherwise they are clipped to the grid.
+        """
+        missing = set(self.axes) - set(query)
+        if missing:
+            raise KeyError(f"Missing query variables {missing}")
+
+        batch = any(np.ndim(query[name]) > 0 for name in self.axes)
+        if not batch:
+            return dict(zip(self.outputs, self._interpolate_point(query, bounds_error)))
+
+        points = np.broadcast_arrays(
+            *[np.atleast_1d(np.asarray(query[name], dtype=float)) for name in self.axes]
+        )
+        return pd.DataFrame(
+            self._interpolate(points, bounds_error), columns=self.outputs
+        )
+
+    def _interpolate_point(self, query, bounds_error) -> np.ndarray:
+        # A scalar version of `_interpolate()`, avoiding the overhead of vectorization for point queries
+        cells = []
+        for name, grid in self.axes.items():
+            value = float(query[name])
+            if bounds_error and not grid[0] <= value <= grid[-1]:
+                raise ValueError(
+                    f"Query {name} outside of surrogate grid [{grid[0]}, {grid[-1]}]"
+                )
+            value = min(max(value, grid[0]), grid[-1])
+            index = min(max(bisect.bisect_right(grid, value) - 1, 0), len(grid) - 2)
+            weight = (value - grid[index]) / (grid[index + 1] - grid[index])
+            cells.append((index, weight))
+
+        result = 0
+        for corner in itertools.product([0, 1], repeat=len(cells)):
+            weight = 1.0
+            for offset, (_, w) in zip(corner, cells):
+                weight *= w if offset else 1 - w
+            if weight:
+                index = tuple(i + offset for offset, (i, _) in zip(corner, cells))
+                result = result + weight * self.values[index]
+        return result
+
+    def _interpolate(self, points, bounds_error) -> np.ndarray:
+        # For each axis, find the lower grid index and fractional position within the cell
+        indices, weights = [], []
+        for (name, grid), values in zip(self.axes.items(), points):
+            if bounds_error and (np.any(values < grid[0]) or np.any(values > grid[-1])):
+                raise ValueError(
+                    f"Query {name} outside of surrogate grid [{grid[0]}, {grid[-1]}]"
+                )
+            values = np.clip(values, grid[0], grid[-1])
+            index = np.clip(
+                np.searchsorted(grid, values, side="right") - 1, 0, len(grid) - 2
+            )
+            indices.append(index)
+            weights.append((values - grid[index]) / (grid[index + 1] - grid[index]))
+
+        # Sum the weighted values at the 2^d corners of each cell
+        result = np.zeros((len(points[0]), len(self.outputs)))
+        for corner in itertools.product([0, 1], repeat=len(self.axes)):
+            weight = np.ones(len(points[0]))
+            for offset, w in zip(corner, weights):
+                weight = weight * (w if offset else 1 - w)
+            index = tuple(i + offset for i, offset in zip(indices, corner))
+            result += weight[:, None] * self.values[index]
+        return result
+
+    def save(self, path=default_path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            pickle.dump(self.__dict__, file)
+
+    @classmethod
+    def load(cls, path=default_path):
+        with open(path, "rb") as file:
+            return cls(**pickle.load(file))
+
+
+def get_surrogate(
+    axes: Dict[str, np.ndarray] = default_axes,
+    outputs: List[str] = default_outputs,
+    simulation=None,
+    path=default_path,
+    **fit_kwargs,
+) -> YieldSurrogate:
+    """
+    Load the persisted surrogate, refitting and persisting it if it doesn't exist,
+    or if the model inputs, grid axes, or outputs have changed since it was fitted.
+    """
+    simulation = get_grid_simulation(simulation)
+    current_fingerprint = _fingerprint(simulation, axes, outputs)
+
+    if os.path.exists(path):
+        surrogate = YieldSurrogate.load(path)
+        if surrogate.fingerprint == current_fingerprint:
+            return surrogate
+        logging.info("Model inputs changed since surrogate was fitted, refitting")
+
+    surrogate = fit_surrogate(axes, outputs, simulation=simulation, **fit_kwargs)
+    surrogate.save(path)
+    return surrogate
+
+
+def fit_surrogate(
+    axes: Dict[str, np.ndarray] = default_axes,
+    outputs: List[str] = default_outputs,
+    simulation=None,
+    validation_points=50,
+    seed=1,
+) -> YieldSurrogate:
+    """
+    Fit a surrogate by simulating every point of the grid, and measure its error
+    at `validation_points` randomly selected grid cell midpoints.
+
+    Axes are "eth_price", "eth_staked", or the names of scalar System Parameters.
+    """
+    simulation = get_grid_simulation(simulation)
+    if (
+        "eth_staked" not in axes
+        and simulation.model.params["eth_staked_process"][0](0, 0) is None
+    ):
+        raise ValueError("Surrogate requires an eth_staked axis or eth_staked_process")
+    axes = {name: np.sort(np.asarray(grid, dtype=float)) for name, grid in axes.items()}
+    if any(len(grid) < 2 for grid in axes.values()):
+        raise ValueError("Surrogate grid axes require at least two values")
+
+    grid_points = np.array(list(itertools.product(*axes.values())))
+    logging.info(f"Fitting surrogate over {len(grid_points)} grid points")
+    values = simulate(simulation, list(axes), grid_points, outputs)
+    values = values.reshape(*[len(grid) for grid in axes.values()], len(outputs))
+
+    surrogate = YieldSurrogate(
+        axes, outputs, values, fingerprint=_fingerprint(simulation, axes, outputs)
+    )
+
+    # Validate at cell midpoints, where the interpolation error is expected to be largest
+    rng = np.random.default_rng(seed)
+    cells = [
+        rng.integers(0, len(grid) - 1, validation_points) for grid in axes.values()
+    ]
+    midpoints = np.stack(
+        [(grid[cell] + grid[cell + 1]) / 2 for grid, cell in zip(axes.values(), cells)],
+        axis=1,
+    )
+    expected = simulate(simulation, list(axes), midpoints, outputs)
+    predicted = surrogate._interpolate(list(midpoints.T), bounds_error=True)
+    errors = predicted - expected
+    surrogate.error = pd.DataFrame(
+        {
+            "max_abs_error": np.max(np.abs(errors), axis=0),
+            "rmse": np.sqrt(np.mean(errors ** 2, axis=0)),
+        },
+        index=outputs,
+    )
+
+    return surrogate
+
+
+def simulate(simulation, names, points, outputs, batch_size=1024) -> np.ndarray:
+    """
+    Simulate the model outputs at each point, with one value per name,
+    as parameter sweep subsets of a single run, returning an array of shape `(len(points), len(outputs))`.
+    """
+    simulation = copy.deepcopy(simulation)
+    simulation.runs = 1
+    simulation.engine.deepcopy = False
+    simulation.engine.drop_substeps = True
+
+    result = np.empty((len(points), len(outputs)))
+    for start in range(0, len(points), batch_size):
+        batch = points[start : start + batch_size]
+        simulation.model.params.update(
+            {
+                _parameter(name): [
+                    _parameter_value(name, value) for value in batch[:, i]
+                ]
+                for i, name in enumerate(names)
+            }
+        )
+        df = pd.DataFrame(simulation.run())
+        df = df[df.timestep == df.timestep.max()].sort_values("subset")
+        revenue_yields = np.stack(df.validator_revenue_yields)
+        profit_yields = np.stack(df.validator_profit_yields)
+        for index, validator in enumerate(validator_environments):
+            df[validator.type + "_revenue_yields"] = revenue_yields[:, index]
+            df[validator.type + "_profit_yields"] = profit_yields[:, index]
+        result[start : start + len(batch)] = df[outputs].to_numpy()
+    return result
+
+
+def _parameter(name):
+    return name + "_process" if name in ["eth_price", "eth_staked"] else name
+
+
+def _parameter_value(name, value):
+    if name in ["eth_price", "eth_staked"]:
+        return lambda _run, _timestep, value=value: value
+    return value
+
+
+def get_grid_simulation(simulation=None):
+    """
+    Get a copy of the simulation used to evaluate grid points, by default the default experiment simulation
+    with a single timestep over the default simulation period, as in the `eth_price_eth_staked_grid_analysis` template.
+    """
+    if simulation is None:
+        simulation = copy.deepcopy(experiment.simulations[0])
+        # Run single timestep, set unit of time to multiple epochs
+        simulation.timesteps = 1
+        simulation.model.params.update({"dt": [TIMESTEPS * DELTA_TIME]})
+    else:
+        simulation = copy.deepcopy(simulation)
+    params = simulation.model.params
+
+    # Truncate a `datetime.now()` start date to the day, so that the fingerprint is stable across sessions
+    date_start = params["date_start"][0]
+    params["date_start"] = [
+        datetime.datetime.combine(date_start.date(), datetime.time())
+    ]
+
+    return simulation
+
+
+def _fingerprint(simulation, axes, outputs):
+    excluded = [_parameter(name) for name in axes]
+    return fingerprint(
+        (
+            simulation.model.initial_state,
+            simulation.model.state_update_blocks,
+            {
+                key: value
+                for key, value in simulation.model.params.items()
+                if key not in excluded
+            },
+            simulation.timesteps,
+            {name: np.asarray(grid, dtype=float) for name, grid in axes.items()},
+            list(outputs),
+        )
+    )
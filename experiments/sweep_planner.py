@@ -0,0 +1,359 @@
+"""
+Sweep planning: deduplication of parameter sweep subsets that share identical upstream trajectories.
+
+In a cartesian product sweep of e.g. validator cost parameters crossed with issuance parameters,
+the network issuance trajectory doesn't depend on validator costs, yet would be re-simulated once per cost value.
+
+The planner statically analyses the model to determine which System Parameters and State Variables each
+State Update Block reads (see `get_block_dependencies()`), and from that the System Parameters each State Variable
+depends on, directly or through other State Variables across timesteps. Swept parameters that only affect
+"downstream" State Update Blocks (e.g. validator costs and yields) are "fanned out":
+* subsets sharing identical values for all other parameters are grouped, and each group is simulated once, and
+* for each subset of the group, only the downstream blocks are recomputed, from the group's upstream trajectory.
+
+The result is the same full set of subsets, in the same order, as running the simulation directly.
+
+The static analysis is conservative: it collects every string constant referenced by Policy and State Update Functions,
+and by the model functions, modules, and closures they reference, so that a false dependency may reduce the
+savings, but never change the results.
+
+Usage:
+```
+from experiments.sweep_planner import run_sweep
+
+df = pd.DataFrame(run_sweep(simulation))
+```
+"""
+
+import copy
+import functools
+import inspect
+import logging
+import types
+from typing import Dict, List, Set
+
+import radcad.core as core
+from radcad.core import generate_parameter_sweep
+
+from experiments.utils import fingerprint
+
+
+def get_block_dependencies(state_update_blocks, params, initial_state) -> List[dict]:
+    """
+    Get the System Parameters and State Variables read, and the State Variables written, by each State Update Block.
+
+    Returns:
+        A list with a `{"params": set, "reads": set, "writes": set}` dictionary per block
+    """
+    dependencies = []
+    for block in state_update_blocks:
+        functions = list(block["policies"].values()) + list(block["variables"].values())
+        keys = set().union(
+            *[_referenced_keys(function, set()) for function in functions]
+        )
+        dependencies.append(
+            {
+                "params": keys & set(params),
+                "reads": keys & set(initial_state),
+                "writes": set(block["variables"]),
+            }
+        )
+    return dependencies
+
+
+def get_state_variable_dependencies(
+    state_update_blocks, params, initial_state
+) -> Dict[str, Set[str]]:
+    """
+    Get the System Parameters each State Variable depends on, either directly,
+    or indirectly through the State Variables it reads, in the same or previous timesteps.
+    """
+    block_dependencies = get_block_dependencies(
+        state_update_blocks, params, initial_state
+    )
+    dependencies = {key: set() for key in initial_state}
+
+    # Propagate dependencies to a fixed point, as State Variables read values from previous timesteps
+    changed = True
+    while changed:
+        changed = False
+        for block in block_dependencies:
+            block_params = set(block["params"]).union(
+                *[dependencies[key] for key in block["reads"]]
+            )
+            for key in block["writes"]:
+                if not block_params <= dependencies[key]:
+                    dependencies[key] |= block_params
+                    changed = True
+    return dependencies
+
+
+class SweepPlan:
+    """
+    A plan for the execution of a simulation parameter sweep.
+
+    Attributes:
+        fanout_params: The swept System Parameters whose subsets are fanned out from a shared upstream simulation
+        downstream_blocks: The indices of the State Update Blocks recomputed for each fanned out subset
+        groups: The subset indices of each group, simulated once per group
+    """
+
+    def __init__(self, simulation, fanout_params, downstream_blocks, groups):
+        self.simulation = simulation
+        self.fanout_params = fanout_params
+        self.downstream_blocks = downstream_blocks
+        self.groups = groups
+
+    def __repr__(self):
+        return (
+            f"SweepPlan({sum(len(group) for group in self.groups)} subsets in {len(self.groups)} groups, "
+            f"fanning out {sorted(self.fanout_params)} over blocks {self.downstream_blocks})"
+        )
+
+
+def plan_sweep(simulation) -> SweepPlan:
+    """
+    Plan the execution of a simulation's parameter sweep, greedily selecting the swept parameters to fan out
+    that minimise the estimated cost: the number of State Update Block executions per run and timestep.
+    """
+    model = simulation.model
+    blocks = model.state_update_blocks
+    subsets = generate_parameter_sweep(model.params) or [model.params]
+    swept_params = [
+        key
+        for key in model.params
+        if len({fingerprint(subset[key]) for subset in subsets}) > 1
+    ]
+
+    block_dependencies = get_block_dependencies(
+        blocks, model.params, model.initial_state
+    )
+    state_dependencies = get_state_variable_dependencies(
+        blocks, model.params, model.initial_state
+    )
+
+    def plan(fanout_params):
+        downstream_blocks = _get_downstream_blocks(
+            block_dependencies, state_dependencies, fanout_params
+        )
+        groups = _group_subsets(subsets, fanout_params)
+        cost = len(groups) * (len(blocks) - len(downstream_blocks)) + len(
+            subsets
+        ) * len(downstream_blocks)
+        return cost, SweepPlan(simulation, fanout_params, downstream_blocks, groups)
+
+    # Greedily add the swept parameter that most reduces the cost, until no parameter does
+    cost, best = plan(set())
+    while True:
+        candidates = [
+            plan(best.fanout_params | {key})
+            for key in swept_params
+            if key not in best.fanout_params
+        ]
+        candidate_cost, candidate = min(
+            candidates, key=lambda candidate: candidate[0], default=(cost, best)
+        )
+        if candidate_cost >= cost:
+            break
+        cost, best = candidate_cost, candidate
+
+    logging.info(f"Planned {best}")
+    return best
+
+
+def run_sweep(simulation, plan: SweepPlan = None) -> list:
+    """
+    Run a simulation's parameter sweep according to the sweep plan (by default `plan_sweep(simulation)`),
+    returning the same results as `simulation.run()`, which are also assigned to `simulation.results`.
+    """
+    plan = plan or plan_sweep(simulation)
+    if not plan.fanout_params:
+        return simulation.run()
+
+    model = simulation.model
+    subsets = generate_parameter_sweep(model.params) or [model.params]
+    drop_substeps = simulation.engine.drop_substeps
+
+    # Simulate the first subset of each group, with all substeps for the downstream recomputation
+    group_simulation = copy.deepcopy(simulation)
+    group_simulation.model.params = {
+        key: [subsets[group[0]][key] for group in plan.groups] for key in model.params
+    }
+    group_simulation.engine.drop_substeps = False
+    group_results = group_simulation.run()
+
+    trajectories = {}
+    for record in group_results:
+        trajectories.setdefault((record["run"], record["subset"]), []).append(record)
+
+    results = []
+    subset_groups = {
+        subset: group_index
+        for group_index, group in enumerate(plan.groups)
+        for subset in group
+    }
+    for run in range(1, simulation.runs + 1):
+        for subset_index, subset in enumerate(subsets):
+            results.extend(
+                _fan_out(
+                    trajectories[(run, subset_groups[subset_index])],
+                    subset_index,
+                    subset,
+                    model,
+                    plan.downstream_blocks,
+                    drop_substeps,
+                )
+            )
+
+    simulation.results = results
+    simulation.exceptions = group_simulation.exceptions
+    return results
+
+
+def _fan_out(trajectory, subset_index, params, model, downstream_blocks, drop_substeps):
+    """Recompute the downstream State Variables of a subset from its group's upstream trajectory"""
+    blocks = model.state_update_blocks
+    current = {
+        key: trajectory[0][key]
+        for index in downstream_blocks
+        for key in blocks[index]["variables"]
+    }
+    history = [[{**trajectory[0], "subset": subset_index}]]
+
+    # Trajectory records after the initial state are ordered by timestep and substep
+    substeps = len(blocks)
+    for timestep in range(len(trajectory) // substeps):
+        group_substeps = trajectory[
+            1 + timestep * substeps : 1 + (timestep + 1) * substeps
+        ]
+        records = []
+        for index, block in enumerate(blocks):
+            if index in downstream_blocks:
+                # The subset's state after the previous substep, or the previous timestep
+                substate = records[-1] if records else history[-1][-1]
+                signals = core.reduce_signals(
+                    params, index, history, substate, block, False
+                )
+                current.update(
+                    core._update_state(
+                        model.initial_state,
+                        params,
+                        index,
+                        history,
+                        substate,
+                        signals,
+                        item,
+                    )
+                    for item in block["variables"].items()
+                )
+            records.append({**group_substeps[index], **current, "subset": subset_index})
+        history.append(records if not drop_substeps else records[-1:])
+
+    return [record for records in history for record in records]
+
+
+def _get_downstream_blocks(
+    block_dependencies, state_dependencies, fanout_params
+) -> List[int]:
+    """
+    Get the indices of the blocks that must be recomputed when the fanned out parameters change:
+    blocks reading the parameters or writing State Variables that depend on them,
+    closed over blocks reading or writing any State Variable written by a downstream block.
+    """
+    affected = {
+        key
+        for key, dependencies in state_dependencies.items()
+        if dependencies & fanout_params
+    }
+    downstream = {
+        index
+        for index, block in enumerate(block_dependencies)
+        if block["params"] & fanout_params or block["writes"] & affected
+    }
+
+    changed = True
+    while changed:
+        variables = set().union(
+            *[block_dependencies[index]["writes"] for index in downstream]
+        )
+        closure = {
+            index
+            for index, block in enumerate(block_dependencies)
+            if (block["reads"] | block["writes"]) & variables
+        }
+        changed = not closure <= downstream
+        downstream |= closure
+    return sorted(downstream)
+
+
+def _group_subsets(subsets, fanout_params) -> List[List[int]]:
+    groups = {}
+    for index, subset in enumerate(subsets):
+        key = fingerprint(
+            {key: value for key, value in subset.items() if key not in fanout_params}
+        )
+        groups.setdefault(key, []).append(index)
+    return list(groups.values())
+
+
+def _referenced_keys(function, seen) -> Set[str]:
+    """Collect the string constants referenced by a function, and the model functions it references"""
+    if id(function) in seen:
+        return set()
+    seen.add(id(function))
+
+    if isinstance(function, functools.partial):
+        keys = {value for value in function.args if isinstance(value, str)}
+        keys |= {
+            value for value in function.keywords.values() if isinstance(value, str)
+        }
+        return keys | _referenced_keys(function.func, seen)
+    if not isinstance(function, types.FunctionType):
+        return set()
+
+    keys = set()
+    code_objects = [function.__code__]
+    names = set()
+    while code_objects:
+        code = code_objects.pop()
+        names |= set(code.co_names)
+        for const in code.co_consts:
+            if isinstance(const, str):
+                keys.add(const)
+            elif isinstance(const, types.CodeType):
+                code_objects.append(const)
+
+    # Closure variables, e.g. the keys and wrapped function of decorators
+    for cell in function.__closure__ or ():
+        try:
+            value = cell.cell_contents
+        except ValueError:
+            continue
+        keys |= _referenced_keys_of_value(value, seen)
+
+    # Referenced model functions and modules
+    for name in names:
+        value = function.__globals__.get(name)
+        if isinstance(value, types.ModuleType) and _is_model_module(value):
+            for attribute in names:
+                keys |= _referenced_keys_of_value(getattr(value, attribute, None), seen)
+        else:
+            keys |= _referenced_keys_of_value(value, seen)
+    return keys
+
+
+def _referenced_keys_of_value(value, seen) -> Set[str]:
+    if isinstance(value, str):
+        return {value}
+    if isinstance(value, (list, tuple, set)):
+        return {item for item in value if isinstance(item, str)}
+    if isinstance(value, functools.partial) or (
+        isinstance(value, types.FunctionType)
+        and _is_model_module(inspect.getmodule(value))
+    ):
+        return _referenced_keys(value, seen)
+    return set()
+
+
+def _is_model_module(module):
+    return module is not None and module.__name__.split(".")[0] == "model"
@@ -2,6 +2,9 @@
 # ETH Price / ETH Staked Grid Analysis
 
 Creates a cartesian product grid of ETH price and ETH staked processes, for phase-space analyses.
+
+For an adaptive mesh, refined around the zero-profit contour, see `experiments.adaptive_grid`
+using the `adaptive_bounds` of this template.
 """
 
 import numpy as np
@@ -15,6 +18,13 @@ from experiments.default_experiment import experiment, TIMESTEPS, DELTA_TIME
 # Make a copy of the default experiment to avoid mutation
 experiment = copy.deepcopy(experiment)
 
+# ETH price range from 100 USD/ETH to the maximum over the last 12 months,
+# and ETH staked range from current ETH staked to minimum of 2 x ETH staked and 30% of total ETH supply
+adaptive_bounds = {
+    "eth_price": (100, eth_price_max),
+    "eth_staked": (eth_staked, min(eth_staked * 2, eth_supply * 0.3)),
+}
+
 sweep = generate_cartesian_product_parameter_sweep({
     # ETH price range from 100 USD/ETH to the maximum over the last 12 months
     "eth_price_samples": np.linspace(start=100, stop=eth_price_max, num=20),
@@ -3,21 +3,31 @@
 
 Creates a cartesian product grid of ETH price and ETH staked processes, for phase-space analyses,
 starting from the ETH staked genesis requirement of 524,288 ETH staked.
+
+For an adaptive mesh, refined around the zero-profit contour, see `experiments.adaptive_grid`
+using the `adaptive_bounds` of this template.
 """
 
 import numpy as np
 import copy
+from radcad.utils import generate_cartesian_product_parameter_sweep
 
 from model.state_variables import eth_staked, eth_price_max
 from experiments.default_experiment import experiment, TIMESTEPS, DELTA_TIME
-from experiments.utils import generate_cartesian_product
 from model.types import Stage
 
 
 # Make a copy of the default experiment to avoid mutation
 experiment = copy.deepcopy(experiment)
 
-sweep = generate_cartesian_product({
+# ETH price range from 100 USD/ETH to the maximum over the last 12 months,
+# and ETH staked range from genesis requirement to current ETH staked
+adaptive_bounds = {
+    "eth_price": (100, eth_price_max),
+    "eth_staked": (524_288, eth_staked),
+}
+
+sweep = generate_cartesian_product_parameter_sweep({
     # ETH price range from 100 USD/ETH to the maximum over the last 12 months
     "eth_price_samples": np.linspace(start=100, stop=eth_price_max, num=20),
     # ETH staked range from genesis requirement to current ETH staked
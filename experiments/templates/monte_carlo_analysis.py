@@ -4,6 +4,9 @@
 Creates stochastic processes for ETH price, validator adoption, and validator uptime processes,
 sampled by run (for new seed) and timestep (for new sample),
 and runs a Monte Carlo analysis of 5 runs.
+
+For large numbers of runs, use `experiments.streaming.run_streaming()` to aggregate
+per-timestep mean, variance, and quantile bands as runs complete, rather than collecting all results.
 """
 
 import copy
@@ -1,8 +1,13 @@
 import itertools
 import types as types
 import collections
+import dataclasses
+import enum
+import functools
+import hashlib
 import inspect
 import numpy as np
+import pandas as pd
 
 from IPython.display import Code
 from pygments.formatters import HtmlFormatter
@@ -61,3 +66,106 @@ def display_code(code):
     display(HTML(f'<style>{formatter.get_style_defs(".highlight")}</style>'))
 
     return Code(inspect.getsource(code), language='python')
+
+
+def fingerprint(value) -> str:
+    """Create a deterministic content hash of simulation inputs, e.g. System Parameters or initial state
+
+    Unlike `get_simulation_hash()`, which ignores unhashable values and only considers function bytecode,
+    the fingerprint includes the contents of Numpy arrays and Pandas objects,
+    and for functions (including lambdas and `functools.partial` objects),
+    their bytecode, constants, default arguments, closure variables, and referenced global variables,
+    so that e.g. a process sampling from a global array changes fingerprint when the array does.
+
+    The fingerprint is stable across Python processes, and so can be used as a persistent cache key.
+    """
+    hasher = hashlib.sha256()
+    _update_fingerprint(hasher, value, {})
+    return hasher.hexdigest()
+
+
+def _update_fingerprint(hasher, value, seen):
+    update = lambda tag, data=b"": hasher.update(tag.encode() + b":" + data + b";")
+
+    if value is None or isinstance(value, (bool, int, float, complex, str, bytes, enum.Enum)):
+        update(type(value).__name__, repr(value).encode())
+        return
+    if isinstance(value, types.ModuleType):
+        update("module", value.__name__.encode())
+        return
+
+    # Guard against cycles, e.g. recursive functions or self-referencing containers.
+    # Visited objects are kept alive until the fingerprint is complete, as temporary objects
+    # (e.g. closure cell contents, referenced globals) would otherwise be freed and their IDs reused.
+    if id(value) in seen:
+        update("cycle", type(value).__qualname__.encode())
+        return
+    seen[id(value)] = value
+
+    if isinstance(value, np.generic):
+        update("numpy", repr(value).encode())
+    elif isinstance(value, np.ndarray):
+        if value.dtype == object:
+            update("ndarray", repr(value.shape).encode())
+            for item in value.flat:
+                _update_fingerprint(hasher, item, seen)
+        else:
+            update("ndarray", f"{value.dtype.str}{value.shape}".encode())
+            hasher.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        update(type(value).__name__, repr(getattr(value, "columns", value.name)).encode())
+        hasher.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, (list, tuple)):
+        update(type(value).__name__, str(len(value)).encode())
+        for item in value:
+            _update_fingerprint(hasher, item, seen)
+    elif isinstance(value, (set, frozenset)):
+        update("set", str(len(value)).encode())
+        for item in sorted(value, key=repr):
+            _update_fingerprint(hasher, item, seen)
+    elif isinstance(value, dict):
+        update("dict", str(len(value)).encode())
+        for key in sorted(value, key=repr):
+            _update_fingerprint(hasher, key, seen)
+            _update_fingerprint(hasher, value[key], seen)
+    elif isinstance(value, functools.partial):
+        update("partial")
+        _update_fingerprint(hasher, (value.func, value.args, value.keywords), seen)
+    elif isinstance(value, types.CodeType):
+        update("code", value.co_code + repr(value.co_names).encode())
+        _update_fingerprint(hasher, value.co_consts, seen)
+    elif isinstance(value, (types.FunctionType, types.MethodType)):
+        function = getattr(value, "__func__", value)
+        update("function", function.__qualname__.encode())
+        _update_fingerprint(hasher, function.__code__, seen)
+        _update_fingerprint(hasher, (function.__defaults__, function.__kwdefaults__), seen)
+        closure = function.__closure__ or ()
+        _update_fingerprint(hasher, [cell.cell_contents for cell in closure], seen)
+        referenced_globals = {
+            name: function.__globals__[name]
+            for name in _referenced_names(function.__code__)
+            if name in function.__globals__
+        }
+        _update_fingerprint(hasher, referenced_globals, seen)
+        if isinstance(value, types.MethodType):
+            _update_fingerprint(hasher, value.__self__, seen)
+    elif isinstance(value, (types.BuiltinFunctionType, type)):
+        update("callable", f"{value.__module__}.{value.__qualname__}".encode())
+    elif dataclasses.is_dataclass(value):
+        update("dataclass", type(value).__qualname__.encode())
+        _update_fingerprint(hasher, value.__dict__, seen)
+    elif hasattr(value, "__dict__"):
+        update("object", type(value).__qualname__.encode())
+        _update_fingerprint(hasher, vars(value), seen)
+    else:
+        update("repr", repr(value).encode())
+
+
+def _referenced_names(code):
+    """Get the global names referenced by a code object, including those of nested functions"""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _referenced_names(const)
+    return names
+
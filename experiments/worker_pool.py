@@ -0,0 +1,230 @@
+"""
+A persistent pool of preloaded worker processes for running repeated experiments,
+e.g. from the Dash app or the integration tests, where starting and initializing new workers
+for every `Experiment.run()` dominates the duration of short runs.
+
+Workers are forked from a fork server that imports and initializes the model once (the `preload` modules),
+and then execute simulation runs from any number of experiments.
+Workers are recycled after `maxtasksperchild` runs to bound memory growth,
+and the pool reports its health and utilisation.
+
+Usage:
+```
+from experiments.worker_pool import WorkerPool
+
+with WorkerPool(processes=4) as pool:
+    results = pool.run(experiment)
+    results = pool.run(another_experiment)
+    pool.utilisation()
+```
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import time
+
+import dill
+import radcad.core as core
+from radcad import Experiment
+from radcad.utils import extract_exceptions
+
+default_preload = ["experiments.default_experiment"]
+
+
+def _initialize_worker(preload):
+    # Modules already imported by the fork server are inherited, otherwise imported once per worker
+    for module in preload:
+        __import__(module)
+
+
+def _execute(task):
+    """Execute a serialized simulation run, returning the serialized results with the worker PID and timing"""
+    start_time = time.time()
+    run_args, raise_exceptions = dill.loads(task)
+    result = core._single_run_wrapper((run_args, raise_exceptions))
+    try:
+        payload = dill.dumps(result)
+    except Exception:
+        # Exceptions aren't necessarily serializable
+        results, exception = result
+        payload = dill.dumps(
+            (results, {**exception, "exception": repr(exception["exception"])})
+        )
+    return payload, os.getpid(), start_time, time.time()
+
+
+def _ping():
+    return os.getpid()
+
+
+class WorkerPool:
+    """A persistent pool of preloaded worker processes, executing the runs of radCAD Experiments and Simulations"""
+
+    def __init__(self, processes=None, maxtasksperchild=100, preload=None):
+        """
+        Args:
+            processes (int, optional): Number of worker processes, by default the number of CPUs
+            maxtasksperchild (int, optional): Number of runs after which a worker is replaced, or None to never replace workers
+            preload (list, optional): Modules to import once before workers are forked, by default the default experiment
+        """
+        self.processes = processes or os.cpu_count()
+        self.maxtasksperchild = maxtasksperchild
+        self.preload = list(default_preload if preload is None else preload)
+
+        # The fork server isn't available on Windows, where workers are spawned and import the preload modules themselves
+        method = (
+            "forkserver"
+            if "forkserver" in multiprocessing.get_all_start_methods()
+            else "spawn"
+        )
+        context = multiprocessing.get_context(method)
+        if method == "forkserver":
+            context.set_forkserver_preload(self.preload)
+        self._pool = context.Pool(
+            self.processes,
+            initializer=_initialize_worker,
+            initargs=(self.preload,),
+            maxtasksperchild=maxtasksperchild,
+        )
+
+        self._lock = threading.Lock()
+        self._start_time = time.time()
+        self._tasks = 0
+        self._busy_time = 0.0
+        self._worker_pids = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def run(self, executable):
+        """
+        Run a radCAD Experiment or Simulation on the pool, with its hooks, as `executable.run()` would.
+
+        Returns:
+            The simulation results, which are also assigned to `executable.results`
+        """
+        engine = executable.engine
+        engine.executable = executable
+        simulations = (
+            executable.simulations
+            if isinstance(executable, Experiment)
+            else [executable]
+        )
+        experiment = executable if isinstance(executable, Experiment) else None
+        executable._before_experiment(experiment=experiment)
+
+        configs = [
+            (
+                simulation.model.initial_state,
+                simulation.model.state_update_blocks,
+                simulation.model.params,
+                simulation.timesteps,
+                simulation.runs,
+            )
+            for simulation in simulations
+        ]
+        tasks = [
+            dill.dumps((run_args, engine.raise_exceptions))
+            for run_args in engine._run_stream(configs)
+        ]
+
+        results = [self._receive(result) for result in self._pool.imap(_execute, tasks)]
+
+        executable.results, executable.exceptions = extract_exceptions(results)
+        executable._after_experiment(experiment=experiment)
+        return executable.results
+
+    def submit(
+        self, run_args, raise_exceptions=True, callback=None, error_callback=None
+    ):
+        """
+        Submit a single simulation run to the pool, without waiting for it to complete.
+
+        Args:
+            run_args (RunArgs): The run, e.g. as generated by `Engine._run_stream()`
+            raise_exceptions (bool, optional): Whether a failed run raises its exception, or returns partial results
+            callback (Callable, optional): Called with the `(results, exception)` of the run once it completes
+            error_callback (Callable, optional): Called with the exception raised by a failed run
+
+        Returns:
+            multiprocessing.pool.AsyncResult
+        """
+
+        def on_result(result):
+            result = self._receive(result)
+            if callback:
+                callback(result)
+
+        return self._pool.apply_async(
+            _execute,
+            (dill.dumps((run_args, raise_exceptions)),),
+            callback=on_result,
+            error_callback=error_callback,
+        )
+
+    def health_check(self, timeout=10) -> dict:
+        """
+        Check that the workers respond within the timeout, by executing a no-op task on each worker slot.
+
+        Returns:
+            dict: Whether the pool is healthy, the number of responding workers, and the response latency in seconds
+        """
+        start_time = time.time()
+        pending = [self._pool.apply_async(_ping) for _ in range(self.processes)]
+        responding = 0
+        for result in pending:
+            try:
+                result.get(timeout=max(timeout - (time.time() - start_time), 0))
+                responding += 1
+            except multiprocessing.TimeoutError:
+                logging.warning("Worker pool health check timed out")
+                break
+            except Exception as err:
+                logging.warning(f"Worker pool health check failed: {err}")
+        return {
+            "healthy": responding == self.processes,
+            "responding": responding,
+            "latency": time.time() - start_time,
+        }
+
+    def utilisation(self) -> dict:
+        """
+        Report the pool utilisation: the number of runs executed, the busy time of the workers,
+        and the fraction of the pool's capacity (processes x uptime) spent executing runs.
+        """
+        with self._lock:
+            uptime = time.time() - self._start_time
+            return {
+                "processes": self.processes,
+                "tasks": self._tasks,
+                "workers_used": len(self._worker_pids),
+                "busy_seconds": self._busy_time,
+                "uptime_seconds": uptime,
+                "utilisation": (
+                    self._busy_time / (self.processes * uptime) if uptime else 0.0
+                ),
+            }
+
+    def _receive(self, result):
+        """Record the utilisation of a completed run, and return its deserialized results"""
+        payload, pid, start_time, end_time = result
+        with self._lock:
+            self._tasks += 1
+            self._busy_time += end_time - start_time
+            self._worker_pids.add(pid)
+        return dill.loads(payload)
+
+    def close(self):
+        """Stop the workers once their current runs complete"""
+        self._pool.close()
+        self._pool.join()
+
+    def terminate(self):
+        """Stop the workers immediately, abandoning their current and queued runs"""
+        self._pool.terminate()
+        self._pool.join()
@@ -1,18 +1,35 @@
 """
 CADLabs Ethereum Economic Model
+
+The default System Parameters, Initial State, State Update Blocks, and radCAD Model are loaded on first access,
+e.g. `from model import model`, so that the model's submodules can be imported without the data layer
+(live API requests and historical datasets), e.g. when loading a model bundle (see `model/bundle.py`).
 """
 __version__ = "1.1.7"
 
-from radcad import Model
 
-from model.system_parameters import parameters
-from model.state_variables import initial_state
-from model.state_update_blocks import state_update_blocks
+def __getattr__(name):
+    if name == "parameters":
+        from model.system_parameters import parameters
+
+        return parameters
+    elif name == "initial_state":
+        from model.state_variables import initial_state
+
+        return initial_state
+    elif name == "state_update_blocks":
+        from model.state_update_blocks import state_update_blocks
 
+        return state_update_blocks
+    elif name == "model":
+        from radcad import Model
 
-# Instantiate a new Model
-model = Model(
-    params=parameters,
-    initial_state=initial_state,
-    state_update_blocks=state_update_blocks,
-)
+        # Instantiate a new Model
+        global model
+        model = Model(
+            params=__getattr__("parameters"),
+            initial_state=__getattr__("initial_state"),
+            state_update_blocks=__getattr__("state_update_blocks"),
+        )
+        return model
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
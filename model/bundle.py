@@ -0,0 +1,181 @@
+"""
+Serialized warm-start model bundles.
+
+A bundle is a single versioned file containing a fully resolved experiment: for each simulation
+the compiled System Parameters, Initial State, State Update Blocks, and Simulation Configuration, and the engine settings.
+Processes are pre-generated into arrays of samples for each run and timestep (see `model.utils.ArrayProcess`),
+so that loading a bundle doesn't import the data layer (live API requests and historical datasets)
+or the experiment templates, and takes milliseconds rather than seconds.
+
+Usage:
+```
+from model.bundle import load_bundle, save_bundle
+
+save_bundle(experiment, "experiment.bundle")
+# In a worker process, or notebook kernel:
+experiment = load_bundle("experiment.bundle")
+experiment.run()
+```
+
+A bundle can only be loaded with the same model version and source code it was saved with,
+as Policy and State Update Functions are serialized by reference.
+"""
+
+import copy
+import glob
+import hashlib
+import os
+
+import dill
+from radcad import Experiment, Model, Simulation
+
+import model
+from model.compiler import compile_simulation
+from model.utils import ArrayProcess
+
+BUNDLE_VERSION = 1
+
+
+def model_source_hash() -> str:
+    """Hash the model's source code, which the serialized Policy and State Update Functions reference"""
+    hasher = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for path in sorted(
+        glob.glob(os.path.join(directory, "**", "*.py"), recursive=True)
+    ):
+        hasher.update(os.path.relpath(path, directory).encode())
+        with open(path, "rb") as file:
+            hasher.update(file.read())
+    return hasher.hexdigest()
+
+
+def _pregenerate_processes(params, timesteps, runs, samples=None) -> dict:
+    """
+    Replace each process of the System Parameters with an array of samples for each run and timestep,
+    reusing the samples of processes already pre-generated for another subset
+    """
+    samples = samples if samples is not None else {}
+    dt = params["dt"]
+    pregenerated = {}
+    for key, value in params.items():
+        if not key.endswith("_process") or isinstance(value, ArrayProcess):
+            pregenerated[key] = value
+            continue
+        if (id(value), dt) not in samples:
+            samples[(id(value), dt)] = ArrayProcess(
+                [
+                    [value(run, timestep * dt) for timestep in range(timesteps + 1)]
+                    for run in range(1, runs + 1)
+                ],
+                dt=dt,
+            )
+        pregenerated[key] = samples[(id(value), dt)]
+    return pregenerated
+
+
+def save_bundle(executable, path):
+    """
+    Save a radCAD Experiment or Simulation to a bundle file,
+    compiling each simulation (see `model/compiler.py`) and pre-generating its processes.
+
+    The executable isn't modified.
+    """
+    executable = copy.deepcopy(executable)
+    simulations = (
+        executable.simulations if isinstance(executable, Experiment) else [executable]
+    )
+
+    bundled_simulations = []
+    for simulation in simulations:
+        compile_simulation(simulation)
+        params = simulation.model.params
+        subsets = max(len(values) for values in params.values())
+        # Each subset's processes are pre-generated separately, as they may be swept
+        samples = {}
+        subset_params = [
+            _pregenerate_processes(
+                {
+                    key: values[min(subset, len(values) - 1)]
+                    for key, values in params.items()
+                },
+                simulation.timesteps,
+                simulation.runs,
+                samples,
+            )
+            for subset in range(subsets)
+        ]
+        bundled_simulations.append(
+            (
+                simulation.model.initial_state,
+                simulation.model.state_update_blocks,
+                {key: [subset[key] for subset in subset_params] for key in params},
+                simulation.timesteps,
+                simulation.runs,
+            )
+        )
+
+    engine = executable.engine
+    header = {
+        "bundle_version": BUNDLE_VERSION,
+        "model_version": model.__version__,
+        "model_source_hash": model_source_hash(),
+    }
+    payload = {
+        "simulations": bundled_simulations,
+        "engine": {
+            "backend": engine.backend,
+            "processes": engine.processes,
+            "raise_exceptions": engine.raise_exceptions,
+            "deepcopy": engine.deepcopy,
+            "drop_substeps": engine.drop_substeps,
+        },
+    }
+
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        dill.dump(header, file)
+        dill.dump(payload, file)
+    os.replace(temporary_path, path)
+
+
+def load_bundle(path) -> Experiment:
+    """
+    Load a radCAD Experiment from a bundle file.
+
+    Raises a `ValueError` if the bundle was saved with a different bundle format, model version, or model source code.
+    """
+    with open(path, "rb") as file:
+        # The header is checked before the payload is loaded, which imports the referenced model modules
+        header = dill.load(file)
+        expected = {
+            "bundle_version": BUNDLE_VERSION,
+            "model_version": model.__version__,
+            "model_source_hash": model_source_hash(),
+        }
+        for key, value in expected.items():
+            if header.get(key) != value:
+                raise ValueError(
+                    f"Bundle {path} {key} {header.get(key)} doesn't match {value}, save the bundle again"
+                )
+        payload = dill.load(file)
+
+    simulations = [
+        Simulation(
+            model=Model(
+                initial_state=initial_state,
+                state_update_blocks=state_update_blocks,
+                params=params,
+            ),
+            timesteps=timesteps,
+            runs=runs,
+        )
+        for initial_state, state_update_blocks, params, timesteps, runs in payload[
+            "simulations"
+        ]
+    ]
+    experiment = Experiment(simulations)
+    for key, value in payload["engine"].items():
+        setattr(experiment.engine, key, value)
+    for simulation in simulations:
+        simulation.engine = experiment.engine
+    return experiment
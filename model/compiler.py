@@ -0,0 +1,259 @@
+"""
+# Simulation Compiler
+
+A "compile" pass over the System Parameters of each parameter sweep subset, run once before a simulation, that:
+* validates the types and ranges of the System Parameters, raising a `TypeError` or `ValueError` naming the parameter and subset,
+* resolves the driving mode of each subset, i.e. whether the model is driven by the `eth_staked_process`
+  (phase-space analyses) or the `validator_process` (state-space analyses),
+* binds the resolved driving mode to the `eth_staked_process_enabled` System Parameter,
+  so that Policy Functions don't probe the `eth_staked_process` every timestep, and
+* selects the order of the Ethereum and validator State Update Blocks for the driving mode.
+
+Usage:
+```
+from model.compiler import compile_simulation
+
+compile_simulation(simulation)
+simulation.run()
+```
+
+The compile pass runs from radCAD `before_experiment` hooks: the default experiment compiles its simulations
+before the Experiment is run (`compile_experiment`), and the default simulation compiles itself when run directly
+with `Simulation.run()` (`SimulationCompiler`), including copies of either made using `copy.deepcopy()`,
+see `experiments/default_experiment.py`.
+
+Simulations created without these hooks, or run by a path that doesn't call the `before_experiment` hook,
+aren't compiled: they remain valid, with the driving mode resolved by the Policy Functions at runtime,
+but their System Parameters aren't validated up front. Call `compile_simulation()` before running them.
+"""
+
+from datetime import datetime
+from numbers import Integral, Real
+
+import numpy as np
+from radcad.core import generate_parameter_sweep
+
+from model.types import Stage, ValidationLevel
+
+# System Parameters that must be positive integers
+_positive_integer_parameters = [
+    "dt",
+    "BASE_REWARD_FACTOR",
+    "PROPOSER_REWARD_QUOTIENT",
+    "WHISTLEBLOWER_REWARD_QUOTIENT",
+    "MIN_SLASHING_PENALTY_QUOTIENT",
+    "WEIGHT_DENOMINATOR",
+    "MIN_PER_EPOCH_CHURN_LIMIT",
+    "CHURN_LIMIT_QUOTIENT",
+    "BASE_FEE_MAX_CHANGE_DENOMINATOR",
+    "ELASTICITY_MULTIPLIER",
+]
+# System Parameters that must be non-negative integers
+_non_negative_integer_parameters = [
+    "PROPORTIONAL_SLASHING_MULTIPLIER",
+    "TIMELY_HEAD_WEIGHT",
+    "TIMELY_SOURCE_WEIGHT",
+    "TIMELY_TARGET_WEIGHT",
+    "SYNC_REWARD_WEIGHT",
+    "PROPOSER_WEIGHT",
+    "slashing_events_per_1000_epochs",
+]
+# System Parameters that must be non-negative numbers
+_non_negative_parameters = [
+    "daily_pow_issuance",
+    "mev_per_block",
+    "MAX_EFFECTIVE_BALANCE",
+    "EFFECTIVE_BALANCE_INCREMENT",
+]
+# System Parameters that must be a vector with a non-negative value for each validator environment
+_validator_environment_parameters = [
+    "validator_percentage_distribution",
+    "validator_hardware_costs_per_epoch",
+    "validator_cloud_costs_per_epoch",
+    "validator_third_party_costs_per_epoch",
+]
+_datetime_parameters = ["date_start", "date_eip1559", "date_pos"]
+
+
+def compile_params(params: dict, subset=None) -> dict:
+    """
+    Validate the System Parameters of a single parameter sweep subset, and bind the resolved driving mode.
+
+    Args:
+        params (dict): System Parameters of a single subset, i.e. a value for each parameter
+        subset (int, optional): The subset index, used in error messages
+
+    Returns:
+        dict: A copy of the System Parameters with the `eth_staked_process_enabled` key bound
+    """
+    location = f" (subset {subset})" if subset is not None else ""
+
+    def check(condition, key, expected, error=ValueError):
+        if not condition:
+            raise error(
+                f"System Parameter {key}{location} must be {expected}, got {params[key]!r}"
+            )
+
+    def is_integer(value):
+        return isinstance(value, Integral) and not isinstance(value, bool)
+
+    def is_number(value):
+        return isinstance(value, Real) and not isinstance(value, bool)
+
+    for key in _positive_integer_parameters:
+        check(is_integer(params[key]), key, "an integer", TypeError)
+        check(params[key] > 0, key, "positive")
+    for key in _non_negative_integer_parameters:
+        check(is_integer(params[key]), key, "an integer", TypeError)
+        check(params[key] >= 0, key, "non-negative")
+    for key in _non_negative_parameters:
+        check(is_number(params[key]), key, "a number", TypeError)
+        check(params[key] >= 0, key, "non-negative")
+    # Each vector has a value for each validator environment
+    number_of_environments = len(np.ravel(params["validator_percentage_distribution"]))
+    for key in _validator_environment_parameters:
+        check(isinstance(params[key], np.ndarray), key, "a numpy array", TypeError)
+        check(
+            params[key].shape == (number_of_environments,),
+            key,
+            f"a vector with a value for each of the {number_of_environments} validator environments",
+        )
+        check(np.all(params[key] >= 0), key, "non-negative")
+    for key in _datetime_parameters:
+        check(isinstance(params[key], datetime), key, "a datetime", TypeError)
+    for key in [key for key in params if key.endswith("_process")]:
+        check(
+            callable(params[key]), key, "a process callable(run, timestep)", TypeError
+        )
+
+    check(isinstance(params["stage"], Stage), "stage", "a Stage", TypeError)
+    check(
+        isinstance(params["validation_level"], ValidationLevel),
+        "validation_level",
+        "a ValidationLevel",
+        TypeError,
+    )
+    check(
+        is_number(params["validation_sample_rate"])
+        and 0 < params["validation_sample_rate"] <= 1,
+        "validation_sample_rate",
+        "a fraction in the range (0, 1]",
+    )
+    check(
+        params["MAX_VALIDATOR_COUNT"] is None
+        or (
+            is_integer(params["MAX_VALIDATOR_COUNT"])
+            and params["MAX_VALIDATOR_COUNT"] > 0
+        ),
+        "MAX_VALIDATOR_COUNT",
+        "None or a positive integer",
+    )
+    check(
+        params["validator_percentage_distribution"].sum() <= 1 + 1e-9,
+        "validator_percentage_distribution",
+        "normalized to a total of at most 100%",
+    )
+    check(
+        params["date_eip1559"] <= params["date_pos"],
+        "date_eip1559",
+        "before the date_pos",
+    )
+
+    return {
+        **params,
+        "eth_staked_process_enabled": params["eth_staked_process"](0, 0) is not None,
+    }
+
+
+def compile_state_update_blocks(
+    state_update_blocks, eth_staked_process_enabled
+) -> list:
+    """
+    Select the order of the Ethereum and validator State Update Blocks for the driving mode.
+
+    When driven by the `eth_staked_process`, the Ethereum block (updating `eth_staked`) precedes the validator block,
+    otherwise the validator block (updating the number of validators, and implied ETH staked) precedes the Ethereum block.
+    Neither block depends on the other's updates when driven by the `eth_staked_process`,
+    so the validator-first order is also used for parameter sweeps with subsets of both driving modes.
+
+    Args:
+        state_update_blocks (list): State Update Blocks
+        eth_staked_process_enabled (bool): Whether the model is driven by the `eth_staked_process`
+
+    Returns:
+        list: A reordered copy of the State Update Blocks
+    """
+    blocks = list(state_update_blocks)
+    ethereum = next(
+        (i for i, block in enumerate(blocks) if "eth_staked" in block["variables"]),
+        None,
+    )
+    validators = next(
+        (
+            i
+            for i, block in enumerate(blocks)
+            if "validator_uptime" in block["variables"]
+        ),
+        None,
+    )
+    if ethereum is None or validators is None:
+        return blocks
+
+    first, second = sorted([ethereum, validators])
+    blocks[first], blocks[second] = (
+        (blocks[ethereum], blocks[validators])
+        if eth_staked_process_enabled
+        else (blocks[validators], blocks[ethereum])
+    )
+    return blocks
+
+
+def compile_simulation(simulation):
+    """
+    Compile the System Parameters of each parameter sweep subset of a radCAD Simulation,
+    and select the State Update Block order.
+
+    The Simulation's System Parameters and State Update Blocks are updated in place,
+    so that an Experiment's run configuration includes the compiled Simulation.
+
+    Returns:
+        Simulation: The compiled Simulation
+    """
+    params = simulation.model.params
+    subsets = [
+        compile_params(subset_params, subset)
+        for subset, subset_params in enumerate(generate_parameter_sweep(params))
+    ]
+    enabled = [subset_params["eth_staked_process_enabled"] for subset_params in subsets]
+
+    # A single value is used for all subsets, otherwise a value for each subset as for any swept parameter
+    params["eth_staked_process_enabled"] = (
+        enabled[:1] if len(set(enabled)) == 1 else enabled
+    )
+    simulation.model.state_update_blocks[:] = compile_state_update_blocks(
+        simulation.model.state_update_blocks, all(enabled)
+    )
+    return simulation
+
+
+def compile_experiment(experiment=None):
+    """Compile each Simulation of a radCAD Experiment, for use as a `before_experiment` hook"""
+    if experiment is not None:
+        for simulation in experiment.simulations:
+            compile_simulation(simulation)
+    return experiment
+
+
+class SimulationCompiler:
+    """
+    A `before_experiment` hook compiling a radCAD Simulation run directly with `Simulation.run()`,
+    for which radCAD calls the hook without the Simulation.
+
+    The hook references its Simulation, so that the hook of a copy made using `copy.deepcopy()` compiles the copy.
+    """
+
+    def __init__(self, simulation):
+        self.simulation = simulation
+
+    def __call__(self, experiment=None):
+        compile_simulation(self.simulation)
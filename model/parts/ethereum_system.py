@@ -9,6 +9,7 @@ import typing
 import datetime
 
 from model import constants as constants
+from model.parts.utils import validate
 from model.types import ETH, USD_per_ETH, Gwei, Stage
 
 
@@ -229,9 +230,10 @@ def policy_eip1559_transaction_pricing(
         total_priority_fee_to_validators = 0
 
     # Check if the block used too much gas
-    assert (
-        gas_used <= gas_target * ELASTICITY_MULTIPLIER * constants.slots_per_epoch
-    ), "invalid block: too much gas used"
+    if validate(params, previous_state):
+        assert (
+            gas_used <= gas_target * ELASTICITY_MULTIPLIER * constants.slots_per_epoch
+        ), "invalid block: too much gas used"
 
     return {
         "base_fee_per_gas": base_fee_per_gas,
@@ -7,7 +7,7 @@ Calculation of PoS incentives such as attestation and block proposal rewards and
 import typing
 
 import model.parts.utils.ethereum_spec as spec
-from model.parts.utils import get_number_of_awake_validators
+from model.parts.utils import get_number_of_awake_validators, validate
 from model.types import Gwei
 
 
@@ -398,8 +398,9 @@ def update_validating_rewards(
     )
 
     # Assert validating rewards should be less than equal to the maximum validating rewards
-    max_validating_rewards = number_of_validators_online * base_reward
-    assert validating_rewards <= max_validating_rewards
+    if validate(params, previous_state):
+        max_validating_rewards = number_of_validators_online * base_reward
+        assert validating_rewards <= max_validating_rewards
 
     return "validating_rewards", validating_rewards
 
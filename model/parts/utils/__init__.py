@@ -2,8 +2,69 @@
 Misc. utility and helper functions
 """
 
-from model.state_variables import StateVariables
-from model.system_parameters import Parameters
+from __future__ import annotations
+
+import functools
+import typing
+
+import model.constants as constants
+from model.types import ValidationLevel
+
+if typing.TYPE_CHECKING:
+    # Only imported for type hints, as they import the data layer
+    from model.state_variables import StateVariables
+    from model.system_parameters import Parameters
+
+
+def derived_quantity(params_keys, state_keys):
+    """
+    Decorator used to memoize a quantity derived from System Parameters and State Variables.
+
+    The most recent result is cached against the values of the given Parameter and State Variable keys,
+    so that Policy and State Update Functions calling the same helper within a timestep share a single calculation,
+    and the cache is invalidated as soon as any of its inputs change.
+
+    The keys must list every Parameter and State Variable the decorated function reads, including indirectly.
+
+    Args:
+        params_keys (list): System Parameter keys the derived quantity depends on
+        state_keys (list): State Variable keys the derived quantity depends on
+
+    Returns:
+        Callable: A decorator for functions with the signature `function(params, state)`
+    """
+
+    def decorator(function):
+        # The key and value are stored as a single entry, assigned atomically,
+        # so that simulations running concurrently on threads never read a value with another key
+        cache = {"entry": None, "hits": 0, "misses": 0}
+
+        @functools.wraps(function)
+        def wrapper(params, state):
+            key = tuple(params[k] for k in params_keys) + tuple(
+                state[k] for k in state_keys
+            )
+            entry = cache["entry"]
+            if entry is not None and key == entry[0]:
+                cache["hits"] += 1
+                return entry[1]
+
+            value = function(params, state)
+            cache["entry"] = (key, value)
+            cache["misses"] += 1
+            return value
+
+        def cache_info():
+            return {"hits": cache["hits"], "misses": cache["misses"]}
+
+        def cache_clear():
+            cache.update({"entry": None, "hits": 0, "misses": 0})
+
+        wrapper.cache_info = cache_info
+        wrapper.cache_clear = cache_clear
+        return wrapper
+
+    return decorator
 
 
 def get_number_of_awake_validators(params: Parameters, state: StateVariables) -> int:
@@ -21,3 +82,86 @@ def get_number_of_awake_validators(params: Parameters, state: StateVariables) ->
         number_of_validators = state["number_of_active_validators"]
 
     return number_of_validators
+
+
+def get_eth_staked_process_enabled(params: Parameters) -> bool:
+    """
+    Utility function used to return whether the model is driven by the `eth_staked_process`,
+    otherwise by the `validator_process`.
+    Uses the driving mode bound by the compile pass if available (see `model/compiler.py`),
+    otherwise probes the `eth_staked_process`.
+    """
+    eth_staked_process_enabled = params.get("eth_staked_process_enabled")
+    if eth_staked_process_enabled is None:
+        eth_staked_process_enabled = params["eth_staked_process"](0, 0) is not None
+    return eth_staked_process_enabled
+
+
+def validate(params: Parameters, state: StateVariables) -> bool:
+    """
+    Utility function used to return whether model invariants (assertions) should be checked at the current timestep,
+    according to the `validation_level` System Parameter:
+    every timestep for FULL, a regularly sampled `validation_sample_rate` fraction of timesteps for SAMPLED, and never for OFF.
+    """
+    # Parameters
+    validation_level = params["validation_level"]
+
+    if validation_level == ValidationLevel.FULL:
+        return True
+    elif validation_level == ValidationLevel.OFF:
+        return False
+    else:
+        interval = max(1, round(1 / params["validation_sample_rate"]))
+        return state["timestep"] % interval == 0
+
+
+def validate_parameters(
+    params: Parameters, initial_state: StateVariables, timesteps, runs
+):
+    """
+    Check model invariants once up front from the System Parameters, for the SAMPLED `validation_level`,
+    over the stochastic process samples of every run and timestep of the simulation.
+
+    Invariants that depend on the simulation state, such as validating rewards <= maximum validating rewards,
+    are checked up front where they can be, and otherwise on the sampled timesteps.
+    """
+    if params["validation_level"] != ValidationLevel.SAMPLED:
+        return
+
+    # Parameters
+    dt = params["dt"]
+    eth_staked_process = params["eth_staked_process"]
+    validator_uptime_process = params["validator_uptime_process"]
+    gas_target_process = params["gas_target_process"]
+    ELASTICITY_MULTIPLIER = params["ELASTICITY_MULTIPLIER"]
+
+    # Validating rewards: the sum of the reward weights can't exceed the weight denominator
+    assert (
+        params["TIMELY_SOURCE_WEIGHT"]
+        + params["TIMELY_TARGET_WEIGHT"]
+        + params["TIMELY_HEAD_WEIGHT"]
+        + params["SYNC_REWARD_WEIGHT"]
+        + params["PROPOSER_WEIGHT"]
+        <= params["WEIGHT_DENOMINATOR"]
+    ), "Validating rewards can be more than the maximum validating rewards"
+
+    # Gas used per epoch is the gas target per block times the number of blocks per epoch
+    assert max(constants.pow_blocks_per_epoch, constants.slots_per_epoch) <= (
+        ELASTICITY_MULTIPLIER * constants.slots_per_epoch
+    ), "invalid block: too much gas used"
+
+    eth_staked_process_defined = get_eth_staked_process_enabled(params)
+    for run in range(1, runs + 1):
+        for timestep in range(timesteps + 1):
+            assert (
+                validator_uptime_process(run, timestep * dt) >= 2 / 3
+            ), "Validator uptime must be greater than 2/3"
+            assert (
+                gas_target_process(run, timestep * dt) >= 0
+            ), "Gas target must be positive"
+            # ETH staked is only checked against the initial ETH supply up front, and the current ETH supply when sampled
+            if eth_staked_process_defined:
+                assert (
+                    eth_staked_process(run, timestep * dt)
+                    <= initial_state["eth_supply"]
+                ), "ETH staked can't be more than ETH supply"
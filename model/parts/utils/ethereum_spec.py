@@ -5,11 +5,19 @@ Relevant methods from the official [eth2.0-specs](https://github.com/ethereum/et
 * Altair updates: https://github.com/ethereum/eth2.0-specs/blob/dev/specs/altair/beacon-chain.md
 """
 
+from __future__ import annotations
+
+import typing
+
 import model.constants as constants
-from model.state_variables import StateVariables
-from model.system_parameters import Parameters
+from model.parts.utils import derived_quantity
 from model.types import Gwei
 
+if typing.TYPE_CHECKING:
+    # Only imported for type hints, as they import the data layer
+    from model.state_variables import StateVariables
+    from model.system_parameters import Parameters
+
 
 # Beacon state accessors
 
@@ -47,6 +55,14 @@ def get_awake_validator_indices(params: Parameters, state: StateVariables) -> Gw
     return awake_validators
 
 
+@derived_quantity(
+    params_keys=[
+        "EFFECTIVE_BALANCE_INCREMENT",
+        "MAX_EFFECTIVE_BALANCE",
+        "MAX_VALIDATOR_COUNT",
+    ],
+    state_keys=["eth_staked", "number_of_active_validators"],
+)
 def get_total_active_balance(params: Parameters, state: StateVariables) -> Gwei:
     """
     See https://github.com/ethereum/eth2.0-specs/blob/dev/specs/phase0/beacon-chain.md#get_total_active_balance
@@ -97,6 +113,15 @@ def integer_squareroot(n):
     return x
 
 
+@derived_quantity(
+    params_keys=[
+        "EFFECTIVE_BALANCE_INCREMENT",
+        "BASE_REWARD_FACTOR",
+        "MAX_EFFECTIVE_BALANCE",
+        "MAX_VALIDATOR_COUNT",
+    ],
+    state_keys=["eth_staked", "number_of_active_validators"],
+)
 def get_base_reward_per_increment(params: Parameters, state: StateVariables) -> Gwei:
     """Get the base reward per increment (single validator)"""
 
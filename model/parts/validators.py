@@ -8,7 +8,11 @@ import typing
 
 import model.constants as constants
 import model.parts.utils.ethereum_spec as spec
-from model.parts.utils import get_number_of_awake_validators
+from model.parts.utils import (
+    get_eth_staked_process_enabled,
+    get_number_of_awake_validators,
+    validate,
+)
 from model.types import ETH, Gwei
 
 
@@ -35,7 +39,7 @@ def policy_staking(
     average_effective_balance = previous_state["average_effective_balance"]
 
     # If the eth_staked_process is defined
-    if eth_staked_process(0, 0) is not None:
+    if get_eth_staked_process_enabled(params):
         # Get the ETH staked sample for the current run and timestep
         eth_staked = eth_staked_process(run, timestep * dt)
     # Else, calculate from the number of validators
@@ -43,7 +47,8 @@ def policy_staking(
         eth_staked = number_of_validators * average_effective_balance / constants.gwei
 
     # Assert expected conditions
-    assert eth_staked <= eth_supply, f"ETH staked can't be more than ETH supply"
+    if validate(params, previous_state):
+        assert eth_staked <= eth_supply, f"ETH staked can't be more than ETH supply"
 
     return {"eth_staked": eth_staked}
 
@@ -69,7 +74,7 @@ def policy_validators(params, substep, state_history, previous_state):
     average_effective_balance = previous_state["average_effective_balance"]
 
     # Calculate the number of validators using ETH staked
-    if eth_staked_process(0, 0) is not None:
+    if get_eth_staked_process_enabled(params):
         eth_staked = eth_staked_process(run, timestep * dt)
         number_of_active_validators = int(
             round(eth_staked / (average_effective_balance / constants.gwei))
@@ -98,7 +103,8 @@ def policy_validators(params, substep, state_history, previous_state):
     validator_uptime = validator_uptime_process(run, timestep * dt)
 
     # Assume a participation of more than 2/3 due to lack of inactivity leak mechanism
-    assert validator_uptime >= 2 / 3, "Validator uptime must be greater than 2/3"
+    if validate(params, previous_state):
+        assert validator_uptime >= 2 / 3, "Validator uptime must be greater than 2/3"
 
     return {
         "number_of_validators_in_activation_queue": number_of_validators_in_activation_queue,
@@ -0,0 +1,90 @@
+"""
+Helper functions to generate historical replay processes from the bundled datasets, for backtesting the model.
+
+The historical series are aligned to the simulation start date, resampled to a value every `dt` epochs,
+and pre-interpolated into arrays of samples per timestep, looked up using an `ArrayProcess`.
+"""
+
+import logging
+from datetime import timedelta
+
+import numpy as np
+
+import experiments.simulation_configuration as simulation
+import model.constants as constants
+from data.timeseries_store import seconds_per_epoch, store
+from model.utils import ArrayProcess
+
+# Number of PoW blocks per day, used to convert daily totals to per-block values
+pow_blocks_per_day = constants.pow_blocks_per_epoch * constants.epochs_per_day
+
+
+def _replay_samples(dataset, date_start, timesteps, dt, method="linear"):
+    series = store[dataset]
+    date_end = date_start + timedelta(seconds=timesteps * dt * seconds_per_epoch)
+    if date_start < series.start or date_end > series.end:
+        logging.warning(
+            f"Replay of {dataset} from {date_start} to {date_end} exceeds the historical data "
+            f"from {series.start} to {series.end}, holding the first and last observed values constant"
+        )
+    return series.resample(
+        "value", start=date_start, periods=timesteps + 1, dt=dt, method=method
+    )
+
+
+def create_replay_processes(
+    date_start,
+    timesteps=simulation.TIMESTEPS,
+    dt=simulation.DELTA_TIME,
+    avg_priority_fee_per_gas=2,
+):
+    """Configure historical replay processes
+
+    Replays the historical ETH price, average gas price, gas used, and extracted MEV from the simulation start date,
+    returning System Parameter overrides:
+    * `eth_price_process`: the daily ETH price in USD from `ether_price.csv`
+    * `base_fee_process`: the daily average gas price in Gwei per gas from `ether_avg_gas_price.csv`,
+      less the average priority fee, as the historical gas price includes both
+    * `gas_target_process`: the daily gas used per block from `ether_gas_used.csv`,
+      assuming blocks are on average at the gas target
+    * `mev_per_block`: the mean extracted MEV per block in ETH over the simulation period from `daily_extracted_mev.json`,
+      as `mev_per_block` is a constant System Parameter rather than a process
+
+    The processes have the standard `process(run, timestep)` signature, replaying the same history for every run.
+
+    Args:
+        date_start (datetime): The simulation start date, i.e. the `date_start` System Parameter
+        timesteps (int): Number of simulation timesteps
+        dt (int): Number of epochs per timestep, i.e. the `dt` System Parameter
+        avg_priority_fee_per_gas (float): The average priority fee in Gwei per gas, i.e. the `priority_fee_process` value
+
+    Returns:
+        dict: System Parameter overrides
+    """
+    eth_price_samples = _replay_samples("ether_price", date_start, timesteps, dt)
+    gas_price_samples = (
+        _replay_samples("ether_avg_gas_price", date_start, timesteps, dt)
+        / constants.gwei
+    )
+    gas_used_samples = _replay_samples("ether_gas_used", date_start, timesteps, dt)
+    mev_samples = _replay_samples(
+        "daily_extracted_mev", date_start, timesteps, dt, method="previous"
+    )
+
+    return {
+        "date_start": [date_start],
+        "dt": [dt],
+        "eth_price_process": [ArrayProcess(eth_price_samples, dt=dt)],
+        "base_fee_process": [
+            ArrayProcess(
+                np.maximum(gas_price_samples - avg_priority_fee_per_gas, 0), dt=dt
+            )
+        ],
+        "priority_fee_process": [
+            ArrayProcess(np.full(timesteps + 1, float(avg_priority_fee_per_gas)), dt=dt)
+        ],
+        "gas_target_process": [
+            ArrayProcess(gas_used_samples / pow_blocks_per_day, dt=dt)
+        ],
+        "mev_per_block": [float(np.mean(mev_samples) / pow_blocks_per_day)],
+    }
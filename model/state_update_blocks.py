@@ -6,6 +6,7 @@ import model.parts.ethereum_system as ethereum
 import model.parts.pos_incentives as incentives
 import model.parts.system_metrics as metrics
 import model.parts.validators as validators
+from model.compiler import compile_state_update_blocks
 from model.system_parameters import parameters
 from model.utils import update_from_signal
 
@@ -237,23 +238,16 @@ _state_update_blocks = [
     },
 ]
 
-# Conditionally update the order of the State Update Blocks using a ternary operator
-_state_update_blocks = (
-    # If driving with environmental ETH staked process, structure as follows:
+# Order the Ethereum and validator State Update Blocks for the default driving mode,
+# reordered for each simulation by the compile pass (see `model/compiler.py`)
+_state_update_blocks = compile_state_update_blocks(
     [
         state_update_block_stages,
         state_update_block_ethereum,
         state_update_block_validators,
     ]
-    + _state_update_blocks
-    if parameters["eth_staked_process"][0](0, 0) is not None
-    # Otherwise, if driving with validator adoption (implied ETH staked) process, switch Ethereum and validator blocks:
-    else [
-        state_update_block_stages,
-        state_update_block_validators,
-        state_update_block_ethereum,
-    ]
-    + _state_update_blocks
+    + _state_update_blocks,
+    eth_staked_process_enabled=parameters["eth_staked_process"][0](0, 0) is not None,
 )
 
 # Split the state update blocks into those used during the simulation (state_update_blocks)
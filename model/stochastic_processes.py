@@ -1,5 +1,11 @@
 """
 Helper functions to generate stochastic environmental processes.
+
+The `create_*_samples()` functions generate the samples of every run at once, as a (runs, timesteps + 1) array
+indexed by run and timestep, each run with its own seed from a single array of seeds (see `create_seeds()`),
+so that the samples of a run don't depend on the number of runs.
+Samples are generated every timestep of `dt` epochs, with drift, volatility, and rate parameters per year,
+and can be looked up directly using `model.utils.ArrayProcess(samples, dt=dt)`.
 """
 
 import numpy as np
@@ -7,6 +13,7 @@ from stochastic import processes
 
 import experiments.simulation_configuration as simulation
 from experiments.utils import rng_generator
+from model.constants import epochs_per_year
 
 
 def create_eth_price_process(
@@ -79,3 +86,219 @@ def create_stochastic_process_realizations(
     }
 
     return switcher.get(process, "Invalid Process")
+
+
+def create_seeds(runs, seed=1) -> np.ndarray:
+    """Create an array of RNG seeds, one for each run, from a master seed"""
+    return np.random.SeedSequence(seed).generate_state(runs)
+
+
+def _create_rngs(runs, seeds):
+    if seeds is None or np.ndim(seeds) == 0:
+        seeds = create_seeds(runs, 1 if seeds is None else seeds)
+    if len(seeds) != runs:
+        raise ValueError(f"Expected a seed for each of {runs} runs, got {len(seeds)}")
+    return [np.random.default_rng(seed) for seed in seeds]
+
+
+def _sample(rngs, distribution, *args, size):
+    """Sample from a distribution of each run's RNG, returning an array of shape (runs, *size)"""
+    return np.stack([getattr(rng, distribution)(*args, size=size) for rng in rngs])
+
+
+def _log_price_samples(initial, log_returns):
+    """Accumulate log returns of shape (runs, timesteps) into samples starting from the initial value"""
+    cumulative_log_returns = np.cumsum(log_returns, axis=1)
+    return initial * np.exp(
+        np.concatenate(
+            [np.zeros((len(log_returns), 1)), cumulative_log_returns], axis=1
+        )
+    )
+
+
+def create_gbm_samples(
+    initial,
+    drift,
+    volatility,
+    timesteps=simulation.TIMESTEPS,
+    dt=simulation.DELTA_TIME,
+    runs=5,
+    seeds=None,
+) -> np.ndarray:
+    """Geometric Brownian motion, e.g. for the ETH price
+
+    Args:
+        initial (float): Value at timestep 0
+        drift (float): Annualized drift
+        volatility (float): Annualized volatility
+        seeds (int or array_like, optional): A master seed, or a seed for each run
+
+    Returns:
+        np.ndarray: Samples of shape (runs, timesteps + 1)
+    """
+    rngs = _create_rngs(runs, seeds)
+    step = dt / epochs_per_year
+    log_returns = (drift - volatility ** 2 / 2) * step + volatility * np.sqrt(
+        step
+    ) * _sample(rngs, "standard_normal", size=timesteps)
+    return _log_price_samples(initial, log_returns)
+
+
+def create_jump_diffusion_samples(
+    initial,
+    drift,
+    volatility,
+    jump_rate,
+    jump_mean,
+    jump_volatility,
+    timesteps=simulation.TIMESTEPS,
+    dt=simulation.DELTA_TIME,
+    runs=5,
+    seeds=None,
+) -> np.ndarray:
+    """Merton jump-diffusion, geometric Brownian motion with log-normally distributed jumps, e.g. for ETH price shocks
+
+    The drift is compensated for the jumps, so that the expected growth is the same as geometric Brownian motion.
+
+    Args:
+        initial (float): Value at timestep 0
+        drift (float): Annualized drift
+        volatility (float): Annualized volatility of the diffusion
+        jump_rate (float): Expected number of jumps per year
+        jump_mean (float): Mean of the log jump size, e.g. negative for crashes
+        jump_volatility (float): Standard deviation of the log jump size
+        seeds (int or array_like, optional): A master seed, or a seed for each run
+
+    Returns:
+        np.ndarray: Samples of shape (runs, timesteps + 1)
+    """
+    rngs = _create_rngs(runs, seeds)
+    step = dt / epochs_per_year
+    jumps = _sample(rngs, "poisson", jump_rate * step, size=timesteps)
+    jump_sizes = jumps * jump_mean + np.sqrt(jumps) * jump_volatility * _sample(
+        rngs, "standard_normal", size=timesteps
+    )
+    compensator = jump_rate * (np.exp(jump_mean + jump_volatility ** 2 / 2) - 1)
+    log_returns = (
+        (drift - volatility ** 2 / 2 - compensator) * step
+        + volatility
+        * np.sqrt(step)
+        * _sample(rngs, "standard_normal", size=timesteps)
+        + jump_sizes
+    )
+    return _log_price_samples(initial, log_returns)
+
+
+def create_regime_switching_samples(
+    initial,
+    drifts,
+    volatilities,
+    transition_matrix,
+    initial_regime=0,
+    timesteps=simulation.TIMESTEPS,
+    dt=simulation.DELTA_TIME,
+    runs=5,
+    seeds=None,
+    return_regimes=False,
+):
+    """Markov regime-switching geometric Brownian motion, e.g. for bull and bear market ETH price regimes
+
+    Args:
+        initial (float): Value at timestep 0
+        drifts (array_like): Annualized drift in each regime
+        volatilities (array_like): Annualized volatility in each regime
+        transition_matrix (array_like): Probability of switching from each regime (row) to each regime (column) per timestep
+        initial_regime (int, optional): Regime at timestep 0
+        seeds (int or array_like, optional): A master seed, or a seed for each run
+        return_regimes (bool, optional): Whether to also return the regime of each run and timestep
+
+    Returns:
+        np.ndarray: Samples of shape (runs, timesteps + 1), and if `return_regimes` the regimes of the same shape
+    """
+    drifts = np.asarray(drifts, dtype=float)
+    volatilities = np.asarray(volatilities, dtype=float)
+    transition_matrix = np.asarray(transition_matrix, dtype=float)
+    if transition_matrix.shape != (len(drifts), len(drifts)) or not np.allclose(
+        transition_matrix.sum(axis=1), 1
+    ):
+        raise ValueError(
+            f"Transition matrix must be a square matrix of {len(drifts)} regimes with rows summing to 1"
+        )
+
+    rngs = _create_rngs(runs, seeds)
+    step = dt / epochs_per_year
+    uniform = _sample(rngs, "random", size=timesteps)
+    normal = _sample(rngs, "standard_normal", size=timesteps)
+
+    # The Markov chain is sampled for all runs at once, by inverse transform sampling of each regime's transitions
+    cumulative_transitions = np.cumsum(transition_matrix, axis=1)
+    regimes = np.empty((runs, timesteps + 1), dtype=int)
+    regimes[:, 0] = initial_regime
+    for timestep in range(timesteps):
+        regimes[:, timestep + 1] = np.minimum(
+            (
+                uniform[:, timestep, None]
+                >= cumulative_transitions[regimes[:, timestep]]
+            ).sum(axis=1),
+            len(drifts) - 1,
+        )
+
+    # Each timestep's return uses the regime at the start of the timestep
+    drift = drifts[regimes[:, :-1]]
+    volatility = volatilities[regimes[:, :-1]]
+    log_returns = (drift - volatility ** 2 / 2) * step + volatility * np.sqrt(
+        step
+    ) * normal
+    samples = _log_price_samples(initial, log_returns)
+    return (samples, regimes) if return_regimes else samples
+
+
+def create_ornstein_uhlenbeck_samples(
+    initial,
+    mean,
+    reversion_rate,
+    volatility,
+    minimum=None,
+    maximum=None,
+    timesteps=simulation.TIMESTEPS,
+    dt=simulation.DELTA_TIME,
+    runs=5,
+    seeds=None,
+) -> np.ndarray:
+    """Mean-reverting Ornstein-Uhlenbeck process, e.g. for the base fee or validator uptime
+
+    Sampled using the exact discretization, so that the samples are unbiased for any `dt`.
+
+    Args:
+        initial (float): Value at timestep 0
+        mean (float): Long-term mean the process reverts to
+        reversion_rate (float): Annualized rate of mean reversion, e.g. 365 for a half-life of ln(2) days
+        volatility (float): Annualized volatility
+        minimum (float, optional): Lower bound the samples are clipped to, e.g. 0 for the base fee
+        maximum (float, optional): Upper bound the samples are clipped to, e.g. 1 for validator uptime
+        seeds (int or array_like, optional): A master seed, or a seed for each run
+
+    Returns:
+        np.ndarray: Samples of shape (runs, timesteps + 1)
+    """
+    if reversion_rate <= 0:
+        raise ValueError("Reversion rate must be positive")
+
+    rngs = _create_rngs(runs, seeds)
+    step = dt / epochs_per_year
+    decay = np.exp(-reversion_rate * step)
+    noise = (
+        volatility
+        * np.sqrt((1 - decay ** 2) / (2 * reversion_rate))
+        * _sample(rngs, "standard_normal", size=timesteps)
+    )
+
+    samples = np.empty((runs, timesteps + 1))
+    samples[:, 0] = initial
+    for timestep in range(timesteps):
+        samples[:, timestep + 1] = (
+            mean + (samples[:, timestep] - mean) * decay + noise[:, timestep]
+        )
+    if minimum is not None or maximum is not None:
+        samples = np.clip(samples, minimum, maximum)
+    return samples
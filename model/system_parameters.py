@@ -30,17 +30,27 @@ from model.types import (
     Callable,
     Epoch,
     Stage,
+    ValidationLevel,
 )
 from model.utils import default
 from data.historical_values import (
     eth_price_mean,
     eth_block_rewards_mean,
 )
-from data.api import subgraph
+from data.api import beaconchain, client, deposit_history, etherscan
 
 
+# Fetch the live System Parameter and Initial State (see `model/state_variables.py`) API data concurrently,
+# so that a cold start is bounded by the slowest request rather than the sum
+client.prefetch(
+    deposit_history.store.sync,
+    beaconchain.get_epoch_data,
+    etherscan.get_eth_supply_data,
+)
+
+# The deposit history was synced by the prefetch, and isn't synced again if it timed out
 mean_validator_deposits_per_epoch = (
-    subgraph.get_6_month_mean_validator_deposits_per_epoch(default=3)
+    deposit_history.get_6_month_mean_validator_deposits_per_epoch(default=3, sync=False)
 )
 
 # Configure validator environment distribution
@@ -187,6 +197,24 @@ class Parameters:
     Expected Eth1/Eth2 merge date as Python datetime, after which POW is disabled and POS is enabled.
     """
 
+    # Validation parameters
+    validation_level: List[ValidationLevel] = default([ValidationLevel.FULL])
+    """
+    The level of checking of model invariants (e.g. ETH staked <= ETH supply, validator uptime >= 2/3) during simulation.
+
+    By default set to FULL, checking every invariant every timestep.
+    For production simulations set to SAMPLED, checking each invariant once up front from the System Parameters,
+    and on a sampled fraction of timesteps (see `validation_sample_rate`).
+
+    See model.types.ValidationLevel Enum for further documentation.
+    """
+
+    validation_sample_rate: List[Percentage] = default([0.01])
+    """
+    The fraction of timesteps on which invariants are checked for the SAMPLED `validation_level`,
+    sampled at a regular interval for reproducibility, starting from the first timestep.
+    """
+
     # Environmental processes
     eth_price_process: List[Callable[[Run, Timestep], ETH]] = default(
         [lambda _run, _timestep: eth_price_mean]
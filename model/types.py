@@ -44,6 +44,17 @@ class Stage(Enum):
     """Beacon Chain implemented; EIP1559 enabled; POW issuance disabled"""
 
 
+class ValidationLevel(Enum):
+    """Levels of checking of model invariants during simulation, see `model.parts.utils.validate()`"""
+
+    OFF = 1
+    """No invariant checks"""
+    SAMPLED = 2
+    """Invariants checked once up front from the System Parameters, and on a sampled fraction of timesteps"""
+    FULL = 3
+    """Invariants checked every timestep"""
+
+
 # US Dollar types
 USD = float
 USD_per_ETH = float
@@ -4,7 +4,9 @@ Misc. utility and helper functions
 
 import copy
 from dataclasses import field
-from functools import partial
+from functools import partial, wraps
+
+import numpy as np
 
 
 def _update_from_signal(
@@ -34,6 +36,110 @@ def update_from_signal(state_variable, signal_key=None):
     return partial(_update_from_signal, state_variable, signal_key)
 
 
+def freeze(value):
+    """Make a State Variable value immutable in place, without copying: Numpy arrays are set read-only"""
+    if isinstance(value, np.ndarray):
+        value.flags.writeable = False
+    return value
+
+
+def _frozen_policy(function):
+    @wraps(function)
+    def wrapper(params, substep, state_history, previous_state):
+        # Freeze the initial state at the start of each run, as radCAD deep copies it per run
+        if previous_state["timestep"] == 0:
+            for value in previous_state.values():
+                freeze(value)
+
+        signals = function(params, substep, state_history, previous_state)
+        for value in signals.values():
+            freeze(value)
+        return signals
+
+    return wrapper
+
+
+def _frozen_state_update(function):
+    # State Variables updated directly from a Policy Signal are already frozen by the Policy wrapper
+    if isinstance(function, partial) and function.func is _update_from_signal:
+        return function
+
+    @wraps(function)
+    def wrapper(params, substep, state_history, previous_state, policy_input):
+        if previous_state["timestep"] == 0:
+            for value in previous_state.values():
+                freeze(value)
+
+        state_variable, value = function(
+            params, substep, state_history, previous_state, policy_input
+        )
+        return state_variable, freeze(value)
+
+    return wrapper
+
+
+def freeze_state_update_blocks(state_update_blocks):
+    """Wrap the Policy and State Update Functions of the State Update Blocks so that State Variables are immutable
+
+    Numpy array State Variables and Policy Signals are set read-only as they are created, so that accidental
+    in-place mutation by a Policy or State Update Function (e.g. `previous_state["validator_costs"] += ...`)
+    raises a `ValueError`, rather than silently corrupting the state history. This makes it safe to disable
+    radCAD's `engine.deepcopy`, as no State Variable can be mutated, without the cost of copying the state every substep.
+
+    Args:
+        state_update_blocks (list): State Update Blocks
+
+    Returns:
+        list: A copy of the State Update Blocks with wrapped Policy and State Update Functions
+    """
+    return [
+        {
+            **block,
+            "policies": {
+                key: _frozen_policy(function)
+                for key, function in block["policies"].items()
+            },
+            "variables": {
+                key: _frozen_state_update(function)
+                for key, function in block["variables"].items()
+            },
+        }
+        for block in state_update_blocks
+    ]
+
+
+class ArrayProcess:
+    """A process with the standard `process(run, timestep)` signature, driven by an array of pre-generated samples
+
+    The samples are indexed by timestep, i.e. every `dt` epochs, rather than every epoch,
+    either a single sequence of samples used for all runs, or a sequence for each run.
+    The samples are converted to a (nested) list once, so that each lookup is a plain list index
+    returning a Python scalar, as fast as a constant process.
+
+    Args:
+        samples (array_like): Samples of shape (timesteps + 1,), or (runs, timesteps + 1) indexed by run
+        dt (int, optional): The number of epochs per timestep. Defaults to 1.
+    """
+
+    def __init__(self, samples, dt=1):
+        self.samples = np.array(samples)
+        self.samples.flags.writeable = False
+        self.dt = dt
+        self._samples = self.samples.tolist()
+        self._per_run = self.samples.ndim > 1
+
+    def __call__(self, run, timestep):
+        if self._per_run:
+            return self._samples[run - 1][timestep // self.dt]
+        return self._samples[timestep // self.dt]
+
+    def __getstate__(self):
+        return {"samples": self.samples, "dt": self.dt}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
 def local_variables(_locals):
     return {
         key: _locals[key]
@@ -0,0 +1,43 @@
+import numpy as np
+
+from experiments.adaptive_grid import AdaptiveGrid, run_adaptive_grid_analysis
+from experiments.templates.genesis_eth_price_eth_staked_grid_analysis import (
+    adaptive_bounds,
+)
+
+
+def test_adaptive_grid_refines_threshold_crossings():
+    # A circular contour at radius 0.6, with the metric varying linearly within refined cells
+    evaluate = lambda points: np.linalg.norm(points, axis=1, keepdims=True) - 0.6
+    grid = AdaptiveGrid(
+        {"x": (0, 1), "y": (0, 1)}, ["metric"], initial_divisions=4, max_depth=3
+    )
+    grid.refine(evaluate, metric="metric", thresholds=[0])
+
+    df = grid.to_dataframe()
+    exact = evaluate(df[["x", "y"]].to_numpy())[:, 0]
+
+    # A fraction of the evaluations of the full 33 x 33 lattice
+    assert len(df) == 33 * 33
+    assert df["evaluated"].sum() == len(grid.samples) < len(df) / 2
+    # Evaluated points are exact, and the contour regions match the full lattice
+    assert np.allclose(df[df.evaluated]["metric"], exact[df.evaluated])
+    assert ((df["metric"] > 0) == (exact > 0)).mean() > 0.99
+
+
+def test_adaptive_grid_analysis():
+    grid = run_adaptive_grid_analysis(
+        adaptive_bounds, thresholds=[0.1], initial_divisions=2, max_depth=2
+    )
+    df = grid.to_dataframe()
+
+    assert list(df.columns) == [
+        "run",
+        "eth_price",
+        "eth_staked",
+        "total_revenue_yields",
+        "total_profit_yields",
+        "evaluated",
+    ]
+    assert not df.isna().any().any()
+    assert (df["total_revenue_yields"] >= df["total_profit_yields"]).all()
@@ -0,0 +1,76 @@
+import threading
+import time
+
+from data.api import client
+from data.api.cache import CacheManager
+
+
+def test_cache_manager(tmp_path):
+    cache = CacheManager(tmp_path / "cache")
+    assert cache._disk is None
+    calls = []
+
+    @cache.memoize(expire=0.2, valid=bool)
+    def get_data(value):
+        calls.append(value)
+        time.sleep(0.1)
+        return {"value": value} if value else {}
+
+    assert get_data(1) == {"value": 1}
+    assert get_data(1) == {"value": 1}
+    assert calls == [1]
+    assert cache.stats()["misses"] == 1 and cache.stats()["memory_hits"] == 1
+
+    # Shared through the disk tier
+    other_cache = CacheManager(tmp_path / "cache")
+    assert other_cache.memoize(expire=0.2)(get_data.__wrapped__)(1) == {"value": 1}
+    assert other_cache.stats()["disk_hits"] == 1
+    assert calls == [1]
+
+    # Expired values are served stale while refreshed in the background
+    time.sleep(0.2)
+    start = time.time()
+    assert get_data(1) == {"value": 1}
+    assert time.time() - start < 0.1
+    assert cache.stats()["stale_hits"] == 1
+    time.sleep(0.15)
+    assert calls == [1, 1]
+    assert cache.stats()["refreshes"] == 1
+
+    # Invalid results, e.g. the default of a failed request, are cached only if there isn't a valid result
+    assert get_data(0) == {}
+    assert get_data(0) == {}
+    assert calls == [1, 1, 0]
+    assert cache.stats()["hit_rate"] == 3 / 5
+
+
+def test_cache_manager_pending(tmp_path):
+    cache = CacheManager(tmp_path / "cache")
+    calls = []
+    release = threading.Event()
+
+    @cache.memoize(expire=60, default={})
+    def get_data():
+        calls.append(None)
+        release.wait()
+        return {"value": 1}
+
+    # Concurrent requests for a value that isn't cached share a single call
+    threads = [threading.Thread(target=get_data) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+
+    # After the prefetch deadline, requests for a value still being prefetched get the default
+    release.clear()
+    cache.clear()
+    start = time.time()
+    client.prefetch(get_data, timeout=0.1)
+    assert get_data() == {}
+    assert time.time() - start < 1
+    assert len(calls) == 2 and cache.stats()["timeouts"] == 1
+    release.set()
@@ -0,0 +1,171 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import data.api.beaconchain as beaconchain
+import data.api.etherscan as etherscan
+import data.api.subgraph as subgraph
+from data.api import client
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """A local stand-in for the Beaconcha.in, Etherscan, and subgraph APIs"""
+
+    delay = 0.0
+    failures = {}
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self, body):
+        if self.failures.get(self.path, 0) > 0:
+            self.failures[self.path] -= 1
+            self.send_response(503)
+            self.end_headers()
+            return
+        time.sleep(self.delay)
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.startswith("/beaconchain/epoch/latest"):
+            self.respond(
+                {
+                    "data": {
+                        "validatorscount": 200_000,
+                        "totalvalidatorbalance": 6_400_000e9,
+                    }
+                }
+            )
+        elif self.path.startswith("/etherscan"):
+            self.respond({"status": "1", "result": "117000000000000000000000000"})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.respond(
+            {
+                "data": {
+                    "dailyDeposits": [
+                        {"id": "1", "dailyAmountDeposited": str(32e9 * 225 * 4)}
+                    ]
+                }
+            }
+        )
+
+
+@pytest.fixture
+def stub_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    monkeypatch.setattr(beaconchain, "API_URL", url + "/beaconchain")
+    monkeypatch.setattr(etherscan, "API_URL", url + "/etherscan")
+    monkeypatch.setattr(subgraph, "API_URL", url + "/subgraph")
+    monkeypatch.setenv("SUBGRAPH_API_KEY", "key")
+    monkeypatch.setattr(StubHandler, "delay", 0.0)
+    monkeypatch.setattr(StubHandler, "failures", {})
+    client.set_session(client.create_session(backoff_factor=0))
+    yield url
+    client.set_session(None)
+    server.shutdown()
+    server.server_close()
+
+
+# The uncached API requests
+get_epoch_data = beaconchain.get_epoch_data.__wrapped__
+get_eth_supply_data = etherscan.get_eth_supply_data.__wrapped__
+get_deposit_data = subgraph.get_daily_deposits
+
+
+def test_api_requests(stub_server):
+    assert get_epoch_data()["validatorscount"] == 200_000
+    assert get_eth_supply_data() == 117_000_000 * 10**18
+    assert get_deposit_data()[0]["id"] == "1"
+
+    # Server errors are retried
+    StubHandler.failures["/beaconchain/epoch/latest"] = 2
+    assert get_epoch_data()["validatorscount"] == 200_000
+    StubHandler.failures["/beaconchain/epoch/latest"] = 3
+    assert get_epoch_data() == {}
+
+
+def test_api_timeout(stub_server, monkeypatch):
+    monkeypatch.setattr(client, "timeout", (1, 0.2))
+    client.set_session(client.create_session(retries=0))
+    StubHandler.delay = 0.5
+    start = time.time()
+    assert get_eth_supply_data() is None
+    assert time.time() - start < 0.5
+
+
+def test_api_prefetch(stub_server):
+    StubHandler.delay = 0.3
+    start = time.time()
+    epoch_data, eth_supply, deposit_data = client.prefetch(
+        get_epoch_data, get_eth_supply_data, get_deposit_data
+    )
+    # Bounded by the slowest request, rather than the sum
+    assert time.time() - start < 0.6
+    assert epoch_data["validatorscount"] == 200_000
+    assert eth_supply == 117_000_000 * 10**18
+    assert deposit_data
+
+
+def test_api_prefetch_timeout():
+    # A function blocked beyond the request timeouts, e.g. on DNS resolution, doesn't block prefetching
+    release = threading.Event()
+    start = time.time()
+    blocked, result = client.prefetch(release.wait, lambda: 1, timeout=0.2)
+    assert time.time() - start < 1
+    assert blocked is None
+    assert result == 1
+    release.set()
+
+
+def test_model_import_stalled_requests(tmp_path):
+    # Importing the model with an empty cache, while requests are stalled beyond the prefetch deadline,
+    # e.g. on DNS resolution, which the request timeouts don't bound,
+    # falls back to the defaults rather than requesting the data again
+    script = """
+import os, time
+
+import requests
+
+requests.Session.request = lambda *args, **kwargs: time.sleep(60)
+start = time.time()
+import model.state_variables as state_variables
+
+print(time.time() - start, state_variables.number_of_active_validators, flush=True)
+# The stalled prefetch threads would otherwise be joined on exit
+os._exit(0)
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        env={
+            **os.environ,
+            "API_PREFETCH_TIMEOUT": "1",
+            "API_CACHE_DIRECTORY": str(tmp_path),
+            "SUBGRAPH_API_KEY": "key",
+        },
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+    duration, number_of_active_validators = result.stdout.split()
+    # Bounded by the prefetch deadline, and the import of the model and datasets
+    assert float(duration) < 10
+    assert int(number_of_active_validators) == 156_250
@@ -0,0 +1,45 @@
+import subprocess
+import sys
+from copy import deepcopy
+
+import pandas as pd
+import pytest
+
+from experiments.templates.monte_carlo_analysis import experiment
+from model.bundle import load_bundle, save_bundle
+
+
+def test_bundle(tmp_path):
+    path = str(tmp_path / "experiment.bundle")
+    experiment_copy = deepcopy(experiment)
+    experiment_copy.simulations[0].timesteps = 20
+    experiment_copy.simulations[0].runs = 2
+    experiment_copy.simulations[0].model.params.update({"BASE_REWARD_FACTOR": [32, 64]})
+    save_bundle(experiment_copy, path)
+    assert (
+        "eth_staked_process_enabled" not in experiment_copy.simulations[0].model.params
+    )
+
+    df = pd.DataFrame(experiment_copy.run())
+    df_bundle = pd.DataFrame(load_bundle(path).run())
+    pd.testing.assert_frame_equal(
+        df_bundle.drop(columns=["timestamp"]), df.drop(columns=["timestamp"])
+    )
+
+    # Loading a bundle in a new process doesn't import the data layer
+    script = f"""
+import sys
+from model.bundle import load_bundle
+experiment = load_bundle({path!r})
+experiment.run()
+assert not [module for module in sys.modules if module.split(".")[0] == "data" or module == "model.system_parameters"]
+"""
+    subprocess.run([sys.executable, "-c", script], check=True)
+
+    # A bundle saved with a different model version can't be loaded
+    with open(path, "rb") as file:
+        content = file.read()
+    with open(path, "wb") as file:
+        file.write(content.replace(b"1.1.7", b"0.0.0"))
+    with pytest.raises(ValueError, match="model_version"):
+        load_bundle(path)
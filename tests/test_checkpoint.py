@@ -0,0 +1,44 @@
+import os
+from copy import deepcopy
+
+import pandas as pd
+
+import experiments.default_experiment as base
+from experiments.checkpoint import load_checkpoint, run_checkpointed
+from experiments.templates.monte_carlo_analysis import experiment as monte_carlo_experiment
+
+
+def test_checkpoint_resume(tmp_path):
+    experiment = deepcopy(monte_carlo_experiment)
+    experiment.simulations[0].timesteps = 25
+    experiment.simulations[0].runs = 2
+    expected = pd.DataFrame(deepcopy(experiment).run())
+
+    directory = str(tmp_path / "checkpoint")
+    results = run_checkpointed(experiment, directory, interval=10)
+    pd.testing.assert_frame_equal(pd.DataFrame(results), expected)
+
+    # Simulate a crash of the second run after its first checkpoint
+    run_directory = os.path.join(directory, "run-1")
+    os.remove(os.path.join(run_directory, "done.pickle"))
+    for segment in sorted(os.listdir(run_directory))[1:]:
+        os.remove(os.path.join(run_directory, segment))
+
+    resumed = load_checkpoint(directory)
+    results = run_checkpointed(resumed, directory)
+    pd.testing.assert_frame_equal(pd.DataFrame(results), expected)
+    assert len(os.listdir(run_directory)) == 4
+
+
+def test_checkpoint_configuration_changed(tmp_path):
+    simulation = deepcopy(base.experiment.simulations[0])
+    simulation.timesteps = 5
+    directory = str(tmp_path / "checkpoint")
+    run_checkpointed(simulation, directory)
+
+    simulation.model.params.update({"BASE_REWARD_FACTOR": [128]})
+    try:
+        run_checkpointed(simulation, directory)
+        assert False, "Expected a ValueError"
+    except ValueError:
+        pass
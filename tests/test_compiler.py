@@ -0,0 +1,93 @@
+import pandas as pd
+import pytest
+from copy import deepcopy
+
+import experiments.default_experiment as base
+from model.compiler import compile_simulation
+
+
+def test_compile_simulation():
+    simulation = deepcopy(base.experiment.simulations[0])
+    simulation.timesteps = 10
+
+    # Driven by the validator process, and ETH staked process for the second subset
+    simulation.model.params.update(
+        {
+            "eth_staked_process": [
+                lambda _run, _timestep: None,
+                lambda _run, _timestep: 33e6,
+            ]
+        }
+    )
+    uncompiled_simulation = deepcopy(simulation)
+    uncompiled_simulation.before_experiment = None
+    uncompiled_simulation.model.params.pop("eth_staked_process_enabled", None)
+    df_uncompiled = pd.DataFrame(uncompiled_simulation.run())
+    assert "eth_staked_process_enabled" not in uncompiled_simulation.model.params
+
+    compile_simulation(simulation)
+    assert simulation.model.params["eth_staked_process_enabled"] == [False, True]
+    block_variables = [
+        block["variables"] for block in simulation.model.state_update_blocks
+    ]
+    assert block_variables.index(
+        next(
+            variables
+            for variables in block_variables
+            if "validator_uptime" in variables
+        )
+    ) < block_variables.index(
+        next(variables for variables in block_variables if "eth_staked" in variables)
+    )
+
+    df_compiled = pd.DataFrame(simulation.run())
+    pd.testing.assert_frame_equal(
+        df_compiled.drop(columns=["timestamp"]),
+        df_uncompiled.drop(columns=["timestamp"]),
+    )
+    assert (
+        df_compiled.query("subset == 1 and timestep > 0")["eth_staked"] == 33e6
+    ).all()
+
+    # Driven by the ETH staked process for all subsets, the Ethereum block precedes the validator block
+    simulation.model.params.update(
+        {"eth_staked_process": [lambda _run, _timestep: 33e6]}
+    )
+    compile_simulation(simulation)
+    assert simulation.model.params["eth_staked_process_enabled"] == [True]
+    assert "eth_staked" in simulation.model.state_update_blocks[1]["variables"]
+    df_staked = pd.DataFrame(simulation.run())
+    pd.testing.assert_frame_equal(
+        df_staked.drop(columns=["timestamp"]).reset_index(drop=True),
+        df_compiled.query("subset == 1")
+        .assign(subset=0)
+        .drop(columns=["timestamp"])
+        .reset_index(drop=True),
+    )
+
+
+def test_compile_simulation_run():
+    original_simulation = deepcopy(base.experiment.simulations[0])
+    original_simulation.model.params.pop("eth_staked_process_enabled", None)
+
+    # A copy of the default simulation compiles itself when run directly, rather than the original
+    simulation = deepcopy(original_simulation)
+    simulation.timesteps = 1
+    simulation.model.params.update(
+        {"eth_staked_process": [lambda _run, _timestep: 33e6]}
+    )
+    simulation.run()
+    assert simulation.model.params["eth_staked_process_enabled"] == [True]
+    assert "eth_staked_process_enabled" not in original_simulation.model.params
+
+
+def test_compile_invalid_parameters():
+    simulation = deepcopy(base.experiment.simulations[0])
+
+    simulation.model.params.update({"BASE_REWARD_FACTOR": [64, 64.5]})
+    with pytest.raises(TypeError, match=r"BASE_REWARD_FACTOR \(subset 1\)"):
+        compile_simulation(simulation)
+
+    simulation.model.params.update({"BASE_REWARD_FACTOR": [64], "dt": [0]})
+    with pytest.raises(ValueError, match="dt"):
+        compile_simulation(simulation)
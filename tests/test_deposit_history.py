@@ -0,0 +1,102 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+import pytest
+
+import data.api.subgraph as subgraph
+from data.api.deposit_history import DepositHistoryStore
+
+# Two validators deposited on day i
+deposits = [
+    {"id": str(18000 + i), "dailyAmountDeposited": str(2 * 32e9 * i)}
+    for i in range(2000)
+]
+
+
+class GraphQLHandler(BaseHTTPRequestHandler):
+    """A local stand-in for the deposits subgraph, serving the `dailyDeposits` query"""
+
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        variables = json.loads(self.rfile.read(int(self.headers["Content-Length"])))[
+            "variables"
+        ]
+        self.requests.append(variables)
+        page = [record for record in deposits if record["id"] > variables["after"]][
+            : variables["first"]
+        ]
+        data = json.dumps({"data": {"dailyDeposits": page}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def graphql_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GraphQLHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(subgraph, "API_URL", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setenv("SUBGRAPH_API_KEY", "key")
+    monkeypatch.setattr(GraphQLHandler, "requests", [])
+    yield
+    server.shutdown()
+    server.server_close()
+
+
+def test_deposit_history(graphql_server, tmp_path):
+    path = tmp_path / "deposit_history.jsonl"
+    store = DepositHistoryStore(path=str(path))
+
+    # The first sync paginates through the full history
+    assert store.sync() == 2000
+    assert len(GraphQLHandler.requests) == 3
+    assert store.high_water_mark == "19999"
+
+    # Later syncs are throttled, and only fetch the last stored (partial) day and the days after it
+    assert store.sync() == 0
+    deposits[-1] = {"id": "19999", "dailyAmountDeposited": str(2 * 32e9 * 2000)}
+    deposits.append({"id": "20000", "dailyAmountDeposited": str(2 * 32e9 * 2000)})
+    try:
+        assert DepositHistoryStore(path=str(path)).sync(force=True) == 1
+    finally:
+        deposits.pop()
+        deposits[-1] = {"id": "19999", "dailyAmountDeposited": str(2 * 32e9 * 1999)}
+    assert len(GraphQLHandler.requests) == 4
+    assert GraphQLHandler.requests[-1]["after"] == "19998"
+
+    store = DepositHistoryStore(path=str(path))
+    assert len(store.records) == 2001
+    assert store.mean_validator_deposits_per_epoch(days=1) == 2 * 2000 / 225
+    # The partial day is replaced by the complete day
+    assert store.records[-2] == {
+        "id": "19999",
+        "dailyAmountDeposited": str(2 * 32e9 * 2000),
+    }
+    assert store.mean_validator_deposits_per_epoch(days=2) == 2 * 2000 / 225
+    rolling_mean = store.rolling_mean_validator_deposits_per_epoch(days=3)
+    assert len(rolling_mean) == 1999
+    np.testing.assert_allclose(rolling_mean[-1], 2 * (1998 + 2000 + 2000) / 3 / 225)
+
+    # A partially written record is discarded
+    with open(path, "a") as file:
+        file.write('{"id": "20001", "dailyAm')
+    assert len(DepositHistoryStore(path=str(path)).records) == 2001
+    assert path.read_text().endswith("\n")
+
+
+def test_deposit_history_without_api_key(graphql_server, tmp_path, monkeypatch):
+    monkeypatch.delenv("SUBGRAPH_API_KEY")
+    store = DepositHistoryStore(path=str(tmp_path / "deposit_history.jsonl"))
+
+    # The store isn't marked as synced, so that it's synced as soon as the API key is configured
+    assert store.sync() == 0
+    assert store._synced_at() == 0
+    monkeypatch.setenv("SUBGRAPH_API_KEY", "key")
+    assert store.sync() == 2000
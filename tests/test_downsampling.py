@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import pytest
+
+import experiments.notebooks.visualizations.downsampling as downsampling
+from experiments.notebooks.visualizations.downsampling import (
+    downsample_figure,
+    downsample_indices,
+    lttb_indices,
+    minmax_indices,
+)
+
+
+def create_series(n=10_000):
+    """A noisy daily series, with its global extrema away from the bucket edges"""
+    x = pd.date_range("2021/08/01", periods=n, freq="D")
+    y = np.sin(np.arange(n) / 200) + np.random.default_rng(1).normal(0, 0.1, n)
+    y[1234] = 10
+    y[5678] = -10
+    return x, y
+
+
+def test_lttb_indices():
+    x, y = create_series()
+    x = np.arange(len(y), dtype=float)
+    indices = lttb_indices(x, y, 500)
+    assert len(indices) == 500
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+    assert np.all(np.diff(indices) > 0)
+    # The largest triangles include the spikes
+    assert {1234, 5678} <= set(indices)
+
+
+def test_minmax_indices():
+    _x, y = create_series()
+    indices = minmax_indices(y, 500)
+    assert len(indices) == 500
+    # The minimum and maximum of each bucket are kept
+    bucket_edges = np.linspace(0, len(y), 250 + 1).astype(int)
+    for start, end in zip(bucket_edges[:-1], bucket_edges[1:]):
+        bucket = indices[(indices >= start) & (indices < end)]
+        assert y[bucket].min() == y[start:end].min()
+        assert y[bucket].max() == y[start:end].max()
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_downsample_indices(method):
+    x, y = create_series()
+    n = len(y)
+    # Stage transitions between two days, such as `date_eip1559` and `date_pos`
+    preserve_x = [x[3333] + pd.Timedelta(hours=12), x[7777] + pd.Timedelta(hours=12)]
+
+    indices = downsample_indices(x, y, 500, method=method, preserve_x=preserve_x)
+
+    # Within the point budget, plus the preserved points
+    assert len(indices) <= 500 + 8
+    assert np.all(np.diff(indices) > 0)
+    assert {0, n - 1, int(np.argmin(y)), int(np.argmax(y))} <= set(indices)
+    assert {3333, 3334, 7777, 7778} <= set(indices)
+
+    # Series within the budget aren't downsampled
+    np.testing.assert_array_equal(
+        downsample_indices(x, y, n, method=method), np.arange(n)
+    )
+    with pytest.raises(ValueError):
+        downsample_indices(x, y, 500, method="invalid")
+
+
+def test_downsample_figure_preserves_points():
+    x, y = create_series()
+    preserve_x = [x[3333] + pd.Timedelta(hours=12)]
+    fig = go.Figure(go.Scatter(x=x, y=y))
+
+    downsample_figure(fig, max_points=500, preserve_x=preserve_x)
+
+    points = pd.to_datetime(fig.data[0].x)
+    assert len(points) < len(x)
+    assert {x[0], x[-1], x[1234], x[5678], x[3333], x[3334]} <= set(points)
+
+
+def test_downsample_figure_point_budget(monkeypatch):
+    x, y = create_series()
+
+    # The default point budget is configurable
+    monkeypatch.setattr(downsampling, "max_points_per_trace", 200)
+    fig = downsample_figure(go.Figure(go.Scatter(x=x, y=y)))
+    assert len(fig.data[0].x) <= 200 + 4
+
+    # and downsampling can be disabled
+    monkeypatch.setattr(downsampling, "max_points_per_trace", None)
+    fig = downsample_figure(go.Figure(go.Scatter(x=x, y=y)))
+    assert len(fig.data[0].x) == len(x)
+
+
+def test_downsample_figure_groups_traces_by_exact_x():
+    n = 10_000
+    x_1 = np.linspace(0, 1, n)
+    # Same length and endpoints, but different x-values
+    x_2 = x_1**2
+    fig = go.Figure(
+        [
+            go.Scatter(x=x_1, y=np.sin(x_1 * 50)),
+            go.Scatter(x=x_2, y=np.cos(x_2 * 50)),
+        ]
+    )
+
+    downsample_figure(fig, max_points=500)
+
+    for trace, function in zip(fig.data, [np.sin, np.cos]):
+        assert len(trace.x) < n
+        np.testing.assert_allclose(trace.y, function(np.asarray(trace.x) * 50))
+
+
+def test_downsample_figure_slices_per_point_properties():
+    n = 10_000
+    x = np.arange(n)
+    fig = go.Figure(
+        go.Scatter(
+            x=x,
+            y=np.sin(x / 100),
+            customdata=np.stack([x, x * 2], axis=1),
+            text=[f"point {i}" for i in x],
+            hovertext=[f"hover {i}" for i in x],
+            marker=dict(size=x % 10, color="red"),
+            name="series",
+        )
+    )
+
+    downsample_figure(fig, max_points=500)
+
+    trace = fig.data[0]
+    points = np.asarray(trace.x)
+    assert len(points) < n
+    np.testing.assert_array_equal(
+        np.asarray(trace.customdata), np.stack([points, points * 2], axis=1)
+    )
+    assert list(trace.text) == [f"point {i}" for i in points]
+    assert list(trace.hovertext) == [f"hover {i}" for i in points]
+    np.testing.assert_array_equal(trace.marker.size, points % 10)
+    # Scalar properties are unchanged
+    assert trace.marker.color == "red"
+    assert trace.name == "series"
@@ -4,6 +4,7 @@ import pandas as pd
 from radcad import Simulation
 
 import experiments.default_experiment as base
+import model.parts.utils.ethereum_spec as spec
 from model.constants import epochs_per_year
 
 def test_dt():
@@ -117,3 +118,42 @@ def test_eip1559_experiment():
 
     assert df.query("subset == 0")["total_priority_fee_to_validators"].max() == 0
     assert df.query("subset == 1")["total_priority_fee_to_validators"].max() != 0
+
+
+def test_derived_quantity_cache():
+    simulation: Simulation = deepcopy(base.experiment.simulations[0])
+    simulation.timesteps = 10
+
+    spec.get_total_active_balance.cache_clear()
+    simulation.run()
+
+    # Total active balance is derived once per timestep and shared between Policy and State Update Functions
+    cache_info = spec.get_total_active_balance.cache_info()
+    assert cache_info["misses"] == simulation.timesteps
+    assert cache_info["hits"] > 0
+
+    # Cache is invalidated when an input State Variable changes
+    state = {"eth_staked": 1_000_000, "number_of_active_validators": 100_000}
+    params = simulation.model.params
+    params = {key: value[0] for key, value in params.items()}
+    total_active_balance = spec.get_total_active_balance(params, state)
+    state["eth_staked"] = 2_000_000
+    assert spec.get_total_active_balance(params, state) == 2 * total_active_balance
+
+
+def test_derived_quantity_cache_threads():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from model.parts.utils import derived_quantity
+
+    @derived_quantity(params_keys=["factor"], state_keys=["value"])
+    def product(params, state):
+        return params["factor"] * state["value"]
+
+    # Simulations running concurrently on threads share the cache, and must never read another key's value
+    def check(value):
+        for _ in range(1000):
+            assert product({"factor": 2}, {"value": value}) == 2 * value
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(check, range(4)))
@@ -0,0 +1,79 @@
+import threading
+import pytest
+from copy import deepcopy
+from radcad import Simulation
+
+import experiments.default_experiment as base
+from experiments.jobs import JobManager, JobCancelled, add_job_progress_block
+
+
+def test_job_coalescing_and_superseding():
+    job_manager = JobManager(max_workers=2)
+    release = threading.Event()
+    calls = []
+
+    def blocking_job(job):
+        calls.append(job.key)
+        while True:
+            job.check_cancelled()
+            if release.wait(0.01):
+                return job.key
+
+    # Identical concurrent requests from different sessions are coalesced into a single job
+    job_1 = job_manager.submit("scenario-1", blocking_job, group="session-a")
+    assert job_manager.submit("scenario-1", blocking_job, group="session-b") is job_1
+
+    # Session A moves on, but session B is still waiting on scenario 1
+    job_2 = job_manager.submit("scenario-2", blocking_job, group="session-a")
+    assert not job_1.cancelled
+
+    # Session B moves on, so scenario 1 is superseded and cancelled
+    job_manager.submit("scenario-2", blocking_job, group="session-b")
+    assert job_1.cancelled
+
+    with pytest.raises(JobCancelled):
+        job_1.result(timeout=10)
+
+    release.set()
+    assert job_2.result(timeout=10) == "scenario-2"
+    assert calls == ["scenario-1", "scenario-2"]
+    job_manager.shutdown()
+
+
+def test_failed_job_retry():
+    job_manager = JobManager(max_workers=1)
+    attempts = []
+
+    def flaky_job(job):
+        attempts.append(job.key)
+        if len(attempts) == 1:
+            raise ConnectionError("Transient failure")
+        return job.key
+
+    job_1 = job_manager.submit("scenario", flaky_job)
+    with pytest.raises(ConnectionError):
+        job_1.result(timeout=10)
+
+    # The poller receives the failed job, and the next submission retries it
+    assert job_manager.submit("scenario", flaky_job) is job_1
+    job_2 = job_manager.submit("scenario", flaky_job)
+    assert job_2 is not job_1
+    assert job_2.result(timeout=10) == "scenario"
+    assert attempts == ["scenario", "scenario"]
+    job_manager.shutdown()
+
+
+def test_simulation_job_progress():
+    simulation: Simulation = deepcopy(base.experiment.simulations[0])
+    simulation.timesteps = 10
+    job_manager = JobManager(max_workers=1)
+
+    job = job_manager.submit(
+        "simulation", lambda job: add_job_progress_block(simulation, job).run()
+    )
+    results = job.result(timeout=60)
+
+    assert job.progress == 1.0
+    assert job.status == "done"
+    assert len(results) == simulation.timesteps + 1
+    job_manager.shutdown()
@@ -40,7 +40,8 @@ def test_lint_parameters():
     model_modules = inspect.getmembers(model.parts, inspect.ismodule) + inspect.getmembers(model.parts.utils, inspect.ismodule)
 
     consts = [
-        function.__code__.co_consts
+        # Unwrap decorated functions, e.g. memoized derived quantities
+        inspect.unwrap(function).__code__.co_consts
         for (_key, module) in model_modules
         # Get all functions in module
         for (_key, function) in inspect.getmembers(module, inspect.isfunction)
@@ -6,6 +6,8 @@ from pandas._testing import assert_frame_equal
 from radcad import Simulation
 
 import experiments.templates.time_domain_analysis as time_domain_analysis
+from model.state_update_blocks import state_update_blocks
+from model.utils import freeze_state_update_blocks
 
 
 def test_deepcopy():
@@ -24,3 +26,47 @@ def test_deepcopy():
 
     assert exec_time_1 > exec_time_2
     assert_frame_equal(df_1, df_2)
+
+
+def test_frozen_state():
+    simulation: Simulation = deepcopy(time_domain_analysis.experiment.simulations[0])
+    simulation.timesteps = 10
+    simulation.engine.deepcopy = False
+
+    def policy_mutate_validator_costs(params, substep, state_history, previous_state):
+        validator_costs = previous_state["validator_costs"]
+        validator_costs += 1
+        return {}
+
+    simulation.model.state_update_blocks = simulation.model.state_update_blocks + freeze_state_update_blocks([
+        {
+            "policies": {"mutate": policy_mutate_validator_costs},
+            "variables": {},
+        }
+    ])
+
+    # In-place mutation of State Variables raises an exception rather than corrupting the state history
+    with pytest.raises(ValueError, match="read-only"):
+        simulation.run()
+
+
+def test_frozen_state_performance():
+    simulation_1: Simulation = deepcopy(time_domain_analysis.experiment.simulations[0])
+    simulation_2: Simulation = deepcopy(time_domain_analysis.experiment.simulations[0])
+    simulation_2.model.state_update_blocks = state_update_blocks
+
+    # The frozen model is run without deepcopy, and without copies of the state
+    simulation_1.engine.deepcopy = False
+    simulation_2.engine.deepcopy = False
+
+    def run(simulation):
+        simulation = deepcopy(simulation)
+        start_time = time.time()
+        results = simulation.run()
+        return time.time() - start_time, pd.DataFrame(results)
+
+    exec_time_1, df_1 = min((run(simulation_1) for _ in range(3)), key=lambda result: result[0])
+    exec_time_2, df_2 = min((run(simulation_2) for _ in range(3)), key=lambda result: result[0])
+
+    assert exec_time_1 < exec_time_2 * 1.5
+    assert_frame_equal(df_1, df_2)
@@ -0,0 +1,39 @@
+from copy import deepcopy
+import pandas as pd
+
+import experiments.default_experiment as base
+from experiments.post_processing import post_process
+
+
+def test_lazy_metrics():
+    simulation = deepcopy(base.experiment.simulations[0])
+    simulation.timesteps = 10
+    df = pd.DataFrame(simulation.run())
+    parameters = simulation.model.params
+
+    df_eager = post_process(df.copy(), parameters=parameters)
+    df_lazy = post_process(df.copy(), parameters=parameters, metrics=[])
+
+    # Only the accessed metrics and their dependencies are computed
+    assert "supply_inflation_pct" not in df_lazy.columns
+    pd.testing.assert_series_equal(
+        df_lazy.metrics["supply_inflation_pct"], df_eager["supply_inflation_pct"]
+    )
+    assert "supply_inflation_pct" in df_lazy.columns
+    assert "total_revenue_yields_pct" not in df_lazy.columns
+
+    pd.testing.assert_series_equal(
+        df_lazy.metrics["cumulative_profit_yields_pct"],
+        df_eager["cumulative_profit_yields_pct"],
+    )
+    assert "daily_profit_yields_pct" in df_lazy.columns
+    assert "diy_hardware_costs" not in df_lazy.columns
+
+    # Selected metrics
+    df_selected = post_process(
+        df.copy(), parameters=parameters, metrics=["diy_hardware_profit_yields_pct"]
+    )
+    assert {"diy_hardware_profit_yields_pct", "pool_staas_profit_yields"} <= set(
+        df_selected.columns
+    )
+    assert "pool_staas_revenue_yields" not in df_selected.columns
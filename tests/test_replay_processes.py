@@ -0,0 +1,33 @@
+import pickle
+from copy import deepcopy
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import experiments.default_experiment as base
+from model.replay_processes import create_replay_processes
+
+
+def test_replay_processes():
+    date_start = datetime(2021, 1, 1)
+    parameter_overrides = create_replay_processes(date_start, timesteps=30, dt=225)
+
+    df_price = pd.read_csv("data/ether_price.csv").set_index("Date(UTC)")
+    eth_price_process = parameter_overrides["eth_price_process"][0]
+    assert eth_price_process(1, 0) == df_price.loc["1/1/2021", "Value"]
+    assert eth_price_process(2, 30 * 225) == df_price.loc["1/31/2021", "Value"]
+    assert isinstance(eth_price_process(1, 225), float)
+    assert pickle.loads(pickle.dumps(eth_price_process))(1, 225) == eth_price_process(
+        1, 225
+    )
+
+    simulation = deepcopy(base.experiment.simulations[0])
+    simulation.timesteps = 30
+    simulation.model.params.update(parameter_overrides)
+    df = pd.DataFrame(simulation.run())
+    np.testing.assert_array_equal(
+        df["eth_price"].iloc[1:],
+        [eth_price_process(1, timestep * 225) for timestep in range(1, 31)],
+    )
+    assert parameter_overrides["mev_per_block"][0] > 0
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from copy import deepcopy
+
+import experiments.default_experiment as base
+from experiments.result_cube import ResultCube
+
+
+def test_result_cube():
+    simulation = deepcopy(base.experiment.simulations[0])
+    simulation.timesteps = 10
+    simulation.runs = 2
+    simulation.engine.drop_substeps = True
+    simulation.model.params.update({"BASE_REWARD_FACTOR": [32, 64]})
+    df = pd.DataFrame(simulation.run())
+
+    cube = ResultCube.from_dataframe(df, parameters=simulation.model.params)
+    assert cube["eth_supply"].shape == (2, 2, 11)
+    assert cube["validator_profit_yields"].shape == (2, 2, 11, 7)
+    assert list(cube.subset_params["BASE_REWARD_FACTOR"]) == [32, 64]
+
+    # Slicing by swept parameter value is a view of the cube
+    view = cube.sel(timestep=5, BASE_REWARD_FACTOR=64)
+    assert view["eth_supply"].shape == (2,)
+    assert np.shares_memory(view["eth_supply"], cube["eth_supply"])
+    expected = df.query("timestep == 5 and subset == 1").sort_values("run")
+    assert np.array_equal(view["eth_supply"], expected["eth_supply"])
+
+    environment = cube.sel(validator_environment="diy_hardware")
+    assert np.array_equal(
+        environment["validator_profit_yields"],
+        cube["validator_profit_yields"][..., 0],
+    )
+
+    # Round trip to the long-form DataFrame
+    df_round_trip = cube.to_dataframe()[df.columns]
+    df_sorted = df.sort_values(["subset", "run", "timestep"]).reset_index(drop=True)
+    pd.testing.assert_frame_equal(
+        df_round_trip.drop(columns=["validator_profit_yields"]),
+        df_sorted.drop(columns=["validator_profit_yields"]),
+        check_dtype=False,
+    )
+    assert all(
+        np.array_equal(a, np.ravel(b))
+        for a, b in zip(
+            df_round_trip["validator_profit_yields"],
+            df_sorted["validator_profit_yields"],
+        )
+    )
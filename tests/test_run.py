@@ -1,4 +1,8 @@
-from experiments.run import run
+import json
+import pandas as pd
+import pytest
+
+from experiments.run import run, main
 
 
 def test_run():
@@ -8,3 +12,31 @@ def test_run():
 
     _results, _exceptions = run()
     assert True
+
+
+def test_run_cli(tmp_path):
+    """
+    Check that the command-line runner writes the results and a JSON run report
+    """
+    output = tmp_path / "results.csv"
+    report_path = tmp_path / "report.json"
+    main(["--timesteps", "10", "--runs", "2", "--output", str(output), "--report", str(report_path)])
+
+    report = json.loads(report_path.read_text())
+    assert set(report["durations"]) == {"import", "process_generation", "simulation", "post_processing", "write", "total"}
+    assert report["results"]["rows"] == 20
+    assert len(pd.read_csv(output)) == 20
+
+
+def test_run_cli_invalid_format(tmp_path, monkeypatch):
+    """
+    Check that an invalid results format is reported before the experiment is run
+    """
+    import experiments.run
+
+    def run(*args, **kwargs):
+        raise AssertionError("Experiment run before checking the results format")
+
+    monkeypatch.setattr(experiments.run, "run", run)
+    with pytest.raises(ValueError):
+        main(["--timesteps", "10", "--output", str(tmp_path / "results.txt")])
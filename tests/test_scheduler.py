@@ -0,0 +1,101 @@
+import time
+from copy import deepcopy
+
+import pandas as pd
+
+from experiments.scheduler import plan_experiments, run_experiments
+from experiments.templates.monte_carlo_analysis import experiment
+from experiments.worker_pool import WorkerPool
+
+
+def create_experiments():
+    experiment_copy = deepcopy(experiment)
+    experiment_copy.simulations[0].timesteps = 5
+    experiment_copy.simulations[0].runs = 2
+
+    sweep = deepcopy(experiment_copy)
+    sweep.simulations[0].model.params.update({"BASE_REWARD_FACTOR": [32, 64]})
+    # Identical to the second subset of the sweep
+    single = deepcopy(experiment_copy)
+    single.simulations[0].model.params.update({"BASE_REWARD_FACTOR": [64]})
+    return {"sweep": sweep, "single": single}
+
+
+def test_plan_experiments():
+    plan, jobs = plan_experiments(create_experiments(), priorities={"single": 1})
+
+    # The runs of the single simulation are shared with the sweep
+    assert len(plan) == 4
+    assert len(jobs["sweep"]) == 4
+    assert len(jobs["single"]) == 2
+    assert {index for index, _ in jobs["single"]} <= {
+        index for index, _ in jobs["sweep"]
+    }
+    # Shared runs take the highest priority
+    assert [priority for priority, _, _ in plan] == [1, 1, 0, 0]
+
+
+def test_run_experiments():
+    experiments = create_experiments()
+    expected = {
+        key: pd.DataFrame(deepcopy(executable).run())
+        for key, executable in experiments.items()
+    }
+
+    with WorkerPool(processes=2) as pool:
+        completed = list(
+            run_experiments(experiments, priorities={"single": 1}, pool=pool)
+        )
+        assert pool.utilisation()["tasks"] == 4
+
+    assert [key for key, _ in completed] == ["single", "sweep"]
+    for key, executable in completed:
+        assert executable is experiments[key]
+        pd.testing.assert_frame_equal(
+            pd.DataFrame(executable.results).drop(columns=["timestamp"]),
+            expected[key].drop(columns=["timestamp"]),
+        )
+
+
+def test_plan_experiments_closures():
+    def create_process(value):
+        return lambda _run, _timestep: value
+
+    experiments = create_experiments()
+    for executable, eth_price in zip(experiments.values(), [1000, 2000]):
+        executable.simulations[0].model.params.update(
+            {
+                "BASE_REWARD_FACTOR": [64],
+                "eth_price_process": [create_process(eth_price)],
+            }
+        )
+
+    # Processes differing only in their captured values aren't deduplicated
+    plan, _jobs = plan_experiments(experiments)
+    assert len(plan) == 4
+
+
+def test_run_experiments_stopped():
+    experiments = create_experiments()
+    experiments["single"].simulations[0].timesteps = 1
+    # Several seconds of runs, with processes defined beyond the pre-generated samples
+    sweep = experiments["sweep"].simulations[0]
+    sweep.timesteps = 5000
+    sweep.runs = 5
+    sweep.model.params.update(
+        {
+            "eth_price_process": [lambda _run, _timestep: 2000],
+            "validator_process": [lambda _run, _timestep: 3],
+            "validator_uptime_process": [lambda _run, _timestep: 0.98],
+        }
+    )
+
+    completed = run_experiments(experiments, priorities={"single": 1}, processes=1)
+    key, _ = next(completed)
+    assert key == "single"
+
+    # The queued runs are abandoned once the caller stops iterating, rather than waited for
+    start_time = time.time()
+    completed.close()
+    assert time.time() - start_time < 1
+    assert not experiments["sweep"].results
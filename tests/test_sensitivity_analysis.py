@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+from copy import deepcopy
+
+import experiments.default_experiment as base
+import experiments.sensitivity_analysis as sensitivity_analysis
+from experiments.utils import fingerprint
+
+
+problem = {
+    "BASE_REWARD_FACTOR": (32, 128),
+    "slashing_events_per_1000_epochs": (0, 10),
+    "validator_hardware_costs_per_epoch": (0.5, 2),
+}
+outputs = ["total_profit_yields", "supply_inflation"]
+
+
+@pytest.fixture
+def simulation():
+    simulation = deepcopy(base.experiment.simulations[0])
+    simulation.timesteps = 5
+    return simulation
+
+
+def test_sobol_analysis(simulation):
+    df = sensitivity_analysis.sobol_analysis(
+        problem, outputs, samples=32, simulation=simulation, use_cache=False
+    )
+
+    assert list(df.columns) == ["S1", "S1_conf", "ST", "ST_conf"]
+    assert len(df) == len(problem) * len(outputs)
+    # The base reward factor dominates the variance of validator yields and supply inflation
+    for output in outputs:
+        assert df.loc[output]["ST"].idxmax() == "BASE_REWARD_FACTOR"
+    assert (df["ST_conf"] >= 0).all()
+
+
+def test_evaluation_cache(simulation, monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        sensitivity_analysis, "cache", sensitivity_analysis.diskcache.Cache(tmp_path)
+    )
+    unit_samples = np.random.default_rng(1).random((4, len(problem)))
+
+    y = sensitivity_analysis.evaluate(problem, unit_samples, outputs, simulation=simulation)
+    assert y.shape == (4, len(outputs))
+
+    # Cached evaluations don't run the model
+    def run_batch(*args):
+        raise AssertionError("Expected cached evaluations")
+
+    monkeypatch.setattr(sensitivity_analysis, "_run_batch", run_batch)
+    assert np.array_equal(
+        sensitivity_analysis.evaluate(problem, unit_samples, outputs, simulation=simulation), y
+    )
+
+
+def test_fingerprint_includes_process_data():
+    samples = np.arange(3)
+    process = lambda run, timestep: samples[run]
+
+    before = fingerprint({"eth_price_process": [process]})
+    assert before == fingerprint({"eth_price_process": [process]})
+    samples[0] = 100
+    assert before != fingerprint({"eth_price_process": [process]})
+
+
+def test_fingerprint_closures_differing_in_captured_values():
+    def make(value):
+        return lambda run, timestep: value
+
+    # The IDs of temporary objects visited while fingerprinting one closure must not be mistaken for those of another
+    assert fingerprint([make(0), make(1)]) != fingerprint([make(0), make(2)])
+    assert fingerprint({"x": [make(0)], "y": [make(5)]}) != fingerprint(
+        {"x": [make(0)], "y": [make(6)]}
+    )
+    assert fingerprint(make(1)) != fingerprint(make(2))
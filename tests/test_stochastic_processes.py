@@ -0,0 +1,126 @@
+import numpy as np
+import pytest
+
+from model.constants import epochs_per_year
+from model.stochastic_processes import (
+    create_gbm_samples,
+    create_jump_diffusion_samples,
+    create_ornstein_uhlenbeck_samples,
+    create_regime_switching_samples,
+    create_seeds,
+)
+from model.utils import ArrayProcess
+
+timesteps = 365
+dt = 225
+years = timesteps * dt / epochs_per_year
+
+
+@pytest.mark.parametrize(
+    "create_samples,args",
+    [
+        (create_gbm_samples, (1000, 0.1, 0.8)),
+        (create_jump_diffusion_samples, (1000, 0.1, 0.5, 4, -0.2, 0.1)),
+        (create_ornstein_uhlenbeck_samples, (30, 20, 50, 40, 0)),
+        (
+            create_regime_switching_samples,
+            (1000, [0.5, -0.5], [0.5, 1], [[0.99, 0.01], [0.02, 0.98]]),
+        ),
+    ],
+)
+def test_samples(create_samples, args):
+    samples = create_samples(*args, timesteps=timesteps, dt=dt, runs=5, seeds=1)
+    assert samples.shape == (5, timesteps + 1)
+    assert np.all(samples[:, 0] == args[0])
+    assert np.all(samples >= 0)
+
+    # Each run is seeded separately, so that its samples don't depend on the number of runs
+    np.testing.assert_array_equal(
+        create_samples(*args, timesteps=timesteps, dt=dt, runs=2, seeds=1),
+        samples[:2],
+    )
+    np.testing.assert_array_equal(
+        create_samples(
+            *args, timesteps=timesteps, dt=dt, runs=5, seeds=create_seeds(5, seed=1)
+        ),
+        samples,
+    )
+    assert not np.array_equal(
+        create_samples(*args, timesteps=timesteps, dt=dt, runs=5, seeds=2), samples
+    )
+
+    process = ArrayProcess(samples, dt=dt)
+    assert process(3, 10 * dt) == samples[2][10]
+
+
+def test_gbm_samples():
+    samples = create_gbm_samples(
+        1000, 0.1, 0.8, timesteps=timesteps, dt=dt, runs=4000, seeds=1
+    )
+    log_returns = np.log(samples[:, -1] / samples[:, 0])
+    assert log_returns.mean() == pytest.approx((0.1 - 0.8 ** 2 / 2) * years, abs=0.05)
+    assert log_returns.std() == pytest.approx(0.8 * np.sqrt(years), rel=0.05)
+
+
+def test_jump_diffusion_samples():
+    # The drift is compensated for the jumps
+    samples = create_jump_diffusion_samples(
+        1000, 0.1, 0.5, 4, -0.2, 0.1, timesteps=timesteps, dt=dt, runs=10000, seeds=1
+    )
+    assert samples[:, -1].mean() == pytest.approx(1000 * np.exp(0.1 * years), rel=0.02)
+
+
+def test_ornstein_uhlenbeck_samples():
+    samples = create_ornstein_uhlenbeck_samples(
+        0.9,
+        0.98,
+        50,
+        0.2,
+        minimum=2 / 3,
+        maximum=1,
+        timesteps=timesteps,
+        dt=dt,
+        runs=1000,
+        seeds=1,
+    )
+    assert samples[:, -1].mean() == pytest.approx(0.98, abs=0.005)
+    assert samples.min() >= 2 / 3 and samples.max() <= 1
+
+    with pytest.raises(ValueError):
+        create_ornstein_uhlenbeck_samples(0.9, 0.98, 0, 0.2)
+
+
+def test_regime_switching_samples():
+    samples, regimes = create_regime_switching_samples(
+        1000,
+        [0.5, -0.5],
+        [0.5, 1.0],
+        [[0.99, 0.01], [0.02, 0.98]],
+        timesteps=2000,
+        dt=dt,
+        runs=200,
+        seeds=1,
+        return_regimes=True,
+    )
+    assert samples.shape == regimes.shape == (200, 2001)
+    assert np.all(regimes[:, 0] == 0)
+    # The stationary distribution of the Markov chain spends 1/3 of the time in the second regime
+    assert regimes.mean() == pytest.approx(1 / 3, abs=0.03)
+
+    # Without switching, the process stays in the initial regime
+    _, regimes = create_regime_switching_samples(
+        1000,
+        [0.5, -0.5],
+        [0.5, 1.0],
+        np.eye(2),
+        initial_regime=1,
+        timesteps=timesteps,
+        dt=dt,
+        return_regimes=True,
+    )
+    assert np.all(regimes == 1)
+
+    with pytest.raises(ValueError):
+        create_regime_switching_samples(
+            1000, [0.5, -0.5], [0.5, 1.0], [[0.5, 0.4], [0.5, 0.5]]
+        )
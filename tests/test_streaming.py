@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+from copy import deepcopy
+
+import experiments.templates.monte_carlo_analysis as monte_carlo_analysis
+from experiments.streaming import StreamingAggregator, P2Quantile, run_streaming
+
+
+def test_p2_quantile_accuracy():
+    rng = np.random.default_rng(1)
+    samples = rng.lognormal(size=(5000, 10)) * np.arange(1, 11)
+
+    median = P2Quantile(0.5)
+    for values in samples:
+        median.update(values)
+
+    assert np.allclose(median.value, np.median(samples, axis=0), rtol=0.05)
+
+
+def test_streaming_monte_carlo_bands():
+    simulation = deepcopy(monte_carlo_analysis.experiment.simulations[0])
+    simulation.timesteps = 10
+
+    df = pd.DataFrame(simulation.run())
+    df = df[(df.substep == df.substep.max()) | (df.timestep == 0)]
+
+    aggregator = StreamingAggregator(
+        metrics={
+            "eth_price": None,
+            "eth_supply_usd": lambda state: state["eth_supply"] * state["eth_price"],
+        }
+    )
+    run_streaming(simulation, aggregator)
+    df_bands = aggregator.summary().set_index("timestep")
+
+    assert aggregator.runs == simulation.runs
+    assert len(df_bands) == simulation.timesteps + 1
+
+    grouped = df.groupby("timestep")["eth_price"]
+    assert np.allclose(df_bands["eth_price_mean"], grouped.mean())
+    assert np.allclose(df_bands["eth_price_std"], grouped.std(), equal_nan=True)
+    # With five runs the P² markers are initialized to the sorted observations, so the median is exact
+    assert np.allclose(df_bands["eth_price_q50"], grouped.median())
+    assert (df_bands["eth_supply_usd_q5"] <= df_bands["eth_supply_usd_q95"]).all()
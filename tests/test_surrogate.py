@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import experiments.surrogate as surrogate_module
+from experiments.surrogate import fit_surrogate, get_surrogate
+
+axes = {
+    "eth_price": np.linspace(500, 4000, 5),
+    "eth_staked": np.geomspace(1e6, 30e6, 5),
+}
+
+
+def test_surrogate_interpolation():
+    surrogate = fit_surrogate(axes, validation_points=10)
+
+    # The surrogate is exact at the grid points
+    point = surrogate.predict(
+        eth_price=axes["eth_price"][1], eth_staked=axes["eth_staked"][2]
+    )
+    expected = surrogate.values[1, 2]
+    assert np.allclose(list(point.values()), expected)
+
+    # Point and batch queries agree
+    df = surrogate.predict(eth_price=[1000, 2000], eth_staked=5e6)
+    assert len(df) == 2
+    assert np.isclose(
+        df.iloc[1]["total_profit_yields"],
+        surrogate.predict(eth_price=2000, eth_staked=5e6)["total_profit_yields"],
+    )
+
+    assert set(surrogate.error.columns) == {"max_abs_error", "rmse"}
+    assert (surrogate.error["max_abs_error"] < 0.05).all()
+
+    with pytest.raises(ValueError):
+        surrogate.predict(eth_price=10_000, eth_staked=5e6)
+
+
+def test_surrogate_refit_on_parameter_change(tmp_path):
+    path = str(tmp_path / "surrogate.pickle")
+    surrogate = get_surrogate(axes, validation_points=2, path=path)
+    assert get_surrogate(axes, path=path).fingerprint == surrogate.fingerprint
+
+    simulation = surrogate_module.get_grid_simulation()
+    simulation.model.params.update({"BASE_REWARD_FACTOR": [128]})
+    refitted = get_surrogate(
+        axes, simulation=simulation, validation_points=2, path=path
+    )
+
+    assert refitted.fingerprint != surrogate.fingerprint
+    assert (
+        refitted.predict(eth_price=2000, eth_staked=5e6)["total_revenue_yields"]
+        > surrogate.predict(eth_price=2000, eth_staked=5e6)["total_revenue_yields"]
+    )
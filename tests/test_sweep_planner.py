@@ -0,0 +1,50 @@
+import numpy as np
+from copy import deepcopy
+from radcad.utils import generate_cartesian_product_parameter_sweep
+
+import experiments.default_experiment as base
+from experiments.sweep_planner import (
+    get_state_variable_dependencies,
+    plan_sweep,
+    run_sweep,
+)
+
+
+def test_state_variable_dependencies():
+    model = base.experiment.simulations[0].model
+    dependencies = get_state_variable_dependencies(
+        model.state_update_blocks, model.params, model.initial_state
+    )
+
+    assert "validator_hardware_costs_per_epoch" in dependencies["total_profit_yields"]
+    assert "validator_hardware_costs_per_epoch" not in dependencies["eth_supply"]
+    assert "BASE_REWARD_FACTOR" in dependencies["eth_supply"]
+
+
+def test_sweep_deduplication():
+    simulation = deepcopy(base.experiment.simulations[0])
+    simulation.timesteps = 20
+    hardware_costs = simulation.model.params["validator_hardware_costs_per_epoch"][0]
+    simulation.model.params.update(
+        generate_cartesian_product_parameter_sweep(
+            {
+                "validator_hardware_costs_per_epoch": [
+                    hardware_costs * factor for factor in [0.5, 1, 2]
+                ],
+                "BASE_REWARD_FACTOR": [32, 64],
+            }
+        )
+    )
+
+    plan = plan_sweep(simulation)
+    assert plan.fanout_params == {"validator_hardware_costs_per_epoch"}
+    assert len(plan.groups) == 2
+
+    expected = deepcopy(simulation).run()
+    results = run_sweep(simulation)
+
+    assert len(results) == len(expected)
+    for record, expected_record in zip(results, expected):
+        assert record.keys() == expected_record.keys()
+        for key, value in expected_record.items():
+            assert np.array_equal(record[key], value), key
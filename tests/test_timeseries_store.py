@@ -0,0 +1,65 @@
+import multiprocessing
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from data.timeseries_store import TimeSeriesStore, seconds_per_epoch
+
+
+def test_timeseries_store(tmp_path):
+    store = TimeSeriesStore(tmp_path)
+    eth_day = store["eth_day"]
+    assert isinstance(eth_day["close"], np.memmap)
+    assert np.all(np.diff(eth_day.timestamps) > 0)
+
+    # Window queries are inclusive views of the memory-mapped arrays
+    timestamps, close = eth_day.window("close", "2019-01-01", "2019-01-31")
+    assert len(close) == 31
+    df = pd.read_csv("data/ETH_day.csv").set_index("Date")
+    assert close[0] == df.loc["2019-01-01", "Close"]
+    assert close[-1] == df.loc["2019-01-31", "Close"]
+
+    # Resampled to a value every `dt` epochs
+    daily = eth_day.resample("close", start="2019-01-01", periods=31, dt=225)
+    np.testing.assert_allclose(daily, close)
+    assert seconds_per_epoch * 225 == 24 * 60 * 60
+    previous = eth_day.resample(
+        "close", start="2019-01-01 12:00", end="2019-01-03", dt=225, method="previous"
+    )
+    np.testing.assert_array_equal(previous, close[:2])
+
+    # The hourly dataset agrees with the daily dataset at midnight
+    hourly = store["eth_1h"].resample("open", start="2019-01-01", periods=10, dt=225)
+    np.testing.assert_allclose(
+        hourly, eth_day.window("open", "2019-01-01", "2019-01-10")[1]
+    )
+
+    # Converted once, and pickled by reference to the store
+    reloaded = TimeSeriesStore(tmp_path)
+    assert reloaded._is_current("eth_day", tmp_path / "eth_day")
+    unpickled = pickle.loads(pickle.dumps(eth_day))
+    assert len(pickle.dumps(eth_day)) < 1000
+    assert isinstance(unpickled["close"], np.memmap)
+    np.testing.assert_array_equal(unpickled["close"], eth_day["close"])
+
+
+def test_timeseries_store_concurrent_conversion(tmp_path):
+    # Worker processes converting the same dataset concurrently each write to their own temporary files
+    with multiprocessing.get_context("spawn").Pool(4) as pool:
+        lengths = pool.map(_convert_ether_price, [str(tmp_path)] * 8)
+
+    series = TimeSeriesStore(tmp_path)["ether_price"]
+    assert lengths == [len(series)] * 8
+    assert sorted(os.listdir(tmp_path / "ether_price")) == [
+        "meta.json",
+        "timestamp.npy",
+        "value.npy",
+    ]
+
+
+def _convert_ether_price(directory):
+    store = TimeSeriesStore(directory)
+    store._convert("ether_price", os.path.join(directory, "ether_price"))
+    return len(store["ether_price"])
@@ -0,0 +1,58 @@
+from copy import deepcopy
+
+import pytest
+from pandas._testing import assert_frame_equal
+from radcad import Simulation
+
+import experiments.run
+import experiments.templates.time_domain_analysis as time_domain_analysis
+from model.types import ValidationLevel
+
+
+def _simulation(validation_level, **params):
+    simulation: Simulation = deepcopy(time_domain_analysis.experiment.simulations[0])
+    simulation.model.params.update({"validation_level": [validation_level], **params})
+    return simulation
+
+
+def test_validation_levels():
+    # Validator uptime below 2/3 from the 50th timestep
+    uptime_process = lambda _run, timestep: 0.5 if timestep >= 50 * 225 else 0.98
+    params = {"validator_uptime_process": [uptime_process], "dt": [225]}
+
+    with pytest.raises(AssertionError, match="uptime"):
+        _simulation(ValidationLevel.FULL, **params).run()
+
+    # Sampled validation catches the invariant violation up front, before running the simulation
+    simulation = _simulation(ValidationLevel.SAMPLED, **params)
+    simulation.after_simulation = lambda simulation: pytest.fail("Simulation ran")
+    with pytest.raises(AssertionError, match="uptime"):
+        simulation.run()
+
+    _simulation(ValidationLevel.OFF, **params).run()
+
+
+def test_validation_level_performance(record_property):
+    def run(simulation):
+        timings = {}
+        df, _exceptions = experiments.run.run(deepcopy(simulation), timings=timings)
+        return timings["simulation"], df
+
+    durations = {}
+    results = {}
+    for level in ValidationLevel:
+        durations[level], results[level] = min(
+            (run(_simulation(level)) for _ in range(3)), key=lambda result: result[0]
+        )
+
+    # The durations, and the overhead relative to no validation, are reported (e.g. `pytest --junitxml=...`)
+    # rather than asserted, as wall-clock durations vary between runs
+    for level, duration in durations.items():
+        record_property(f"{level.name.lower()}_simulation_duration", duration)
+        record_property(
+            f"{level.name.lower()}_overhead",
+            duration / durations[ValidationLevel.OFF] - 1,
+        )
+
+    assert_frame_equal(results[ValidationLevel.OFF], results[ValidationLevel.FULL])
+    assert_frame_equal(results[ValidationLevel.SAMPLED], results[ValidationLevel.FULL])
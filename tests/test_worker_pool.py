@@ -0,0 +1,31 @@
+from copy import deepcopy
+
+import pandas as pd
+
+from experiments.templates.monte_carlo_analysis import experiment
+from experiments.worker_pool import WorkerPool
+
+
+def test_worker_pool():
+    experiment_copy = deepcopy(experiment)
+    experiment_copy.simulations[0].timesteps = 10
+    experiment_copy.simulations[0].runs = 2
+    experiment_copy.simulations[0].model.params.update({"BASE_REWARD_FACTOR": [32, 64]})
+    df = pd.DataFrame(deepcopy(experiment_copy).run())
+
+    with WorkerPool(processes=2, maxtasksperchild=2) as pool:
+        assert pool.health_check()["healthy"]
+
+        # Experiments are run repeatedly on the same pool
+        for _ in range(2):
+            df_pool = pd.DataFrame(pool.run(deepcopy(experiment_copy)))
+            pd.testing.assert_frame_equal(
+                df_pool.drop(columns=["timestamp"]), df.drop(columns=["timestamp"])
+            )
+
+        utilisation = pool.utilisation()
+        assert utilisation["tasks"] == 8
+        # Workers are recycled after two runs
+        assert utilisation["workers_used"] > 2
+        assert 0 < utilisation["utilisation"] <= 1
+        assert pool.health_check()["healthy"]